@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""Benchmark the validators and indexers on a synthetic repository.
+
+Generates a deterministic corpus laid out the way the scripts expect:
+    .claude-plugin/marketplace.json
+    plugins/pNNNNN/.claude-plugin/plugin.json
+    plugins/pNNNNN/skills/sNN/SKILL.md
+    plugins/pNNNNN/agents/aNN.md
+    docs/decisions/NNNN-adr-N.md
+    docs/research/YYYY-MM-DD-topic-N.md
+    README.md
+Every document gets valid front matter, a body of the requested size with
+headings, links (some with #fragments, a share deliberately broken) and
+fenced code blocks that contain link-like text.
+
+Each script's main phases are timed on the corpus at one or more scales
+(total file counts), best of --rounds, with a cold repository snapshot per
+phase. The fetch scripts mirror the corpus's markdown files from a local
+HTTP server standing in for the docs sites (llms.txt, llms-full.txt and one
+page per file, with ETags), search_docs.py indexes that mirror and
+plugin_bundle.py packs and verifies every plugin. Results can be saved as a
+JSON baseline and later runs compared against it; phases slower than the
+baseline by more than --threshold are reported as regressions and the run
+exits 1.
+
+Usage:
+    python scripts/benchmark.py                              # 10, 100, 1000 files
+    python scripts/benchmark.py --scales 10000 100000 --rounds 1
+    python scripts/benchmark.py --save .cache/benchmark.json
+    python scripts/benchmark.py --baseline .cache/benchmark.json --threshold 0.25
+    python scripts/benchmark.py --generate /tmp/corpus --scales 1000
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+
+import catalog
+import fetch_api_docs
+import fetch_claude_code_docs
+import fetch_engine
+import front_matter
+import index_decisions
+import index_research
+import plugin_bundle
+import plugin_catalog
+import repo_scan
+import search_docs
+import validate_frontmatter
+import validate_links
+import validate_manifests
+
+BASELINE_VERSION = 1
+DEFAULT_SCALES = [10, 100, 1000]
+DEFAULT_ROUNDS = 3
+DEFAULT_THRESHOLD = 0.25
+# Phases faster than this are too noisy to flag
+MIN_SECONDS = 0.005
+
+
+class CorpusSpec(NamedTuple):
+    plugins: int = 1
+    skills_per_plugin: int = 4
+    agents_per_plugin: int = 2
+    adrs: int = 1
+    research: int = 1
+    body_lines: int = 60
+    # Per 100 body lines
+    link_density: float = 5.0
+    fence_density: float = 2.0
+    broken_link_ratio: float = 0.05
+    seed: int = 0
+
+    @property
+    def files(self) -> int:
+        """Markdown files the corpus will contain, README.md included."""
+        per_plugin = self.skills_per_plugin + self.agents_per_plugin
+        return self.plugins * per_plugin + self.adrs + self.research + 1
+
+
+DEFAULT_SPEC = CorpusSpec()
+
+
+def spec_for(files: int, **overrides) -> CorpusSpec:
+    """A corpus of about files markdown files: 90% plugin content, 10% docs."""
+    base = CorpusSpec(**overrides)
+    docs = max(1, files // 20)
+    per_plugin = base.skills_per_plugin + base.agents_per_plugin
+    plugins = max(1, (files - 2 * docs - 1) // per_plugin)
+    return base._replace(plugins=plugins, adrs=docs, research=docs)
+
+
+def relative(source: str, target: str) -> str:
+    """Link from the file at source to the file at target, both root-relative."""
+    return Path(os.path.relpath(target, os.path.dirname(source))).as_posix()
+
+
+def body(
+    rng: random.Random, spec: CorpusSpec, source: str, targets: list[str], stats: dict
+) -> str:
+    """Markdown body with headings, links and code fences at the spec's densities."""
+    lines: list[str] = []
+    sections = 0
+    while len(lines) < spec.body_lines:
+        if len(lines) % 12 == 0:
+            sections += 1
+            lines += [f"## Section {sections}", ""]
+            continue
+        roll = rng.random() * 100
+        if roll < spec.fence_density:
+            lines += ["```python", "value = data[0]  # [not](a-link.md)", "```"]
+        elif roll < spec.fence_density + spec.link_density:
+            if rng.random() < spec.broken_link_ratio:
+                target = f"missing-{rng.randrange(1000)}.md"
+                stats["broken"] += 1
+            else:
+                target = relative(source, rng.choice(targets))
+                if rng.random() < 0.3:
+                    target += "#section-1"
+            stats["links"] += 1
+            lines.append(f"Prose that refers to [another document]({target}) in passing.")
+        else:
+            lines.append("Wrapped prose about eighty characters long, as the docs are written.")
+    return "\n".join(lines) + "\n"
+
+
+def generate(root: Path, spec: CorpusSpec) -> dict[str, int]:
+    """Write the corpus under root. Returns counts of files, links and broken links."""
+    rng = random.Random(spec.seed)
+    stats = {"files": 0, "links": 0, "broken": 0}
+    documents: dict[str, str] = {}
+
+    plugins = []
+    for p in range(spec.plugins):
+        name = f"p{p:05d}"
+        plugins.append({"name": name, "source": name, "description": f"Plugin {p}"})
+        for s in range(spec.skills_per_plugin):
+            documents[f"plugins/{name}/skills/s{s:02d}/SKILL.md"] = (
+                f"---\nname: skill-{p}-{s}\ndescription: Skill {s} of plugin {p}\n"
+                "author: bench\nlicense: MIT\n---\n"
+            )
+        for a in range(spec.agents_per_plugin):
+            documents[f"plugins/{name}/agents/a{a:02d}.md"] = (
+                f"---\nname: agent-{p}-{a}\ndescription: Agent {a}\nmodel: sonnet\n"
+                "color: blue\ntools: Read, Grep\n---\n"
+            )
+    for i in range(spec.adrs):
+        documents[f"docs/decisions/{i + 1:04d}-adr-{i + 1}.md"] = (
+            f'---\ntitle: "ADR-{i + 1:04d}: Decision {i + 1}"\nstatus: accepted\n'
+            "date: 2026-01-01\ndecision-makers: [alice, bob]\n---\n"
+        )
+    started = date(2026, 1, 1)
+    for i in range(spec.research):
+        day = started + timedelta(days=i % 365)
+        documents[f"docs/research/{day}-topic-{i}.md"] = (
+            f'---\nquestion: "Question {i}?"\nstatus: concluded\nstarted: {day}\n'
+            f"concluded: {day}\nstale_after: 100000\ntags: [t{i % 10}, bench]\n---\n"
+        )
+    documents["README.md"] = "# Corpus\n"
+
+    targets = sorted(documents)
+    for path, header in documents.items():
+        file = root / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(f"{header}\n# {file.stem}\n\n{body(rng, spec, path, targets, stats)}")
+        stats["files"] += 1
+
+    for entry in plugins:
+        manifest = root / "plugins" / entry["source"] / ".claude-plugin" / "plugin.json"
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(
+            json.dumps(
+                {
+                    "name": entry["source"],
+                    "version": "1.0.0",
+                    "description": entry["description"],
+                    "author": {"name": "bench"},
+                    "license": "MIT",
+                }
+            )
+        )
+    marketplace = root / ".claude-plugin" / "marketplace.json"
+    marketplace.parent.mkdir(parents=True, exist_ok=True)
+    marketplace.write_text(
+        json.dumps({"name": "bench", "owner": {}, "metadata": {}, "plugins": plugins})
+    )
+    return stats
+
+
+class DocsSite:
+    """Local HTTP server standing in for a docs site, serving a corpus's markdown files.
+
+    Each file is a page at /docs/en/<path>, listed in /api/llms.txt and
+    /code/llms.txt (the formats fetch_api_docs.py and fetch_claude_code_docs.py
+    parse) and concatenated in /code/llms-full.txt. Responses carry an ETag
+    and conditional requests for unchanged pages get 304.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.responses: dict[str, bytes] = {}
+        pages = {}
+        for path in sorted(root.rglob("*.md")):
+            relative = path.relative_to(root).as_posix()
+            pages[f"/docs/en/{relative}"] = f"# {relative}\n\n" + path.read_text(encoding="utf-8")
+        self.responses.update((path, text.encode("utf-8")) for path, text in pages.items())
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; don't hold the body for an ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                body = site.responses.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        api, code, full = [], [], []
+        for path, text in pages.items():
+            title, _, rest = text.partition("\n")
+            api.append(f"- [{path}]({self.url}{path}) - Page {path}")
+            code.append(f"- [{path}]({self.url}{path}): Page {path}")
+            full.append(f"{title}\nSource: {self.url}{path.removesuffix('.md')}\n{rest}")
+        self.responses["/api/llms.txt"] = "\n".join(api).encode("utf-8")
+        self.responses["/code/llms.txt"] = "\n".join(code).encode("utf-8")
+        self.responses["/code/llms-full.txt"] = "\n".join(full).encode("utf-8")
+
+    def __enter__(self) -> "DocsSite":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def cold() -> None:
+    """Forget everything read so far, as a new process would."""
+    repo_scan.reset_snapshot()
+    front_matter.clear_cache()
+
+
+def _validate_manifests(cache: dict | None = None) -> None:
+    validate_manifests.validate_streaming(validate_manifests.MARKETPLACE_PATH, cache=cache)
+
+
+def _validate_frontmatter() -> None:
+    snapshot = repo_scan.get_snapshot()
+    for kind, path in validate_frontmatter.discover():
+        validate_frontmatter.check_document(kind, path, snapshot.document(path).front_matter)
+
+
+def phases(scratch: Path, site_url: str) -> dict[str, Callable[[], object]]:
+    """The phases to time, run from the corpus root. Later phases may use earlier results.
+
+    site_url is a DocsSite serving the corpus. Phases that write get a fresh
+    directory under scratch on every call, so each round does the same work.
+    """
+    state: dict = {}
+    fresh = (scratch / str(n) for n in itertools.count())
+    client = fetch_engine.HttpClient("benchmark/1.0")
+
+    def fetch_index() -> None:
+        text = client.get_text(f"{site_url}/code/llms.txt")
+        state["entries"] = fetch_claude_code_docs.parse_llms_txt(text)
+
+    def fetch_mirror() -> None:
+        state["mirror"] = next(fresh)
+        fetch_engine.mirror(state["entries"], state["mirror"], client, rate=0)
+
+    def search_index() -> None:
+        state["db"] = next(fresh) / "search.sqlite"
+        conn = search_docs.connect(state["db"])
+        try:
+            search_docs.update_index(conn, [state["mirror"]])
+        finally:
+            conn.close()
+
+    def search_query() -> None:
+        conn = search_docs.connect(state["db"])
+        try:
+            search_docs.search(conn, search_docs.to_fts_query(["section", "prose"]))
+        finally:
+            conn.close()
+
+    def bundle_pack() -> None:
+        state["bundles"] = output = next(fresh)
+        for entry in validate_manifests.load_marketplace()["plugins"]:
+            plugin_bundle.pack(entry, output)
+        index = plugin_bundle.render_index(plugin_bundle.build_index(output))
+        (output / plugin_bundle.INDEX_NAME).write_text(index, encoding="utf-8")
+
+    def links_check() -> None:
+        state["files"] = validate_links.collect_markdown_files()
+        _, state["broken"], state["cache"] = validate_links.check_links(state["files"])
+
+    def manifests_validate() -> None:
+        state["manifests"] = {}
+        _validate_manifests(state["manifests"])
+
+    return {
+        "frontmatter.discover": validate_frontmatter.discover,
+        "frontmatter.validate": _validate_frontmatter,
+        "links.collect": validate_links.collect_markdown_files,
+        "links.check": links_check,
+        "links.check_cached": lambda: validate_links.check_links(state["files"], state["cache"]),
+        "manifests.validate": manifests_validate,
+        # Copied: the cached run replaces the cache's contents
+        "manifests.validate_cached": lambda: _validate_manifests(dict(state["manifests"])),
+        "plugin_catalog.build": plugin_catalog.build_catalog,
+        "index_decisions.build": lambda: index_decisions.build_index(
+            index_decisions.collect_adrs(index_decisions.DECISIONS_DIR)
+        ),
+        "index_research.build": lambda: index_research.build_index(
+            index_research.collect_research(index_research.RESEARCH_DIR, date.today(), write=False)
+        ),
+        "catalog.sqlite": lambda: catalog.write_sqlite(
+            scratch / "research.sqlite",
+            catalog.build_catalog(
+                "research",
+                index_research.collect_research(
+                    index_research.RESEARCH_DIR, date.today(), write=False
+                ),
+            ),
+        ),
+        "fetch_api_docs.index": lambda: fetch_api_docs.parse_llms_txt(
+            client.get_text(f"{site_url}/api/llms.txt")
+        ),
+        "fetch_claude_code_docs.index": fetch_index,
+        "fetch.mirror": fetch_mirror,
+        # Every page is a conditional request answered with 304
+        "fetch.mirror_cached": lambda: fetch_engine.mirror(
+            state["entries"], state["mirror"], client, rate=0
+        ),
+        "fetch.full_text": lambda: fetch_engine.mirror_full_text(
+            state["entries"], next(fresh), client, f"{site_url}/code/llms-full.txt", rate=0
+        ),
+        "search_docs.index": search_index,
+        "search_docs.query": search_query,
+        "plugin_bundle.pack": bundle_pack,
+        "plugin_bundle.verify": lambda: plugin_bundle.verify(
+            state["bundles"], validate_manifests.load_marketplace()["plugins"]
+        ),
+    }
+
+
+def run(root: Path, rounds: int) -> dict[str, float]:
+    """Best-of-rounds seconds for each phase on the corpus at root."""
+    results: dict[str, float] = {}
+    with (
+        tempfile.TemporaryDirectory() as scratch,
+        contextlib.chdir(root),
+        DocsSite(root) as site,
+    ):
+        for name, func in phases(Path(scratch), site.url).items():
+            best = float("inf")
+            for _ in range(rounds):
+                cold()
+                start = time.perf_counter()
+                # The scripts report progress on stdout
+                with contextlib.redirect_stdout(io.StringIO()):
+                    func()
+                best = min(best, time.perf_counter() - start)
+            results[name] = best
+    cold()
+    return results
+
+
+def compare(
+    baseline: dict, results: dict, threshold: float, min_seconds: float = MIN_SECONDS
+) -> list[str]:
+    """Phases slower than the baseline by more than threshold (a fraction)."""
+    regressions = []
+    for scale, timings in results.items():
+        old = baseline.get("results", {}).get(scale, {}).get("phases", {})
+        for name, seconds in timings["phases"].items():
+            before = old.get(name)
+            if before is None or seconds < min_seconds:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append(
+                    f"{scale} files: {name} {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                    f"(+{(seconds / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scripts on a synthetic corpus.")
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        type=int,
+        default=DEFAULT_SCALES,
+        metavar="FILES",
+        help=f"Corpus sizes in files (default: {' '.join(map(str, DEFAULT_SCALES))})",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        metavar="N",
+        help=f"Runs per phase; the fastest counts (default: {DEFAULT_ROUNDS})",
+    )
+    parser.add_argument("--body-lines", type=int, default=DEFAULT_SPEC.body_lines, metavar="N")
+    parser.add_argument("--link-density", type=float, default=DEFAULT_SPEC.link_density)
+    parser.add_argument("--fence-density", type=float, default=DEFAULT_SPEC.fence_density)
+    parser.add_argument("--broken-ratio", type=float, default=DEFAULT_SPEC.broken_link_ratio)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SPEC.seed)
+    parser.add_argument("--save", type=Path, metavar="PATH", help="Write results as a baseline")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        metavar="PATH",
+        help="Compare with a saved baseline; exit 1 on regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        metavar="FRACTION",
+        help=f"Slowdown that counts as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--generate",
+        type=Path,
+        metavar="DIR",
+        help="Only write the corpus for the first scale to DIR",
+    )
+    args = parser.parse_args([] if argv is None else argv)
+
+    def spec(files: int) -> CorpusSpec:
+        return spec_for(
+            files,
+            body_lines=args.body_lines,
+            link_density=args.link_density,
+            fence_density=args.fence_density,
+            broken_link_ratio=args.broken_ratio,
+            seed=args.seed,
+        )
+
+    if args.generate:
+        stats = generate(args.generate, spec(args.scales[0]))
+        print(f"wrote {stats['files']} file(s) to {args.generate}")
+        return
+
+    results: dict[str, dict] = {}
+    for files in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = generate(Path(tmp), spec(files))
+            timings = run(Path(tmp), args.rounds)
+        results[str(files)] = {**stats, "phases": timings}
+        print(f"{stats['files']} file(s), {stats['links']} link(s):")
+        for name, seconds in timings.items():
+            per_file = seconds / stats["files"] * 1e6
+            print(f"  {name:<28} {seconds * 1000:>10.1f} ms  {per_file:>8.1f} us/file")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {
+            "version": BASELINE_VERSION,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        args.save.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {args.save}")
+
+    if args.baseline:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"error: cannot read baseline {args.baseline}: {e}")
+            sys.exit(1)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+"""Machine-readable catalogs written by the index scripts.
+
+Next to the markdown _INDEX.md, index_decisions.py and index_research.py can
+write the same entries as a compact JSON catalog and as an SQLite database,
+so dashboards and agents can query documents without parsing markdown.
+
+SQLite schema:
+    documents(id, filename, number, title, status, date, concluded, fields)
+    tags(document_id, tag)
+    people(document_id, name)      -- ADR decision-makers
+
+date is the ADR date or the research started date; fields holds the full
+front matter as JSON. status, date, tag and name are indexed, e.g.:
+    SELECT d.filename FROM documents d JOIN tags t ON t.document_id = d.id
+    WHERE d.status = 'stale' AND t.tag = 'hooks'
+    SELECT filename FROM documents WHERE status = 'superseded' AND date >= '2026-01-01'
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE documents (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    number TEXT,
+    title TEXT,
+    status TEXT,
+    date TEXT,
+    concluded TEXT,
+    fields TEXT NOT NULL
+);
+CREATE TABLE tags (document_id INTEGER NOT NULL REFERENCES documents(id), tag TEXT NOT NULL);
+CREATE TABLE people (document_id INTEGER NOT NULL REFERENCES documents(id), name TEXT NOT NULL);
+CREATE INDEX documents_status ON documents(status, date);
+CREATE INDEX documents_date ON documents(date);
+CREATE INDEX tags_tag ON tags(tag, document_id);
+CREATE INDEX people_name ON people(name, document_id);
+"""
+
+
+def as_list(value) -> list[str]:
+    """A front matter value as a list of strings; scalars become one item."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def as_text(value) -> str | None:
+    """A front matter value as a single string column; lists are comma-joined."""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+def catalog_record(entry: dict) -> dict:
+    """One document's catalog record: common columns plus all of its front matter."""
+    fields = {k: v for k, v in entry.items() if k not in ("filename", "number")}
+    return {
+        "filename": entry["filename"],
+        "number": entry.get("number"),
+        "title": as_text(entry.get("title", entry.get("question"))),
+        "status": as_text(entry.get("status")),
+        "date": as_text(entry.get("date", entry.get("started"))),
+        "concluded": as_text(entry.get("concluded")),
+        "tags": as_list(entry.get("tags")),
+        "decision_makers": as_list(entry.get("decision-makers")),
+        "fields": fields,
+    }
+
+
+def build_catalog(kind: str, entries: list[dict]) -> dict:
+    """The JSON catalog for a list of index entries."""
+    return {
+        "version": CATALOG_VERSION,
+        "kind": kind,
+        "documents": [catalog_record(e) for e in entries],
+    }
+
+
+def write_json(path: Path, catalog: dict) -> None:
+    """Write the JSON catalog atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(catalog, separators=(",", ":"), sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_sqlite(path: Path, catalog: dict) -> None:
+    """Build the SQLite catalog in a temporary file, then swap it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", str(catalog["version"])), ("kind", catalog["kind"])],
+        )
+        for doc in catalog["documents"]:
+            cur = conn.execute(
+                "INSERT INTO documents (filename, number, title, status, date, concluded, fields)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    doc["filename"],
+                    doc["number"],
+                    doc["title"],
+                    doc["status"],
+                    doc["date"],
+                    doc["concluded"],
+                    json.dumps(doc["fields"], sort_keys=True),
+                ),
+            )
+            doc_id = cur.lastrowid
+            conn.executemany("INSERT INTO tags VALUES (?, ?)", [(doc_id, t) for t in doc["tags"]])
+            conn.executemany(
+                "INSERT INTO people VALUES (?, ?)", [(doc_id, n) for n in doc["decision_makers"]]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Run the repository checks from one process.
+
+Each check is a subcommand that runs its script's main() with the arguments
+given, so its output and exit code are exactly those of the script:
+    python scripts/check.py links --changed-since origin/main
+    python scripts/check.py research --check
+
+`all` runs every check the way CI does (index scripts with --check,
+validators with --changed-since REF when given), concurrently on a thread
+pool. The checks share one repository snapshot (see repo_scan.py), so a file
+read or directory listed by one check is not read or listed again by the
+next, and the interpreter starts once instead of once per script. Each
+check's stdout and stderr are captured and printed as one block per check,
+in the order below, as soon as it and the checks before it have finished.
+`all` exits 1 if any check failed. With --jobs 1 the checks run one after
+another on the main thread and their output is not captured.
+
+Check modules are imported only when their check runs.
+
+--profile and --timings-json PATH on `all` report the combined counters of
+every check, and each check's phases under its own name (a profiling scope,
+see profiling.py), whether the checks run concurrently or not.
+
+Usage:
+    python scripts/check.py all                            # everything, concurrently
+    python scripts/check.py all --changed-since origin/main
+    python scripts/check.py all --only links --only manifests
+    python scripts/check.py manifests --jobs 4             # one check, its own options
+"""
+
+import argparse
+import importlib
+import io
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import NamedTuple
+
+import profiling
+
+# name: (module, arguments under `all`, whether --changed-since applies)
+CHECKS = {
+    "research": ("index_research", ["--check"], False),
+    "decisions": ("index_decisions", ["--check"], False),
+    "manifests": ("validate_manifests", [], True),
+    "frontmatter": ("validate_frontmatter", [], True),
+    "links": ("validate_links", [], True),
+}
+
+
+class Result(NamedTuple):
+    name: str
+    code: int
+    output: list[tuple[str, str]]  # (stream name, text), in write order
+    seconds: float
+
+
+class ThreadOutput(io.TextIOBase):
+    """Stand-in for sys.stdout / sys.stderr that captures writes from checks on worker threads.
+
+    Threads that haven't started a capture write straight to the real stream.
+    """
+
+    local = threading.local()
+
+    def __init__(self, name: str, stream) -> None:
+        self.name = name
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        captured = getattr(self.local, "output", None)
+        if captured is None:
+            return self.stream.write(text)
+        captured.append((self.name, text))
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(self.local, "output", None) is None:
+            self.stream.flush()
+
+
+def exit_code(e: SystemExit) -> int:
+    """The process exit status sys.exit(e.code) would give."""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def run_check(name: str, argv: list[str], capture: bool) -> Result:
+    """Run one check's main(); with capture, keep its output instead of printing it."""
+    module = importlib.import_module(CHECKS[name][0])
+    output: list[tuple[str, str]] = []
+    if capture:
+        ThreadOutput.local.output = output
+    start = perf_counter()
+    try:
+        with profiling.scope(name):
+            module.main(argv)
+        code = 0
+    except SystemExit as e:
+        code = exit_code(e)
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        ThreadOutput.local.output = None
+    return Result(name, code, output, perf_counter() - start)
+
+
+def replay(result: Result) -> None:
+    for stream, text in result.output:
+        getattr(sys, stream).write(text)
+    sys.stdout.flush()
+
+
+@profiling.profiled("check")
+def run_all(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="check.py all", description="Run every repository check in one process."
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(CHECKS),
+        help="Check to run; repeatable (default: all)",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Pass --changed-since REF to the validators",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=len(CHECKS),
+        metavar="N",
+        help=f"Checks to run at once (default: {len(CHECKS)})",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure(args)
+
+    names = [name for name in CHECKS if not args.only or name in args.only]
+    commands = {}
+    for name in names:
+        module, extra, scoped = CHECKS[name]
+        commands[name] = list(extra)
+        if scoped and args.changed_since:
+            commands[name] += ["--changed-since", args.changed_since]
+        # Import up front so worker threads never import concurrently
+        importlib.import_module(module)
+
+    start = perf_counter()
+    if args.jobs <= 1:
+        results = []
+        for name in names:
+            print(f"==> {name}", flush=True)
+            results.append(run_check(name, commands[name], capture=False))
+    else:
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = ThreadOutput("stdout", stdout), ThreadOutput("stderr", stderr)
+        try:
+            with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+                futures = [pool.submit(run_check, n, commands[n], True) for n in names]
+                results = []
+                for future in futures:
+                    result = future.result()
+                    print(f"==> {result.name}", flush=True)
+                    replay(result)
+                    results.append(result)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+    elapsed = perf_counter() - start
+    failed = [r.name for r in results if r.code]
+    times = ", ".join(f"{r.name} {r.seconds * 1000:.0f} ms" for r in results)
+    print()
+    if failed:
+        print(f"{len(failed)} of {len(results)} check(s) failed: {', '.join(failed)}")
+    else:
+        print(f"All {len(results)} check(s) passed")
+    print(f"({elapsed * 1000:.0f} ms: {times})")
+    if failed:
+        sys.exit(1)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = [] if argv is None else argv
+    if argv and argv[0] in CHECKS:
+        result = run_check(argv[0], argv[1:], capture=False)
+        if result.code:
+            sys.exit(result.code)
+        return
+    if argv and argv[0] == "all":
+        run_all(argv[1:])
+        return
+    print("usage: check.py {all," + ",".join(CHECKS) + "} [ARGS...]")
+    print()
+    print("  all            run every check in one process (check.py all --help)")
+    for name, (module, _, _) in CHECKS.items():
+        print(f"  {name:<14} scripts/{module}.py [ARGS...]")
+    sys.exit(0 if argv[:1] in (["-h"], ["--help"]) else 2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
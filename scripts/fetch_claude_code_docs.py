@@ -11,24 +11,39 @@ Usage:
     python scripts/fetch_claude_code_docs.py --only hooks skills plugins  # subset
     python scripts/fetch_claude_code_docs.py --list              # show available pages
     python scripts/fetch_claude_code_docs.py --delay 0.5         # gentle rate limiting
+    python scripts/fetch_claude_code_docs.py --workers 8 --rate 10  # faster mirror
+    python scripts/fetch_claude_code_docs.py --full              # one download via llms-full.txt
+    python scripts/fetch_claude_code_docs.py --profile           # time per phase, request counts
+    python scripts/fetch_claude_code_docs.py --no-search-index   # skip the search index update
 """
 
 import argparse
 import re
 import sys
-import time
-import urllib.request
-import urllib.error
 from pathlib import Path
 
+import profiling
+import search_docs
+from fetch_engine import (
+    DEFAULT_RATE,
+    DEFAULT_WORKERS,
+    FETCH_ERRORS,
+    HttpClient,
+    mirror,
+    mirror_full_text,
+    url_to_path,
+)
+from profiling import phase
+
 LLMS_TXT_URL = "https://code.claude.com/docs/llms.txt"
+LLMS_FULL_TXT_URL = "https://code.claude.com/docs/llms-full.txt"
+USER_AGENT = "claude-code-docs-fetcher/1.0"
+CLIENT = HttpClient(USER_AGENT)
 
 
 def fetch(url: str) -> str:
     """Fetch a URL and return its text content."""
-    req = urllib.request.Request(url, headers={"User-Agent": "claude-code-docs-fetcher/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return resp.read().decode("utf-8")
+    return CLIENT.get_text(url)
 
 
 def parse_llms_txt(text: str) -> list[dict]:
@@ -41,7 +56,7 @@ def parse_llms_txt(text: str) -> list[dict]:
             # Extract path after /en/ and drop .md
             # e.g. https://code.claude.com/docs/en/hooks-guide.md -> hooks-guide
             # e.g. https://code.claude.com/docs/en/sdk/migration-guide.md -> sdk/migration-guide
-            path_part = url.split("/en/", 1)[-1].removesuffix(".md")
+            path_part = url_to_path(url)
             name = path_part.replace("/", "--")  # flatten for filtering, keep original for paths
             entries.append({
                 "name": name,
@@ -53,7 +68,8 @@ def parse_llms_txt(text: str) -> list[dict]:
     return entries
 
 
-def main():
+@profiling.profiled("fetch_claude_code_docs")
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(
         description="Fetch Claude Code documentation from code.claude.com",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -81,29 +97,61 @@ def main():
         action="store_true",
         help="List available pages and exit without downloading",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of concurrent downloads (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Max requests/second across all workers, 0 = no limit (default: {DEFAULT_RATE:g})",
+    )
     parser.add_argument(
         "--delay",
         type=float,
-        default=0.2,
-        help="Delay between requests in seconds (default: 0.2)",
+        help="Average delay between requests in seconds; shorthand for --rate 1/DELAY",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Download llms-full.txt in one request and split it into pages locally",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-download every page, ignoring the mirror manifest",
+    )
+    parser.add_argument(
+        "--no-search-index",
+        action="store_true",
+        help=f"Don't update the full-text search index ({search_docs.DEFAULT_DB}) afterwards",
     )
     parser.add_argument(
         "--index",
         action="store_true",
         help="Also save the raw llms.txt as _index.txt",
     )
+    profiling.add_arguments(parser)
 
-    args = parser.parse_args()
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+    if args.delay is not None:
+        args.rate = 1 / args.delay if args.delay > 0 else 0
 
     # Fetch and parse the index
     print(f"Fetching index from {LLMS_TXT_URL}...")
     try:
-        llms_txt = fetch(LLMS_TXT_URL)
-    except urllib.error.URLError as e:
+        with phase("discovery"):
+            llms_txt = fetch(LLMS_TXT_URL)
+    except (*FETCH_ERRORS, UnicodeDecodeError) as e:
         print(f"Error fetching index: {e}", file=sys.stderr)
         sys.exit(1)
 
-    entries = parse_llms_txt(llms_txt)
+    with phase("discovery"):
+        entries = parse_llms_txt(llms_txt)
     print(f"Found {len(entries)} documentation pages.\n")
 
     # Filter if requested
@@ -132,30 +180,27 @@ def main():
         index_path.write_text(llms_txt, encoding="utf-8")
         print(f"Saved index to {index_path}")
 
-    succeeded = 0
-    failed = 0
-
-    for i, entry in enumerate(entries, 1):
-        # Preserve subdirectory structure (e.g. sdk/migration-guide.md)
-        filepath = args.output / f"{entry['path']}.md"
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        print(f"[{i}/{len(entries)}] {entry['path']}...", end=" ", flush=True)
-
-        try:
-            content = fetch(entry["url"])
-            filepath.write_text(content, encoding="utf-8")
-            size_kb = len(content.encode("utf-8")) / 1024
-            print(f"OK ({size_kb:.1f} KB)")
-            succeeded += 1
-        except Exception as e:
-            print(f"FAILED ({e})")
-            failed += 1
-
-        if i < len(entries):
-            time.sleep(args.delay)
+    with phase("fetch"):
+        if args.full:
+            downloaded, unchanged, failed = mirror_full_text(
+                entries,
+                args.output,
+                CLIENT,
+                LLMS_FULL_TXT_URL,
+                args.workers,
+                args.rate,
+                use_manifest=not args.force,
+            )
+        else:
+            downloaded, unchanged, failed = mirror(
+                entries, args.output, CLIENT, args.workers, args.rate, use_manifest=not args.force
+            )
+
+    if not args.no_search_index:
+        search_docs.update_mirror(args.output)
 
     # Summary
-    print(f"\nDone: {succeeded} downloaded, {failed} failed.")
+    print(f"\nDone: {downloaded} downloaded, {unchanged} unchanged, {failed} failed.")
     print(f"Output: {args.output.resolve()}")
 
     if failed:
@@ -163,4 +208,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,635 @@
+"""Concurrent, rate-limited download engine shared by the docs fetch scripts.
+
+fetch_api_docs.py and fetch_claude_code_docs.py parse their llms.txt index
+and hand the selected entries to mirror(), which downloads pages on a small
+thread pool. A shared token bucket caps the request rate across all workers
+instead of sleeping a fixed delay after every page, and each page is reported
+as soon as it completes.
+
+A manifest (_manifest.json) in the output directory records each page's ETag,
+Last-Modified, content hash and fetch time, plus its llms.txt title and
+description for the search index. The next run sends conditional
+requests, skips 304 responses and leaves files whose content is unchanged
+untouched, so their mtimes stay stable.
+
+All requests go through HttpClient, which keeps persistent connections per
+host so consecutive pages skip the TCP/TLS handshake.
+
+mirror_full_text() instead streams the site's llms-full.txt in a single
+request and splits it into the same per-page files locally, byte for byte.
+
+Requests, compressed bytes received and 304 responses are counted for
+--profile (see profiling.py). Worker threads only update counters; the
+calling script charges the whole download to its "fetch" phase.
+"""
+
+import codecs
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple, TypeVar
+
+from profiling import count, phase
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 5.0  # requests per second, same average pace as the old 0.2s delay
+MANIFEST_NAME = "_manifest.json"
+
+# What llms-full.txt puts between one page's content and the next page's title
+PAGE_SEPARATOR = "\n"
+# Page header in llms-full.txt: "# Title" followed by this line
+SOURCE_LINE_RE = re.compile(r"^Source: (\S+)\s*$")
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# Errors a single page can fail with without aborting the whole run
+# (EOFError: a gzip body cut short)
+FETCH_ERRORS = (OSError, ValueError, EOFError, http.client.HTTPException, zlib.error)
+
+# Connection-level failures worth retrying a GET for (RemoteDisconnected is
+# what a keep-alive connection closed by the server raises on reuse)
+STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionError)
+
+T = TypeVar("T")
+PoolKey = tuple[str, str, int | None]  # (scheme, host, port)
+
+
+class Response(NamedTuple):
+    status: int
+    headers: dict[str, str]  # lower-cased names
+    body: bytes
+
+
+class HttpClient:
+    """Keep-alive GET client with a pool of persistent connections per host.
+
+    Connections to the same scheme/host/port are reused across pages, so only
+    the first request pays the TCP and TLS handshake. Bodies are requested
+    with gzip/deflate and decompressed transparently. A GET that fails because
+    a pooled connection went stale is retried on a fresh one, with backoff for
+    repeated failures. Redirects are followed; 304 responses are returned and
+    other 4xx/5xx responses raise HTTPError, as urlopen() did. Requests that
+    must go through a configured proxy fall back to urllib.
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self, user_agent: str, timeout: float = 30, retries: int = 2, backoff: float = 0.5
+    ) -> None:
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._idle: dict[PoolKey, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._proxies = urllib.request.getproxies()
+
+    def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        if self._use_proxy(url):
+            return self._get_via_urllib(url, self._headers(headers))
+        url, key, conn, resp = self._open(url, self._headers(headers))
+        try:
+            body = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._finish(key, conn, resp)
+        count("bytes_transferred", len(body))
+        return Response(resp.status, _lower(resp.msg.items()), _decode_body(body, resp.msg))
+
+    def get_text(self, url: str) -> str:
+        """Fetch a URL and return its body decoded as UTF-8."""
+        return self.get(url).body.decode("utf-8")
+
+    def stream(self, url: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield a URL's decompressed body in chunks, holding at most one chunk in memory."""
+        if self._use_proxy(url):
+            req = urllib.request.Request(url, headers=self._headers(None))
+            count("http_requests")
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                chunks = _counted(iter(lambda: resp.read(chunk_size), b""))
+                yield from _decode_chunks(chunks, resp.headers)
+            return
+
+        url, key, conn, resp = self._open(url, self._headers(None))
+        try:
+            yield from _decode_chunks(_counted(iter(lambda: resp.read(chunk_size), b"")), resp.msg)
+        except BaseException:
+            # Includes GeneratorExit when the caller stops early
+            conn.close()
+            raise
+        self._finish(key, conn, resp)
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def _headers(self, extra: dict[str, str] | None) -> dict[str, str]:
+        return {"User-Agent": self.user_agent, "Accept-Encoding": "gzip, deflate", **(extra or {})}
+
+    def _use_proxy(self, url: str) -> bool:
+        parts = urllib.parse.urlsplit(url)
+        return bool(self._proxies.get(parts.scheme)) and not urllib.request.proxy_bypass(
+            parts.hostname or ""
+        )
+
+    def _open(
+        self, url: str, headers: dict[str, str]
+    ) -> tuple[str, PoolKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a GET and follow redirects. Returns the final response with its body unread.
+
+        4xx/5xx responses raise HTTPError once their connection is back in the pool,
+        as does a chain of more than MAX_REDIRECTS redirects.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            key, conn, resp = self._send(urllib.parse.urlsplit(url), headers)
+            location = resp.getheader("Location")
+            if resp.status not in REDIRECT_STATUSES or not location:
+                break
+            resp.read()
+            self._finish(key, conn, resp)
+            url = urllib.parse.urljoin(url, location)
+        else:
+            # The last redirect's connection is already back in the pool
+            raise urllib.error.HTTPError(url, 310, "too many redirects", resp.msg, None)
+
+        if resp.status >= 400:
+            resp.read()
+            self._finish(key, conn, resp)
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, None)
+        return url, key, conn, resp
+
+    def _send(
+        self, parts: urllib.parse.SplitResult, headers: dict[str, str]
+    ) -> tuple[PoolKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        key = (parts.scheme, parts.hostname or "", parts.port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key)
+            count("http_requests")
+            try:
+                conn.request("GET", target, headers=headers)
+                return key, conn, conn.getresponse()
+            except STALE_ERRORS:
+                conn.close()
+                if attempt >= self.retries:
+                    raise
+                # A reused connection dropped by the server is expected: retry
+                # immediately. Anything else backs off before trying again.
+                if not (reused and attempt == 0):
+                    time.sleep(self.backoff * 2**attempt)
+                attempt += 1
+            except BaseException:
+                conn.close()
+                raise
+
+    def _finish(
+        self, key: PoolKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse
+    ) -> None:
+        """Return a fully read connection to the pool, or close it if the server will."""
+        if resp.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                self._idle.setdefault(key, []).append(conn)
+
+    def _acquire(self, key: PoolKey) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        if scheme == "http":
+            return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+        raise ValueError(f"unsupported URL scheme: {scheme!r}")
+
+    def _get_via_urllib(self, url: str, headers: dict[str, str]) -> Response:
+        req = urllib.request.Request(url, headers=headers)
+        count("http_requests")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+                count("bytes_transferred", len(raw))
+                body = _decode_body(raw, resp.headers)
+                return Response(resp.status, _lower(resp.headers.items()), body)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return Response(304, _lower(e.headers.items()), b"")
+            raise
+
+
+def _decode_body(body: bytes, headers: http.client.HTTPMessage) -> bytes:
+    """Undo gzip/deflate Content-Encoding."""
+    encoding = (headers.get("Content-Encoding") or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib wrapper
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _decode_chunks(chunks: Iterable[bytes], headers: http.client.HTTPMessage) -> Iterator[bytes]:
+    """Streaming counterpart of _decode_body."""
+    encoding = (headers.get("Content-Encoding") or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decoder = zlib.decompressobj()
+    else:
+        yield from chunks
+        return
+    for chunk in chunks:
+        data = decoder.decompress(chunk)
+        if data:
+            yield data
+    tail = decoder.flush()
+    if tail:
+        yield tail
+    if not decoder.eof:
+        # As gzip.decompress() reports a body cut short
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+
+def _counted(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, adding their size to the bytes_transferred counter."""
+    for chunk in chunks:
+        count("bytes_transferred", len(chunk))
+        yield chunk
+
+
+def _lower(items: Iterable[tuple[str, str]]) -> dict[str, str]:
+    return {name.lower(): value for name, value in items}
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second on average.
+
+    Up to `capacity` acquisitions may happen back to back; after that callers
+    are spaced 1/rate seconds apart. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until it is available."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve the token now; a negative balance is this caller's wait
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def page_path(output: Path, entry: dict) -> Path:
+    """Local file for an entry, preserving subdirectory structure (e.g. sdk/migration-guide.md)."""
+    return output / f"{entry['path']}.md"
+
+
+def run_concurrently(
+    entries: Iterable[dict],
+    task: Callable[[dict], T],
+    workers: int = DEFAULT_WORKERS,
+    limiter: TokenBucket | None = None,
+) -> Iterator[tuple[dict, T | None, Exception | None]]:
+    """Run task(entry) on a thread pool, yielding (entry, result, error) as tasks finish."""
+
+    def limited(entry: dict) -> T:
+        if limiter is not None:
+            limiter.acquire()
+        return task(entry)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(limited, entry): entry for entry in entries}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                yield entry, future.result(), None
+            except FETCH_ERRORS as e:
+                yield entry, None, e
+
+
+def load_manifest(output: Path) -> dict[str, dict]:
+    """Load the mirror manifest, returning {} if missing or unreadable."""
+    try:
+        with phase("read"):
+            data = json.loads((output / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    pages = data.get("pages") if isinstance(data, dict) else None
+    return pages if isinstance(pages, dict) else {}
+
+
+def save_manifest(output: Path, pages: dict[str, dict]) -> None:
+    """Write the manifest atomically, sorted so reruns produce stable diffs."""
+    path = output / MANIFEST_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    data = {"pages": dict(sorted(pages.items()))}
+    with phase("write"):
+        tmp.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def conditional_headers(record: dict | None, filepath: Path) -> dict[str, str]:
+    """If-None-Match / If-Modified-Since for a page we still have on disk."""
+    if not record or not filepath.is_file():
+        return {}
+    headers = {}
+    if record.get("etag"):
+        headers["If-None-Match"] = record["etag"]
+    if record.get("last_modified"):
+        headers["If-Modified-Since"] = record["last_modified"]
+    return headers
+
+
+def url_to_path(url: str) -> str:
+    """Local page path for a docs URL: the part after /en/, without .md.
+
+    e.g. https://code.claude.com/docs/en/sdk/migration-guide.md -> sdk/migration-guide
+    """
+    return url.split("/en/", 1)[-1].removesuffix(".md")
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode streamed UTF-8 chunks into lines, keeping their "\n" endings."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if "\n" not in pending:
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def split_full_text(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Split a streamed llms-full.txt into (source url, page markdown) pairs.
+
+    A page starts at a "# Title" line immediately followed by "Source: <url>".
+    The Source line and the PAGE_SEPARATOR before the next page are dropped;
+    everything else is kept, so a page has the same bytes as its own
+    download. Only the current page is held in memory.
+    """
+    url: str | None = None
+    page: list[str] = []
+    title: str | None = None
+
+    def finish(last: bool = False) -> str:
+        text = "".join(page)
+        return text if last else text.removesuffix(PAGE_SEPARATOR)
+
+    for line in lines:
+        if title is not None:
+            match = SOURCE_LINE_RE.match(line)
+            if match:
+                if url is not None:
+                    yield url, finish()
+                url, page = match.group(1), [title]
+                title = None
+                continue
+            page.append(title)
+            title = None
+
+        if line.startswith("# "):
+            # Possibly a page header; decided by the next line
+            title = line
+        elif url is not None:
+            page.append(line)
+
+    if title is not None:
+        page.append(title)
+    if url is not None:
+        yield url, finish(last=True)
+
+
+def _contained(entries: list[dict], output: Path) -> tuple[list[dict], int]:
+    """Drop entries whose path would land outside output. Returns (kept, skipped)."""
+    output_root = output.resolve()
+    kept: list[dict] = []
+    skipped = 0
+    for entry in entries:
+        if not page_path(output, entry).resolve().is_relative_to(output_root):
+            print(f"SKIPPED (path outside output directory: {entry['path']})")
+            skipped += 1
+            continue
+        kept.append(entry)
+    return kept, skipped
+
+
+def store_page(
+    output: Path,
+    entry: dict,
+    body: bytes,
+    headers: dict[str, str] | None,
+    manifest: dict[str, dict],
+) -> bool:
+    """Write a page unless identical content is already on disk, and record it in manifest.
+
+    headers is None for a page that didn't come from its own response (split
+    out of llms-full.txt); its recorded etag and last-modified are kept while
+    its content is unchanged, as they still describe it.
+
+    Returns True if the file was written. Raises UnicodeDecodeError or OSError.
+    """
+    filepath = page_path(output, entry)
+    digest = hashlib.sha256(body).hexdigest()
+    record = manifest.get(entry["path"], {})
+    same = record.get("sha256") == digest and filepath.is_file()
+    content = body.decode("utf-8")
+    if not same:
+        with phase("write"):
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_text(content, encoding="utf-8")
+
+    if headers is None:
+        validators = (record.get("etag"), record.get("last_modified")) if same else (None, None)
+    else:
+        validators = (headers.get("etag"), headers.get("last-modified"))
+    manifest[entry["path"]] = {
+        "url": entry["url"],
+        "title": entry.get("title"),
+        "description": entry.get("description"),
+        "etag": validators[0],
+        "last_modified": validators[1],
+        "sha256": digest,
+        "fetched": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return not same
+
+
+def mirror(
+    entries: list[dict],
+    output: Path,
+    client: HttpClient,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    use_manifest: bool = True,
+) -> tuple[int, int, int]:
+    """Download entries into output/<path>.md, printing each page as it completes.
+
+    Entries whose path would land outside the output directory are skipped.
+    With use_manifest, pages are requested conditionally and files are only
+    rewritten when their content changed. Returns (downloaded, unchanged, failed).
+    """
+    pending, failed = _contained(entries, output)
+    downloaded = 0
+    unchanged = 0
+
+    manifest = load_manifest(output) if use_manifest else {}
+    # Computed up front so worker threads never read the manifest while it changes
+    request_headers = {
+        e["path"]: conditional_headers(manifest.get(e["path"]), page_path(output, e))
+        for e in pending
+    }
+
+    def task(entry: dict) -> Response:
+        return client.get(entry["url"], request_headers[entry["path"]])
+
+    limiter = TokenBucket(rate)
+
+    try:
+        for done, (entry, response, error) in enumerate(
+            run_concurrently(pending, task, workers, limiter), 1
+        ):
+            prefix = f"[{done}/{len(pending)}] {entry['path']}..."
+            if error is not None:
+                print(f"{prefix} FAILED ({error})", flush=True)
+                failed += 1
+                continue
+
+            if response.status == 304:
+                record = manifest.setdefault(entry["path"], {})
+                record["fetched"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                count("cache_hits")
+                print(f"{prefix} UNCHANGED (304)", flush=True)
+                unchanged += 1
+                continue
+
+            try:
+                written = store_page(output, entry, response.body, response.headers, manifest)
+            except UnicodeDecodeError as e:
+                print(f"{prefix} FAILED ({e})", flush=True)
+                failed += 1
+                continue
+            except OSError as e:
+                print(f"{prefix} WRITE FAILED ({e})", flush=True)
+                failed += 1
+                continue
+
+            if written:
+                size_kb = len(response.body) / 1024
+                print(f"{prefix} OK ({size_kb:.1f} KB)", flush=True)
+                downloaded += 1
+            else:
+                print(f"{prefix} UNCHANGED (same content)", flush=True)
+                unchanged += 1
+    finally:
+        if use_manifest and manifest:
+            output.mkdir(parents=True, exist_ok=True)
+            save_manifest(output, manifest)
+
+    return downloaded, unchanged, failed
+
+
+def mirror_full_text(
+    entries: list[dict],
+    output: Path,
+    client: HttpClient,
+    full_url: str,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    use_manifest: bool = True,
+) -> tuple[int, int, int]:
+    """Like mirror(), but take pages from one streamed llms-full.txt download.
+
+    Pages are split out locally and mapped to entries with url_to_path().
+    Entries missing from the full text (or all of them, if streaming fails)
+    are then downloaded individually with mirror().
+    """
+    pending, failed = _contained(entries, output)
+    by_path = {e["path"]: e for e in pending}
+    downloaded = 0
+    unchanged = 0
+    done = 0
+
+    manifest = load_manifest(output) if use_manifest else {}
+    print(f"Streaming {full_url}...", flush=True)
+    try:
+        for url, text in split_full_text(iter_lines(client.stream(full_url))):
+            entry = by_path.pop(url_to_path(url), None)
+            if entry is None:
+                continue
+            done += 1
+            prefix = f"[{done}/{len(pending)}] {entry['path']}..."
+            body = text.encode("utf-8")
+            try:
+                written = store_page(output, entry, body, None, manifest)
+            except OSError as e:
+                print(f"{prefix} WRITE FAILED ({e})", flush=True)
+                failed += 1
+                continue
+            if written:
+                print(f"{prefix} OK ({len(body) / 1024:.1f} KB)", flush=True)
+                downloaded += 1
+            else:
+                print(f"{prefix} UNCHANGED (same content)", flush=True)
+                unchanged += 1
+    except FETCH_ERRORS as e:
+        print(f"FAILED streaming full text ({e})", flush=True)
+    finally:
+        if use_manifest and manifest:
+            output.mkdir(parents=True, exist_ok=True)
+            save_manifest(output, manifest)
+
+    if by_path:
+        print(f"{len(by_path)} page(s) not in full text, fetching individually...", flush=True)
+        extra_downloaded, extra_unchanged, extra_failed = mirror(
+            list(by_path.values()), output, client, workers, rate, use_manifest
+        )
+        downloaded += extra_downloaded
+        unchanged += extra_unchanged
+        failed += extra_failed
+
+    return downloaded, unchanged, failed
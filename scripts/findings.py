@@ -0,0 +1,77 @@
+"""Streaming output for validator findings (--ndjson and --max-findings).
+
+With --ndjson a validator writes each finding to stdout the moment it is
+found, as one JSON object per line:
+    {"check": "links", "path": "docs/a.md", "line": 12, "code": "missing-target",
+     "message": "[Setup](setup.md)"}
+Every object has exactly these keys; line is null for findings without one
+(front matter). Nothing else goes to stdout: progress and summary lines move
+to stderr. Findings are written and dropped, never collected, so memory use
+does not grow with their number.
+
+--max-findings N stops the scan after N findings, in either output mode.
+The exit status is unchanged: 1 if anything was found.
+
+A validator opts in with:
+    findings.add_arguments(parser)
+    ...
+    for path, line, code, message in itertools.islice(scan, args.max_findings):
+        findings.emit("links", path, line, code, message)
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+FIELDS = ("check", "path", "line", "code", "message")
+
+
+def positive(value: str) -> int:
+    """argparse type for --max-findings: a count of at least 1."""
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {n}")
+    return n
+
+
+def non_negative(value: str) -> int:
+    """argparse type for --jobs, where 0 means one per CPU."""
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, not {n}")
+    return n
+
+
+def add_arguments(parser) -> None:
+    """Add --ndjson and --max-findings to an argparse parser."""
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Write each finding to stdout as a JSON line as soon as it is found",
+    )
+    parser.add_argument(
+        "--max-findings",
+        type=positive,
+        metavar="N",
+        help="Stop after N findings",
+    )
+
+
+def emit(check: str, path: Path | str, line: int | None, code: str, message: str) -> None:
+    """Write one finding as a JSON line to stdout and flush it."""
+    record = dict(zip(FIELDS, (check, str(path), line, code, message)))
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def log(args):
+    """Where a validator's progress and summary lines go: stderr in --ndjson mode."""
+    return sys.stderr if args.ndjson else sys.stdout
+
+
+def stopped(args, found: int) -> str:
+    """A note for the summary when --max-findings cut the scan short, else ""."""
+    if args.max_findings is not None and found >= args.max_findings:
+        return f" (stopped after --max-findings {args.max_findings})"
+    return ""
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Front matter parsing shared by every validator and indexer.
+
+One single-pass tokenizer for the YAML subset the repository uses, so the
+validators and the index scripts can never disagree about a document:
+- scalars, optionally single or double quoted
+- inline lists [a, b] and block lists (- item)
+- multiline scalars (|)
+- null
+
+parse_file() memoizes results keyed by (path, mtime, size), so a long-running
+process re-parses only files that changed on disk.
+
+Benchmark parse throughput from the project root:
+    python scripts/front_matter.py --bench
+    python scripts/front_matter.py --bench docs --rounds 50
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from profiling import count, phase
+
+FRONT_MATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
+# Front matter longer than this is treated as missing
+FRONT_MATTER_MAX_BYTES = 64 * 1024
+
+BENCH_DIRS = [Path("docs"), Path("plugins")]
+
+# (mtime_ns, size, fields) per absolute path
+_cache: dict[str, tuple[int, int, dict | None]] = {}
+
+
+def parse_front_matter(text: str) -> dict | None:
+    """Extract front matter fields from text without a YAML dependency.
+
+    Returns None if the text doesn't start with a front matter block.
+    """
+    match = FRONT_MATTER_RE.match(text)
+    if not match:
+        return None
+
+    fields: dict = {}
+    key: str | None = None
+    block_list: list | None = None
+    multiline: list[str] | None = None
+
+    for line in match.group(1).splitlines():
+        indented = line.startswith(("  ", "\t"))
+
+        # Accumulate multiline scalar (|) while lines stay indented
+        if multiline is not None:
+            if indented:
+                multiline.append(line.strip())
+                fields[key] = "\n".join(multiline)
+                continue
+            multiline = None
+
+        stripped = line.strip()
+        if not stripped or stripped[0] == "#":
+            continue
+
+        # Block list item: "  - value"
+        if key is not None and line.startswith("  - "):
+            if block_list is None:
+                block_list = []
+            block_list.append(stripped[2:].strip())
+            fields[key] = block_list
+            continue
+
+        # Any other line ends a pending list
+        block_list = None
+
+        key, _, value = stripped.partition(":")
+        key = key.strip()
+        value = value.strip()
+
+        if not value:
+            # Empty value: a block list may follow
+            block_list = []
+            fields[key] = block_list
+        elif value == "|":
+            multiline = []
+            fields[key] = ""
+        elif value[0] == "[" and value[-1] == "]":
+            fields[key] = [v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()]
+        elif value[0] in "'\"" and value[-1] in "'\"":
+            fields[key] = value[1:-1]
+        elif value == "null":
+            fields[key] = None
+        else:
+            fields[key] = value
+
+    return fields
+
+
+def read_front_matter(path: Path, max_bytes: int = FRONT_MATTER_MAX_BYTES) -> str:
+    """Read a file only as far as its front matter block ends.
+
+    Streams lines until the closing --- (or max_bytes) instead of reading the
+    whole document. Returns the text up to and including the closing
+    delimiter, which parse_front_matter() treats exactly like the full file,
+    or "" if the file has no front matter.
+    """
+    header: list[str] = []
+    size = 0
+    try:
+        with phase("read"), path.open("rb") as f:
+            # readline() limit keeps even one huge line from being read in full
+            while raw_line := f.readline(max_bytes - size + 1):
+                size += len(raw_line)
+                if size > max_bytes:
+                    return ""
+                # Decode line by line so the body is never decoded
+                line = raw_line.decode("utf-8")
+                if "\r" in line:
+                    line = line.replace("\r\n", "\n").replace("\r", "\n")
+                if not header and not line.startswith("---"):
+                    return ""
+                header.append(line)
+                if len(header) > 1 and line.startswith("---"):
+                    text = "".join(header)
+                    if FRONT_MATTER_RE.match(text):
+                        return text
+        return ""
+    finally:
+        count("files")
+        count("bytes_read", size)
+
+
+def copy_fields(fields: dict | None) -> dict | None:
+    """Copy parsed fields deeply enough that callers can mutate the result."""
+    if fields is None:
+        return None
+    return {k: list(v) if isinstance(v, list) else v for k, v in fields.items()}
+
+
+def parse_file(path: Path) -> dict | None:
+    """Parse a file's front matter, reusing the last result if it is unchanged on disk.
+
+    Results are keyed by (path, mtime, size). Each call returns a fresh copy.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    count("stat")
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        count("cache_hits")
+        return copy_fields(cached[2])
+    header = read_front_matter(Path(path))
+    with phase("parse"):
+        fields = parse_front_matter(header)
+    _cache[key] = (st.st_mtime_ns, st.st_size, fields)
+    return copy_fields(fields)
+
+
+def forget(path: Path) -> None:
+    """Drop a file's memoized result, e.g. after rewriting it within one mtime tick."""
+    _cache.pop(os.path.abspath(path), None)
+
+
+def clear_cache() -> None:
+    """Drop every memoized result."""
+    _cache.clear()
+
+
+def benchmark(paths: list[Path], rounds: int) -> dict[str, float]:
+    """Measure parse throughput in files per second.
+
+    "parse" times the tokenizer alone on headers already in memory, "read"
+    adds the bounded header read, and "memoized" is parse_file() on a warm
+    cache.
+    """
+    headers = [read_front_matter(p) for p in paths]
+    total = len(paths) * rounds
+    results: dict[str, float] = {}
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for header in headers:
+            parse_front_matter(header)
+    results["parse"] = total / max(time.perf_counter() - start, 1e-9)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for p in paths:
+            parse_front_matter(read_front_matter(p))
+    results["read"] = total / max(time.perf_counter() - start, 1e-9)
+
+    clear_cache()
+    for p in paths:
+        parse_file(p)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for p in paths:
+            parse_file(p)
+    results["memoized"] = total / max(time.perf_counter() - start, 1e-9)
+    clear_cache()
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Front matter parser micro-benchmark.")
+    parser.add_argument("--bench", action="store_true", help="Report parse throughput")
+    parser.add_argument(
+        "dirs",
+        nargs="*",
+        type=Path,
+        help="Directories to scan for *.md (default: docs plugins)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Times to parse each file (default: 20)",
+    )
+    args = parser.parse_args([] if argv is None else argv)
+
+    if not args.bench:
+        parser.print_help()
+        return
+
+    paths = sorted(p for d in args.dirs or BENCH_DIRS if d.is_dir() for p in d.rglob("*.md"))
+    if not paths:
+        print("error: no markdown files found")
+        sys.exit(1)
+
+    print(f"{len(paths)} file(s) x {args.rounds} round(s)")
+    for name, rate in benchmark(paths, args.rounds).items():
+        print(f"  {name:<9} {rate:>12,.0f} files/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+"""Git queries behind the validators' --changed-since REF option.
+
+A pull request usually touches a handful of files. These helpers ask git
+which paths changed since a base ref, what a file looked like at that ref,
+and which markdown files mention a given name, so the validators can scope
+their work to the diff instead of the whole repository.
+
+A diff that touches the validation code itself or the CI configuration
+(RULE_PATHS) can change what is accepted everywhere, so rules_changed() tells
+the validators to check the whole repository instead.
+
+All paths are relative to the project root (scripts are run from there).
+Every function raises ValueError with git's message if git fails, e.g. for
+an unknown ref or outside a git checkout.
+"""
+
+import os
+import subprocess
+
+# Validation code and CI config: changing these rechecks everything
+RULE_PATHS = ("scripts", ".github", "requirements-ci.txt")
+
+
+def git(*args: str, ok: tuple[int, ...] = (0,)) -> str:
+    """Run a git command and return its stdout; exit codes outside ok raise ValueError."""
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True, encoding="utf-8")
+    except FileNotFoundError:
+        raise ValueError("git is not installed") from None
+    if result.returncode not in ok:
+        raise ValueError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def changed_paths(ref: str) -> set[str]:
+    """Paths added, modified or deleted between ref and the working tree.
+
+    Untracked files count as added. A rename shows up as the deletion of the
+    old path and the addition of the new one.
+    """
+    diff = git("diff", "--name-only", "--no-renames", ref, "--")
+    untracked = git("ls-files", "--others", "--exclude-standard")
+    return {os.path.normpath(line) for line in (diff + untracked).splitlines() if line}
+
+
+def file_at(ref: str, path: str) -> str | None:
+    """Contents of path at ref, or None if it didn't exist there."""
+    try:
+        return git("show", f"{ref}:{path}")
+    except ValueError:
+        return None
+
+
+def files_mentioning(names: set[str], pathspec: str = "*.md") -> set[str]:
+    """Files in the working tree (tracked or not) containing any of names literally."""
+    if not names:
+        return set()
+    args = ["grep", "-l", "-F", "--untracked"]
+    for name in sorted(names):
+        args += ["-e", name]
+    # git grep exits 1 when nothing matches
+    output = git(*args, "--", pathspec, ok=(0, 1))
+    return {os.path.normpath(line) for line in output.splitlines() if line}
+
+
+def rules_changed(paths: set[str]) -> bool:
+    """Whether any of paths (from changed_paths()) is under RULE_PATHS."""
+    roots = [os.path.normpath(p) for p in RULE_PATHS]
+    return any(path == root or path.startswith(root + os.sep) for path in paths for root in roots)
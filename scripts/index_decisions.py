@@ -3,81 +3,70 @@
 
 Generates docs/decisions/_INDEX.md from all ADR files in the same directory.
 Run from the project root: python scripts/index_decisions.py
+
+The index is only rewritten when its content changes. With --check, nothing
+is written: the script exits 1 if _INDEX.md is out of date. With --cache,
+parsed front matter is kept on disk keyed by path, mtime, size and content
+hash, so unchanged ADRs are not re-read.
+
+--json and --sqlite also write the entries as a machine-readable catalog
+(see catalog.py for the schema). --watch keeps running and rebuilds the
+index whenever an ADR changes. --profile and --timings-json PATH report
+time per phase and I/O counters (see profiling.py).
 """
 
 from pathlib import Path
+import argparse
 import re
 import sys
 
+import catalog
+import profiling
+from front_matter import copy_fields
+from profiling import phase
+from repo_scan import (
+    cached_front_matter,
+    file_is_current,
+    get_snapshot,
+    load_json_cache,
+    save_json_cache,
+    write_atomic,
+)
+
 DECISIONS_DIR = Path("docs/decisions")
 INDEX_FILE = DECISIONS_DIR / "_INDEX.md"
-FRONT_MATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
 ADR_NUMBER_RE = re.compile(r"^(\d{4})-")
+DEFAULT_CACHE = Path(".cache/index_decisions.json")
+CACHE_VERSION = 1
+DEFAULT_JSON = Path(".cache/decisions.json")
+DEFAULT_SQLITE = Path(".cache/decisions.sqlite")
 
 
 def parse_front_matter(path: Path) -> dict | None:
-    """Extract front matter fields without a YAML dependency.
-
-    Handles both inline lists [a, b] and block lists (- item).
-    """
-    text = path.read_text(encoding="utf-8")
-    match = FRONT_MATTER_RE.match(text)
-    if not match:
-        return None
-
-    fields = {}
-    current_key = None
-    current_list = None
-
-    for line in match.group(1).splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#"):
-            continue
-
-        # Block list item: "  - value"
-        if line.startswith("  - ") and current_key is not None:
-            if current_list is None:
-                current_list = []
-            current_list.append(line.strip()[2:].strip())
-            fields[current_key] = current_list
-            continue
-
-        # Flush any pending list
-        current_list = None
-
-        key, _, value = stripped.partition(":")
-        key = key.strip()
-        value = value.strip()
-        current_key = key
-
-        # Inline list: [a, b, c]
-        if value.startswith("[") and value.endswith("]"):
-            value = [v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()]
-        # Quoted string
-        elif value.startswith(("'", '"')) and value.endswith(("'", '"')):
-            value = value[1:-1]
-        # Null
-        elif value == "null":
-            value = None
-        # Empty value (block list follows on next lines)
-        elif value == "":
-            current_list = []
-            value = current_list
+    """Return a mutable copy of a document's front matter, or None if it has none."""
+    return copy_fields(get_snapshot().document(path).front_matter)
 
-        fields[key] = value
 
-    return fields
+def collect_adrs(directory: Path, cache: dict | None = None) -> list[dict]:
+    """Collect and parse all ADR markdown files.
 
-
-def collect_adrs(directory: Path) -> list[dict]:
-    """Collect and parse all ADR markdown files."""
+    With a metadata cache, unchanged files are not re-parsed and
+    cache["files"] is replaced by this run's entries.
+    """
+    old_files = cache.get("files", {}) if cache is not None else {}
+    new_files: dict[str, dict] = {}
     entries = []
-    for path in sorted(directory.glob("*.md")):
+    with phase("discovery"):
+        paths = get_snapshot().glob(directory, "*.md")
+    for path in paths:
         if path.name in ("_INDEX.md", "_TEMPLATE.md"):
             continue
         if not ADR_NUMBER_RE.match(path.name):
             continue
-        meta = parse_front_matter(path)
+        if cache is None:
+            meta = parse_front_matter(path)
+        else:
+            meta = cached_front_matter(path, old_files, new_files)
         if meta is None:
             print(f"  warning: no front matter in {path.name}, skipping")
             continue
@@ -86,6 +75,8 @@ def collect_adrs(directory: Path) -> list[dict]:
         num_match = ADR_NUMBER_RE.match(path.name)
         meta["number"] = num_match.group(1) if num_match else "????"
         entries.append(meta)
+    if cache is not None:
+        cache["files"] = new_files
     return entries
 
 
@@ -138,18 +129,89 @@ def build_index(entries: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def main():
+@profiling.profiled("index_decisions")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate the decision records index.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit 1 if the index is out of date instead of writing it",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE,
+        metavar="PATH",
+        help=f"Reuse and update a front matter cache (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument(
+        "--json",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_JSON,
+        metavar="PATH",
+        help=f"Also write a JSON catalog (default: {DEFAULT_JSON})",
+    )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_SQLITE,
+        metavar="PATH",
+        help=f"Also write an SQLite catalog (default: {DEFAULT_SQLITE})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild the index when an ADR changes (see watch.py)",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if args.watch:
+        # Imported here: watch imports this module
+        import watch
+
+        watch.main(["--only", "decisions"])
+        return
+
     if not DECISIONS_DIR.is_dir():
         print(f"error: {DECISIONS_DIR} does not exist")
         sys.exit(1)
 
-    entries = collect_adrs(DECISIONS_DIR)
+    cache = load_json_cache(args.cache, CACHE_VERSION) if args.cache else None
+    entries = collect_adrs(DECISIONS_DIR, cache)
+    # --check writes nothing, the cache included
+    if cache is not None and not args.check:
+        cache["version"] = CACHE_VERSION
+        save_json_cache(args.cache, cache)
     print(f"found {len(entries)} ADR(s)")
 
-    index_content = build_index(entries)
-    INDEX_FILE.write_text(index_content, encoding="utf-8")
-    print(f"wrote {INDEX_FILE}")
+    with phase("render"):
+        index_content = build_index(entries)
+    if not args.check and (args.json or args.sqlite):
+        with phase("render"):
+            compiled = catalog.build_catalog("decisions", entries)
+        with phase("write"):
+            if args.json:
+                catalog.write_json(args.json, compiled)
+                print(f"wrote {args.json}")
+            if args.sqlite:
+                catalog.write_sqlite(args.sqlite, compiled)
+                print(f"wrote {args.sqlite}")
+
+    if file_is_current(INDEX_FILE, index_content):
+        print(f"{INDEX_FILE} is up to date")
+    elif args.check:
+        print(f"error: {INDEX_FILE} is out of date; run python scripts/index_decisions.py")
+        sys.exit(1)
+    else:
+        write_atomic(INDEX_FILE, index_content)
+        get_snapshot().forget(INDEX_FILE)
+        print(f"wrote {INDEX_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -4,105 +4,182 @@
 Generates docs/research/_INDEX.md from all research files in the same directory.
 Run from the project root: python scripts/index_research.py
 
-Staleness detection: if a concluded document has a stale_after field (days)
-and enough time has passed since its concluded date, the script updates the
-status to stale both in the index and in the source file.
+Staleness detection: a concluded document expires stale_after days (default
+90) after its concluded date. Once that date has passed, the script updates
+the status to stale both in the index and in the source file. Source files
+are rewritten together after every document has been read, one atomic
+rename per file, and only the front matter status line changes. Each run
+lists the documents that expire next.
+
+The index is only rewritten when its content changes. With --check, nothing
+is written, source files included: the script exits 1 if _INDEX.md is out
+of date. With --cache, parsed front matter is kept on disk keyed by path,
+mtime, size and content hash, so unchanged documents are not re-read.
+
+--json and --sqlite also write the entries as a machine-readable catalog
+(see catalog.py for the schema). --watch keeps running and rebuilds the
+index whenever a research document changes. --profile and --timings-json
+PATH report time per phase and I/O counters (see profiling.py).
 """
 
+import argparse
 import re
 import sys
 from datetime import date, timedelta
 from pathlib import Path
 
+import catalog
+import profiling
+from front_matter import FRONT_MATTER_RE, copy_fields
+from profiling import phase
+from repo_scan import (
+    cached_front_matter,
+    file_is_current,
+    get_snapshot,
+    load_json_cache,
+    save_json_cache,
+    write_atomic,
+)
+
 RESEARCH_DIR = Path("docs/research")
 INDEX_FILE = RESEARCH_DIR / "_INDEX.md"
-FRONT_MATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
 DEFAULT_STALE_AFTER = 90
+DEFAULT_CACHE = Path(".cache/index_research.json")
+CACHE_VERSION = 1
+DEFAULT_JSON = Path(".cache/research.json")
+DEFAULT_SQLITE = Path(".cache/research.sqlite")
+DEFAULT_EXPIRATIONS = 5
+STATUS_LINE_RE = re.compile(r"^(status:[ \t]*)concluded(?=[ \t]*\r?$)", re.MULTILINE)
 
 
 def parse_front_matter(path: Path) -> dict | None:
-    """Extract front matter fields without a YAML dependency."""
-    text = path.read_text(encoding="utf-8")
-    match = FRONT_MATTER_RE.match(text)
-    if not match:
-        return None
-
-    fields = {}
-    for line in match.group(1).splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-
-        key, _, value = line.partition(":")
-        key = key.strip()
-        value = value.strip()
-
-        # Handle YAML lists: [a, b, c]
-        if value.startswith("[") and value.endswith("]"):
-            value = [
-                v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()
-            ]
-
-        # Strip surrounding quotes
-        elif value.startswith(("'", '"')) and value.endswith(("'", '"')):
-            value = value[1:-1]
-
-        # Handle null
-        elif value == "null":
-            value = None
-
-        fields[key] = value
+    """Return a mutable copy of a document's front matter, or None if it has none."""
+    return copy_fields(get_snapshot().document(path).front_matter)
 
-    return fields
 
-
-def check_staleness(entry: dict, path: Path, today: date) -> bool:
-    """Check if a concluded document has gone stale. Returns True if status was changed."""
+def expiry_date(entry: dict) -> date | None:
+    """The last day a concluded document is fresh, or None if it never expires."""
     if entry.get("status") != "concluded":
-        return False
+        return None
 
     concluded = entry.get("concluded")
     if concluded is None:
-        return False
+        return None
 
     try:
         concluded_date = date.fromisoformat(str(concluded))
     except (ValueError, TypeError):
-        return False
+        return None
+
+    return concluded_date + timedelta(days=stale_days(entry))
 
-    stale_after = entry.get("stale_after", DEFAULT_STALE_AFTER)
+
+def stale_days(entry: dict) -> int:
+    """Days a concluded document stays fresh: its stale_after, or the default."""
     try:
-        stale_days = int(stale_after)
+        return int(entry.get("stale_after", DEFAULT_STALE_AFTER))
     except (ValueError, TypeError):
-        stale_days = DEFAULT_STALE_AFTER
+        return DEFAULT_STALE_AFTER
 
-    if today - concluded_date <= timedelta(days=stale_days):
-        return False
 
-    # Mark stale in source file
-    text = path.read_text(encoding="utf-8")
-    updated = text.replace("status: concluded", "status: stale", 1)
-    if updated != text:
-        path.write_text(updated, encoding="utf-8")
-        print(f"  stale: {path.name} (concluded {concluded}, {stale_days}d threshold)")
+def check_staleness(entry: dict, today: date) -> bool:
+    """Mark the entry stale if its expiry date has passed. Returns True if status was changed.
 
+    Only the entry is updated; source files are rewritten by mark_stale.
+    """
+    expires = expiry_date(entry)
+    if expires is None or today <= expires:
+        return False
     entry["status"] = "stale"
     return True
 
 
-def collect_research(directory: Path, today: date) -> list[dict]:
-    """Collect and parse all research markdown files."""
+def next_expirations(entries: list[dict], limit: int) -> list[tuple[date, str]]:
+    """The concluded documents that go stale soonest, as (expiry date, filename)."""
+    scheduled = []
+    for entry in entries:
+        expires = expiry_date(entry)
+        if expires is not None:
+            scheduled.append((expires, entry["filename"]))
+    return sorted(scheduled)[:limit]
+
+
+def stale_front_matter(text: str) -> str | None:
+    """text with the front matter status line set to stale, or None if it has none.
+
+    Only the "status: concluded" line inside the front matter is touched, so
+    the same words in the body are left alone.
+    """
+    match = FRONT_MATTER_RE.match(text)
+    if match is None:
+        return None
+    start, end = match.span(1)
+    block, count = STATUS_LINE_RE.subn(r"\1stale", text[start:end], count=1)
+    if not count:
+        return None
+    return text[:start] + block + text[end:]
+
+
+def mark_stale(paths: list[Path]) -> list[Path]:
+    """Set status: stale in each file's front matter. Returns the files rewritten.
+
+    All files are read and updated in memory first; each is then written to
+    a temporary file and renamed over the original, so an interrupted run
+    leaves every file either untouched or fully rewritten.
+    """
+    updates = []
+    for path in paths:
+        # Bytes in and out keep the file's line endings as they are
+        updated = stale_front_matter(path.read_bytes().decode("utf-8"))
+        if updated is not None:
+            updates.append((path, updated))
+
+    snapshot = get_snapshot()
+    for path, updated in updates:
+        write_atomic(path, updated)
+        snapshot.forget(path)
+    return [path for path, _ in updates]
+
+
+def collect_research(
+    directory: Path, today: date, cache: dict | None = None, write: bool = True
+) -> list[dict]:
+    """Collect and parse all research markdown files.
+
+    With a metadata cache, unchanged files are not re-parsed and
+    cache["files"] is replaced by this run's entries. Documents that went
+    stale are rewritten together once all files are read; with write=False,
+    they are only marked stale in the entries.
+    """
+    old_files = cache.get("files", {}) if cache is not None else {}
+    new_files: dict[str, dict] = {}
     entries = []
-    for path in sorted(directory.glob("*.md")):
+    went_stale: dict[Path, dict] = {}
+    with phase("discovery"):
+        paths = get_snapshot().glob(directory, "*.md")
+    for path in paths:
         if path.name in ("_INDEX.md", "_TEMPLATE.md", "_GUIDE.md"):
             continue
-        meta = parse_front_matter(path)
+        if cache is None:
+            meta = parse_front_matter(path)
+        else:
+            meta = cached_front_matter(path, old_files, new_files)
         if meta is None:
             print(f"  warning: no front matter in {path.name}, skipping")
             continue
         meta["filename"] = path.name
-        check_staleness(meta, path, today)
+        if check_staleness(meta, today):
+            went_stale[path] = meta
         entries.append(meta)
+    if cache is not None:
+        cache["files"] = new_files
+    if write and went_stale:
+        for path in mark_stale(list(went_stale)):
+            meta = went_stale[path]
+            print(
+                f"  stale: {path.name} "
+                f"(concluded {meta['concluded']}, {stale_days(meta)}d threshold)"
+            )
     return entries
 
 
@@ -172,19 +249,102 @@ def build_index(entries: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def main():
+@profiling.profiled("index_research")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate the research index.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit 1 if the index is out of date instead of writing anything",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE,
+        metavar="PATH",
+        help=f"Reuse and update a front matter cache (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument(
+        "--json",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_JSON,
+        metavar="PATH",
+        help=f"Also write a JSON catalog (default: {DEFAULT_JSON})",
+    )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_SQLITE,
+        metavar="PATH",
+        help=f"Also write an SQLite catalog (default: {DEFAULT_SQLITE})",
+    )
+    parser.add_argument(
+        "--expirations",
+        type=int,
+        default=DEFAULT_EXPIRATIONS,
+        metavar="N",
+        help=f"How many upcoming expirations to list (default: {DEFAULT_EXPIRATIONS})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild the index when a document changes (see watch.py)",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if args.watch:
+        # Imported here: watch imports this module
+        import watch
+
+        watch.main(["--only", "research"])
+        return
+
     if not RESEARCH_DIR.is_dir():
         print(f"error: {RESEARCH_DIR} does not exist")
         sys.exit(1)
 
     today = date.today()
-    entries = collect_research(RESEARCH_DIR, today)
+    cache = load_json_cache(args.cache, CACHE_VERSION) if args.cache else None
+    entries = collect_research(RESEARCH_DIR, today, cache, write=not args.check)
+    # --check writes nothing, the cache included
+    if cache is not None and not args.check:
+        cache["version"] = CACHE_VERSION
+        save_json_cache(args.cache, cache)
     print(f"found {len(entries)} research document(s)")
-
-    index_content = build_index(entries)
-    INDEX_FILE.write_text(index_content, encoding="utf-8")
-    print(f"wrote {INDEX_FILE}")
+    upcoming = next_expirations(entries, args.expirations)
+    if upcoming:
+        print("next expirations:")
+        for expires, filename in upcoming:
+            print(f"  {expires}  {filename} ({(expires - today).days}d left)")
+
+    with phase("render"):
+        index_content = build_index(entries)
+    if not args.check and (args.json or args.sqlite):
+        with phase("render"):
+            compiled = catalog.build_catalog("research", entries)
+        with phase("write"):
+            if args.json:
+                catalog.write_json(args.json, compiled)
+                print(f"wrote {args.json}")
+            if args.sqlite:
+                catalog.write_sqlite(args.sqlite, compiled)
+                print(f"wrote {args.sqlite}")
+
+    if file_is_current(INDEX_FILE, index_content):
+        print(f"{INDEX_FILE} is up to date")
+    elif args.check:
+        print(f"error: {INDEX_FILE} is out of date; run python scripts/index_research.py")
+        sys.exit(1)
+    else:
+        write_atomic(INDEX_FILE, index_content)
+        get_snapshot().forget(INDEX_FILE)
+        print(f"wrote {INDEX_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Single-pass markdown link tokenizer.
+
+Makes one forward pass over a document and emits every link with the line
+it appears on:
+- inline links [text](target)
+- reference links [text][id], [text][] and [text], resolved against their
+  [id]: target definitions (definitions may come after the use)
+- definitions that no link uses, at the definition's line
+
+Nothing is extracted from fenced code (``` or ~~~, closed by a fence of the
+same character at least as long), indented code blocks or inline code spans.
+Image links ![alt](src) are skipped. A single regex jumps from one relevant
+line (indented, fence-like or containing "[") to the next, so plain prose is
+never visited line by line in Python. prose_lines() does the code skipping
+and is shared with the heading extractor in repo_scan.py.
+
+Compare against the previous per-line regex loop from the project root:
+    python scripts/markdown_links.py --bench
+    python scripts/markdown_links.py --bench --lines 200000
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections.abc import Iterator
+from typing import NamedTuple
+
+# Match markdown links: [text](target)
+# Excludes image links ![alt](src) by using negative lookbehind
+LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(([^)]+)\)")
+# Inline link, full or collapsed reference [text][id], or shortcut [text]
+LINK_TOKEN_RE = re.compile(r"(?<!!)\[([^\]]*)\](?:\(([^)]+)\)|\[([^\]]*)\])?")
+# Reference definition: [id]: target "optional title"
+DEFINITION_RE = re.compile(r"\[([^\]]+)\]:\s*<?([^\s>]+)>?")
+LIST_ITEM_RE = re.compile(r"(?:[-*+]|\d{1,9}[.)])(?:\s|$)")
+LIST_MARKERS = frozenset("-*+0123456789")
+# Lines that can open code or hold a link: indented, fence-like, or containing "["
+BLOCK_LINE_RE = re.compile(r"^(?:[ \t`~][^\n]*|[^\n]*\[[^\n]*)", re.MULTILINE)
+FENCE_LINE_RE = re.compile(r"^[ \t]*(`{3,}|~{3,})[ \t]*$", re.MULTILINE)
+# Inline code: a run of N backticks up to the next run of exactly N
+CODE_SPAN_RE = re.compile(r"(?<!`)(`+)(?!`).+?(?<!`)\1(?!`)")
+# Inline code as the per-line baseline strips it
+INLINE_CODE_RE = re.compile(r"`[^`]+`")
+
+
+class Link(NamedTuple):
+    line: int
+    text: str
+    target: str
+
+
+def normalize_label(label: str) -> str:
+    """Reference labels match case-insensitively with whitespace collapsed."""
+    return " ".join(label.split()).casefold()
+
+
+def _line_before(text: str, pos: int) -> tuple[int, str]:
+    """Start offset and text of the line before the one starting at pos."""
+    start = text.rfind("\n", 0, pos - 1) + 1
+    return start, text[start : pos - 1]
+
+
+def _in_list(text: str, pos: int, known: dict[int, bool]) -> bool:
+    """Whether an indented line at pos, after a blank line, continues a list item.
+
+    Walks back to the nearest unindented line and then to the start of its
+    paragraph; the line belongs to a list if that paragraph has a list item.
+    known caches answers by line offset so long lists are walked once.
+    """
+    seen: list[int] = []
+    result = False
+    unindented = False
+    while pos > 0:
+        if pos in known:
+            result = known[pos]
+            break
+        seen.append(pos)
+        pos, line = _line_before(text, pos)
+        if not line.strip():
+            if unindented:
+                break
+            continue
+        if line[0] in " \t":
+            if unindented:
+                break
+            continue
+        unindented = True
+        if line[0] in LIST_MARKERS and LIST_ITEM_RE.match(line):
+            result = True
+            break
+    for offset in seen:
+        known[offset] = result
+    return result
+
+
+def prose_lines(
+    text: str, line_re: re.Pattern = BLOCK_LINE_RE
+) -> Iterator[tuple[int, int, str]]:
+    """Yield (offset, indent, stripped line) for the lines line_re finds outside code.
+
+    Fenced code (``` or ~~~) and indented code blocks are skipped, as are
+    blank lines. line_re must match every indented or fence-like line so the
+    code blocks are seen; lines it skips are never visited in Python.
+    """
+    lists: dict[int, bool] = {}
+    code_start = -1  # Offset of the last indented code line
+    pos = 0
+    search = line_re.search
+
+    while match := search(text, pos):
+        line = match[0]
+        start = match.start()
+        pos = start + len(line) + 1
+        if line[:1] in " \t":
+            stripped = line.lstrip()
+            if not stripped:
+                continue
+            indent = len(line) - len(stripped)
+            if "\t" in line[:indent]:
+                indent = 4
+        else:
+            stripped = line
+            indent = 0
+
+        if indent >= 4:
+            before_start, before = _line_before(text, start) if start else (0, "")
+            if before_start == code_start or (not before.strip() and not _in_list(text, start, lists)):
+                # Indented code: after a blank line (or more code), outside a list
+                code_start = start
+                continue
+
+        first = stripped[0]
+        if first in "`~" and stripped.startswith(("```", "~~~")):
+            run = len(stripped) - len(stripped.lstrip(first))
+            # A backtick fence's info string may not contain backticks
+            if first == "~" or "`" not in stripped[run:]:
+                # Skip to the closing fence of the same character, at least as long
+                while closing := FENCE_LINE_RE.search(text, pos):
+                    pos = closing.end() + 1
+                    fence = closing.group(1)
+                    if fence[0] == first and len(fence) >= run:
+                        break
+                else:
+                    return
+                continue
+
+        yield start, indent, stripped
+
+
+def extract_links(text: str) -> list[Link]:
+    """Extract links from markdown text in one pass, skipping all code."""
+    if "[" not in text:
+        return []
+
+    # (line, text, target) for inline links; (line, text, None, label) for references
+    tokens: list[tuple] = []
+    definitions: dict[str, tuple[int, str]] = {}
+    used: set[str] = set()
+
+    line_num = 1
+    counted = 0  # Newlines before this offset are counted in line_num
+
+    for start, indent, stripped in prose_lines(text):
+        if "[" not in stripped:
+            continue
+
+        line_num += text.count("\n", counted, start)
+        counted = start
+
+        first = stripped[0]
+        if first == "[" and indent < 4 and "]:" in stripped:
+            definition = DEFINITION_RE.match(stripped)
+            if definition:
+                label = normalize_label(definition.group(1))
+                # The first definition of a label wins
+                definitions.setdefault(label, (line_num, definition.group(2)))
+                continue
+
+        if "`" in stripped:
+            stripped = CODE_SPAN_RE.sub("", stripped)
+
+        for link in LINK_TOKEN_RE.finditer(stripped):
+            link_text, target, label = link.groups()
+            if target is not None:
+                tokens.append((line_num, link_text, target))
+            else:
+                tokens.append((line_num, link_text, None, normalize_label(label or link_text)))
+
+    links: list[Link] = []
+    for token in tokens:
+        if token[2] is not None:
+            links.append(Link(*token))
+            continue
+        line_num, link_text, _, label = token
+        definition = definitions.get(label)
+        # Undefined references are plain text, like "[x]" in prose
+        if definition is not None:
+            used.add(label)
+            links.append(Link(line_num, link_text, definition[1]))
+
+    unused = [
+        Link(line_num, label, target)
+        for label, (line_num, target) in definitions.items()
+        if label not in used
+    ]
+    if unused:
+        # Stable sort keeps same-line links in order of appearance
+        links = sorted(links + unused, key=lambda link: link.line)
+    return links
+
+
+def _per_line_regex_links(text: str) -> list[Link]:
+    """The previous extractor, kept as the benchmark baseline."""
+    links: list[Link] = []
+    in_code_block = False
+    for line_num, line in enumerate(text.splitlines(), 1):
+        if line.strip().startswith("```"):
+            in_code_block = not in_code_block
+            continue
+        if in_code_block:
+            continue
+        stripped = INLINE_CODE_RE.sub("", line)
+        for match in LINK_RE.finditer(stripped):
+            links.append(Link(line_num, match.group(1), match.group(2)))
+    return links
+
+
+def synthetic_document(lines: int) -> str:
+    """A large markdown document with the mix of content seen in docs/."""
+    block = [
+        "## Section",
+        "",
+        "Wrapped prose runs over several lines of about eighty characters, the way the",
+        "decision records and research notes are written, with an occasional link to",
+        "[another document](../other/file.md#anchor) and some `inline code` as well.",
+        "Most lines carry no link at all and only continue the paragraph before them.",
+        "",
+        "| Column | Description |",
+        "|--------|-------------|",
+        "| `name` | A table row with a [reference][ref] in it |",
+        "| `tags` | A table row without one |",
+        "",
+        "- A list item that wraps onto a second line and keeps going for a while so",
+        "  that it looks like the bullet points found throughout the docs directory.",
+        "- A second item",
+        "",
+        "```python",
+        "value = data[0]  # [not](a-link.md)",
+        "```",
+        "",
+    ]
+    body = block * (lines // len(block) + 1)
+    return "\n".join(body[:lines] + ["", "[ref]: ./target.md"]) + "\n"
+
+
+def benchmark(text: str, rounds: int) -> dict[str, float]:
+    """Seconds per extraction of text for the tokenizer and the per-line baseline."""
+    results: dict[str, float] = {}
+    for name, func in (("tokenizer", extract_links), ("per-line", _per_line_regex_links)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func(text)
+        results[name] = (time.perf_counter() - start) / rounds
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Markdown link tokenizer micro-benchmark.")
+    parser.add_argument("--bench", action="store_true", help="Compare with the per-line loop")
+    parser.add_argument(
+        "--lines",
+        type=int,
+        default=100_000,
+        metavar="N",
+        help="Lines in the synthetic document (default: 100000)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Extractions to average over (default: 5)",
+    )
+    args = parser.parse_args([] if argv is None else argv)
+
+    if not args.bench:
+        parser.print_help()
+        return
+
+    text = synthetic_document(args.lines)
+    print(f"{args.lines} line(s), {len(text) / 1e6:.1f} MB x {args.rounds} round(s)")
+    results = benchmark(text, args.rounds)
+    for name, seconds in results.items():
+        print(f"  {name:<10} {seconds * 1000:>9.1f} ms  {args.lines / seconds:>12,.0f} lines/s")
+    print(f"  speedup    {results['per-line'] / results['tokenizer']:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
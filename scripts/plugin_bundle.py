@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""Pack plugins into content-addressed bundles, with deltas between versions.
+
+Each plugin listed in marketplace.json is packed as
+<output>/<name>/<version>.tar.gz, versioned by the semver in its plugin.json.
+A bundle is a deterministic gzipped tar holding:
+- bundle.json: name, version, content hash, base (for deltas) and the file
+  table {path: {"sha256", "size", "mode"}}
+- blobs/<sha256>: each distinct file content once, named by its hash
+
+The content hash is a SHA-256 over the file table, so two trees with the
+same files, contents and modes get the same hash, and packing the same tree
+twice produces the same bytes.
+
+When a new version is packed, delta bundles from up to --deltas previous
+versions are written next to it as <name>/<from>_<to>.delta.tar.gz. A delta
+has the new version's full file table but only the blobs its base lacks;
+apply_delta() combines it with the base bundle. index.json in the output
+directory lists every bundle with its size and archive SHA-256.
+
+A version is packed once: if <version>.tar.gz exists with other contents the
+plugin is reported and skipped, as its version should have been bumped.
+
+With --verify, nothing is written: every plugin is rebuilt from the tree
+and compared with its bundle, every bundle's blobs are checked against their
+hashes, every delta is applied to its base and must rebuild the bundle of
+the version it names, and index.json must be current. With --only, just the
+named plugins' bundles and index records are checked. Exit 1 on any mismatch.
+
+Usage:
+    python scripts/plugin_bundle.py                    # pack into .cache/bundles
+    python scripts/plugin_bundle.py -o dist --only foo
+    python scripts/plugin_bundle.py --verify
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+from pathlib import Path
+from typing import NamedTuple
+
+import profiling
+from plugin_catalog import content_hash, plugin_files, read_json
+from profiling import count, phase
+from repo_scan import file_is_current, get_snapshot, write_atomic
+from validate_manifests import PLUGIN_NAME_RE, PLUGINS_DIR, SEMVER_RE, load_marketplace
+
+BUNDLE_FORMAT = 1
+DEFAULT_OUTPUT = Path(".cache/bundles")
+DEFAULT_DELTAS = 3
+MANIFEST_NAME = "bundle.json"
+BLOB_DIR = "blobs"
+INDEX_NAME = "index.json"
+BUNDLE_RE = re.compile(r"^(\d+\.\d+\.\d+)\.tar\.gz$")
+DELTA_RE = re.compile(r"^(\d+\.\d+\.\d+)_(\d+\.\d+\.\d+)\.delta\.tar\.gz$")
+HEX_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class Bundle(NamedTuple):
+    meta: dict  # bundle.json
+    blobs: dict[str, bytes]  # sha256 -> content
+
+
+def semver(version: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in version.split("."))
+
+
+def build(entry: dict) -> Bundle:
+    """Bundle a marketplace entry's plugin directory as it is on disk.
+
+    Raises ValueError if the plugin has no plugin.json, or no valid name or
+    version. Both become output paths, so nothing else is accepted.
+    """
+    source = entry.get("source")
+    if not isinstance(source, str) or not source:
+        raise ValueError(f"{entry.get('name')}: missing 'source'")
+    plugin_dir = PLUGINS_DIR / source
+    manifest = read_json(plugin_dir / ".claude-plugin" / "plugin.json")
+    if not isinstance(manifest, dict):
+        raise ValueError(f"{source}: missing or invalid plugin.json")
+    name = manifest.get("name") or entry.get("name") or source
+    if not isinstance(name, str) or not PLUGIN_NAME_RE.match(name):
+        raise ValueError(f"{source}: name {name!r} is not kebab-case")
+    version = str(manifest.get("version", ""))
+    if not SEMVER_RE.match(version):
+        raise ValueError(f"{source}: version {version!r} is not valid semver")
+
+    snapshot = get_snapshot()
+    files: dict[str, dict] = {}
+    blobs: dict[str, bytes] = {}
+    for path, digest in plugin_files(plugin_dir).items():
+        full = plugin_dir / path
+        data = snapshot.document(full).raw
+        executable = os.stat(full).st_mode & 0o111
+        files[path] = {"sha256": digest, "size": len(data), "mode": 0o755 if executable else 0o644}
+        blobs[digest] = data
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "name": name,
+        "version": version,
+        "hash": content_hash(files),
+        "base": None,
+        "files": files,
+    }
+    return Bundle(meta, blobs)
+
+
+def make_delta(base: Bundle, target: Bundle) -> Bundle:
+    """A delta carrying only the blobs of target that base doesn't have."""
+    have = {f["sha256"] for f in base.meta["files"].values()}
+    meta = {**target.meta, "base": {"version": base.meta["version"], "hash": base.meta["hash"]}}
+    return Bundle(meta, {h: data for h, data in target.blobs.items() if h not in have})
+
+
+def apply_delta(base: Bundle, delta: Bundle) -> Bundle:
+    """The full bundle a delta describes. Raises ValueError if base is the wrong one."""
+    wanted = delta.meta["base"]
+    if wanted is None or wanted["hash"] != base.meta["hash"]:
+        raise ValueError(f"delta for {delta.meta['version']} does not apply to this base")
+    blobs = {}
+    for f in delta.meta["files"].values():
+        digest = f["sha256"]
+        data = delta.blobs.get(digest, base.blobs.get(digest))
+        if data is None:
+            raise ValueError(f"blob {digest} is in neither the delta nor its base")
+        blobs[digest] = data
+    return Bundle({**delta.meta, "base": None}, blobs)
+
+
+def serialize(bundle: Bundle) -> bytes:
+    """Deterministic archive bytes: sorted members, fixed metadata, gzip without a timestamp."""
+    members = [(MANIFEST_NAME, json.dumps(bundle.meta, sort_keys=True, indent=1).encode("utf-8"))]
+    members += [(f"{BLOB_DIR}/{h}", bundle.blobs[h]) for h in sorted(bundle.blobs)]
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.USTAR_FORMAT) as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = 0
+            tar.addfile(info, io.BytesIO(data))
+    out = io.BytesIO()
+    with gzip.GzipFile(filename="", mode="wb", fileobj=out, mtime=0) as gz:
+        gz.write(raw.getvalue())
+    return out.getvalue()
+
+
+def read_bundle(path: Path) -> Bundle:
+    """Load a bundle, checking every blob against its name.
+
+    Raises ValueError if the archive is malformed or a blob is corrupt.
+    """
+    meta = None
+    blobs: dict[str, bytes] = {}
+    try:
+        with phase("read"), tarfile.open(path, "r:gz") as tar:
+            for info in tar:
+                if not info.isfile():
+                    raise ValueError(f"unexpected member {info.name!r}")
+                data = tar.extractfile(info).read()
+                count("bytes_read", len(data))
+                if info.name == MANIFEST_NAME:
+                    meta = json.loads(data)
+                    continue
+                directory, _, digest = info.name.partition("/")
+                if directory != BLOB_DIR or not HEX_RE.match(digest):
+                    raise ValueError(f"unexpected member {info.name!r}")
+                if hashlib.sha256(data).hexdigest() != digest:
+                    raise ValueError(f"blob {digest} is corrupt")
+                blobs[digest] = data
+    except (OSError, tarfile.TarError, EOFError) as e:
+        raise ValueError(f"cannot read bundle: {e}") from None
+    count("files")
+    if not isinstance(meta, dict) or meta.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"missing or unsupported {MANIFEST_NAME}")
+    return Bundle(meta, blobs)
+
+
+def check_bundle(bundle: Bundle) -> list[str]:
+    """Problems with a bundle: a wrong content hash, or blobs missing from a full bundle."""
+    errors = []
+    if content_hash(bundle.meta["files"]) != bundle.meta["hash"]:
+        errors.append("content hash does not match its file table")
+    if bundle.meta["base"] is None:
+        missing = {f["sha256"] for f in bundle.meta["files"].values()} - bundle.blobs.keys()
+        if missing:
+            errors.append(f"{len(missing)} blob(s) missing")
+    return errors
+
+
+def unpack(bundle: Bundle, dest: Path) -> None:
+    """Write a full bundle's files under dest with their modes."""
+    for path, f in bundle.meta["files"].items():
+        target = dest / path
+        if not target.resolve().is_relative_to(dest.resolve()):
+            raise ValueError(f"path outside destination: {path}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(bundle.blobs[f["sha256"]])
+        target.chmod(f["mode"])
+
+
+def bundle_path(output: Path, name: str, version: str) -> Path:
+    return output / name / f"{version}.tar.gz"
+
+
+def delta_path(output: Path, name: str, base: str, version: str) -> Path:
+    return output / name / f"{base}_{version}.delta.tar.gz"
+
+
+def packed_versions(output: Path, name: str) -> list[str]:
+    """Versions with a full bundle in output, oldest first."""
+    try:
+        names = os.listdir(output / name)
+    except OSError:
+        return []
+    versions = [m.group(1) for m in map(BUNDLE_RE.match, names) if m]
+    return sorted(versions, key=semver)
+
+
+def pack(entry: dict, output: Path, deltas: int = DEFAULT_DELTAS) -> tuple[str, list[str]]:
+    """Write a plugin's bundle and deltas from its latest earlier versions.
+
+    Returns (status, messages): status is "packed", "unchanged" or "conflict".
+    Raises ValueError if the plugin can't be bundled.
+    """
+    with phase("discovery"):
+        bundle = build(entry)
+    name, version = bundle.meta["name"], bundle.meta["version"]
+    path = bundle_path(output, name, version)
+    if path.is_file():
+        existing = read_bundle(path)
+        if existing.meta["hash"] == bundle.meta["hash"]:
+            return "unchanged", []
+        return "conflict", [
+            f"{path} already exists with different contents; bump the version in plugin.json"
+        ]
+
+    messages = []
+    with phase("render"):
+        data = serialize(bundle)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with phase("write"):
+        path.write_bytes(data)
+    messages.append(f"{path} ({len(bundle.meta['files'])} file(s), {len(data):,} bytes)")
+
+    older = [v for v in packed_versions(output, name) if semver(v) < semver(version)]
+    for base_version in older[-deltas:] if deltas > 0 else []:
+        base = read_bundle(bundle_path(output, name, base_version))
+        delta = make_delta(base, bundle)
+        target = delta_path(output, name, base_version, version)
+        with phase("render"):
+            delta_data = serialize(delta)
+        with phase("write"):
+            target.write_bytes(delta_data)
+        messages.append(
+            f"{target} ({len(delta.blobs)} changed blob(s), {len(delta_data):,} bytes, "
+            f"{len(delta_data) / len(data):.0%} of the full bundle)"
+        )
+    return "packed", messages
+
+
+def build_index(output: Path) -> dict:
+    """Every bundle and delta in output, with their archive sizes and SHA-256."""
+    plugins: dict[str, dict] = {}
+    for name in sorted(os.listdir(output)) if output.is_dir() else []:
+        directory = output / name
+        if not directory.is_dir():
+            continue
+        bundles, deltas = {}, {}
+        for filename in sorted(os.listdir(directory)):
+            full, delta = BUNDLE_RE.match(filename), DELTA_RE.match(filename)
+            if not full and not delta:
+                continue
+            data = (directory / filename).read_bytes()
+            record = {
+                "file": f"{name}/{filename}",
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+            if full:
+                bundles[full.group(1)] = record
+            else:
+                deltas[f"{delta.group(1)}..{delta.group(2)}"] = record
+        plugins[name] = {"bundles": bundles, "deltas": deltas}
+    return {"format": BUNDLE_FORMAT, "plugins": plugins}
+
+
+def render_index(index: dict) -> str:
+    return json.dumps(index, sort_keys=True, indent=2) + "\n"
+
+
+def verify(output: Path, entries: list[dict], only: bool = False) -> list[str]:
+    """Rebuild the plugins in entries and check their bundles and deltas, and the index.
+
+    Unless only is set, the bundles of every plugin in output are checked,
+    including plugins no longer in the marketplace, and the whole index must
+    be current; with only, just these plugins' bundles and index records.
+    """
+    errors = []
+    names = set()
+    for entry in entries:
+        try:
+            with phase("discovery"):
+                bundle = build(entry)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        names.add(bundle.meta["name"])
+        path = bundle_path(output, bundle.meta["name"], bundle.meta["version"])
+        if not path.is_file():
+            errors.append(f"{path} is missing; run python scripts/plugin_bundle.py")
+            continue
+        try:
+            packed = read_bundle(path)
+        except ValueError as e:
+            errors.append(f"{path}: {e}")
+            continue
+        with phase("validate"):
+            if packed.meta != bundle.meta or packed.blobs != bundle.blobs:
+                errors.append(f"{path} does not match plugins/{entry['source']}")
+
+    for path in sorted(output.glob("*/*.tar.gz")):
+        if only and path.parent.name not in names:
+            continue
+        try:
+            bundle = read_bundle(path)
+        except ValueError as e:
+            errors.append(f"{path}: {e}")
+            continue
+        with phase("validate"):
+            errors.extend(f"{path}: {e}" for e in check_bundle(bundle))
+            delta = DELTA_RE.match(path.name)
+            if delta is None:
+                if bundle.meta["base"] is not None or BUNDLE_RE.match(path.name) is None:
+                    errors.append(f"{path}: not a full bundle")
+                continue
+            base_version, version = delta.groups()
+            # A delta must rebuild exactly the full bundle of the version it names
+            try:
+                base = read_bundle(bundle_path(output, path.parent.name, base_version))
+                full = apply_delta(base, bundle)
+                target = read_bundle(bundle_path(output, path.parent.name, version))
+            except ValueError as e:
+                errors.append(f"{path}: {e}")
+                continue
+            if full != target:
+                errors.append(f"{path} does not rebuild {version}.tar.gz")
+
+    index_path = output / INDEX_NAME
+    index = build_index(output)
+    if only:
+        stored = read_json(index_path)
+        plugins = stored.get("plugins") if isinstance(stored, dict) else None
+        current = all(
+            isinstance(plugins, dict) and plugins.get(name) == index["plugins"].get(name)
+            for name in names
+        )
+    else:
+        current = file_is_current(index_path, render_index(index))
+    if not current:
+        errors.append(f"{index_path} is out of date; run python scripts/plugin_bundle.py")
+    return errors
+
+
+@profiling.profiled("plugin_bundle")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pack plugins into content-addressed bundles.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help=f"Bundle directory (default: {DEFAULT_OUTPUT})",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="NAME",
+        help="Only pack or verify these plugins (marketplace names)",
+    )
+    parser.add_argument(
+        "--deltas",
+        type=int,
+        default=DEFAULT_DELTAS,
+        metavar="N",
+        help=f"Write deltas from up to N previous versions (default: {DEFAULT_DELTAS})",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Rebuild and check every bundle instead of writing any",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    try:
+        data = load_marketplace()
+    except ValueError as e:
+        print(f"error: {e}")
+        sys.exit(1)
+    entries = [
+        e
+        for e in data.get("plugins", [])
+        if isinstance(e, dict) and (not args.only or e.get("name") in args.only)
+    ]
+
+    if args.verify:
+        errors = verify(args.output, entries, only=bool(args.only))
+        if errors:
+            print(f"{len(errors)} problem(s) found:")
+            for error in errors:
+                print(f"  ERROR: {error}")
+            sys.exit(1)
+        print(f"All bundles in {args.output} verified.")
+        return
+
+    problems = 0
+    for entry in entries:
+        try:
+            status, messages = pack(entry, args.output, args.deltas)
+        except ValueError as e:
+            print(f"  ERROR: {e}")
+            problems += 1
+            continue
+        if status == "unchanged":
+            print(f"{entry.get('name')}: unchanged")
+        elif status == "conflict":
+            problems += 1
+        for message in messages:
+            print(f"  {'ERROR: ' if status == 'conflict' else 'wrote '}{message}")
+
+    index_path = args.output / INDEX_NAME
+    content = render_index(build_index(args.output))
+    if not file_is_current(index_path, content):
+        args.output.mkdir(parents=True, exist_ok=True)
+        write_atomic(index_path, content)
+        print(f"wrote {index_path}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
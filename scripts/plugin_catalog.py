@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Build the precompiled marketplace catalog, .claude-plugin/catalog.json.
+
+Clients, dashboards and install tooling read this one file instead of
+crawling plugins/ and parsing every manifest and front matter block. For
+each plugin in marketplace.json it records:
+- the marketplace entry and the parsed plugin.json
+- skills (skills/*/SKILL.md) and agents (agents/*.md) with their front matter
+- hook events and matchers (hooks/hooks.json, or an inline "hooks" object
+  in plugin.json)
+- MCP server names and transports (.mcp.json, or "mcpServers" in plugin.json)
+- a SHA-256 for every file, and a content hash over that file table
+
+Catalog layout:
+    {"version": 1, "marketplace": {top-level fields except plugins},
+     "plugins": [{"name", "source", "hash", "entry", "manifest", "skills",
+                  "agents", "hooks", "mcp_servers", "files": {path: sha256}}]}
+
+Rebuilds are incremental: a plugin whose marketplace entry and file hashes
+match its record in the existing catalog keeps that record without any of
+its files being parsed. With --cache, file hashes are kept on disk keyed by
+path, mtime and size, so unchanged files are not read either, and records
+are kept too. Freshness checks never reuse records from the catalog being
+checked, only from the cache.
+
+The catalog is committed; validate_manifests.py fails if it is out of date.
+With --check, nothing is written: the script exits 1 if the catalog is out
+of date. --profile and --timings-json PATH report time per phase and I/O
+counters (see profiling.py).
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+import profiling
+from profiling import phase
+from repo_scan import (
+    cached_digest,
+    file_is_current,
+    get_snapshot,
+    load_json_cache,
+    save_json_cache,
+    write_atomic,
+)
+from validate_manifests import MARKETPLACE_PATH, PLUGIN_NAME_RE, PLUGINS_DIR, load_marketplace
+
+CATALOG_PATH = Path(".claude-plugin/catalog.json")
+CATALOG_VERSION = 1
+DEFAULT_CACHE = Path(".cache/plugin_catalog.json")
+CACHE_VERSION = 1
+# Local clutter that is never part of a plugin
+IGNORED_DIRS = {".git", "__pycache__", "node_modules"}
+IGNORED_FILES = {".DS_Store", "*.pyc", "*.tmp"}
+
+
+def plugin_files(plugin_dir: Path, old: dict | None = None, new: dict | None = None) -> dict:
+    """{relative posix path: sha256} for every file in a plugin directory, sorted by path.
+
+    With old and new (see repo_scan.cached_digest), unchanged files are not read.
+    """
+    snapshot = get_snapshot()
+    files = {}
+    for base, entries in snapshot.walk(plugin_dir):
+        relative = base.relative_to(plugin_dir)
+        if any(part in IGNORED_DIRS for part in relative.parts):
+            continue
+        for name, is_dir in entries.items():
+            if is_dir or any(fnmatch.fnmatchcase(name, p) for p in IGNORED_FILES):
+                continue
+            path = base / name
+            if old is None:
+                digest = snapshot.document(path).digest
+            else:
+                digest = cached_digest(path, old, new)
+            files[(relative / name).as_posix()] = digest
+    return dict(sorted(files.items()))
+
+
+def content_hash(files: dict) -> str:
+    """SHA-256 identifying a plugin's contents: its sorted file table."""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def read_json(path: Path) -> object | None:
+    """A JSON file's contents, or None if it is missing or invalid."""
+    try:
+        return json.loads(get_snapshot().document(path).raw)
+    except (OSError, ValueError):
+        return None
+
+
+def hook_inventory(config: object) -> list[dict]:
+    """[{"event", "matcher"}] for a hooks configuration ({"hooks": {event: [groups]}})."""
+    if not isinstance(config, dict):
+        return []
+    events = config.get("hooks", config)
+    if not isinstance(events, dict):
+        return []
+    found = []
+    for event, groups in events.items():
+        for group in groups if isinstance(groups, list) else []:
+            matcher = group.get("matcher") if isinstance(group, dict) else None
+            found.append({"event": event, "matcher": matcher or None})
+    return found
+
+
+def mcp_inventory(config: object) -> list[dict]:
+    """[{"name", "type"}] for an MCP configuration ({"mcpServers": {name: server}})."""
+    if not isinstance(config, dict):
+        return []
+    servers = config.get("mcpServers", config)
+    if not isinstance(servers, dict):
+        return []
+    found = []
+    for name, server in servers.items():
+        server = server if isinstance(server, dict) else {}
+        kind = server.get("type") or ("stdio" if "command" in server else None)
+        found.append({"name": name, "type": kind})
+    return found
+
+
+def documents(plugin_dir: Path, files: dict, pattern: str) -> list[dict]:
+    """[{"path", "front_matter"}] for the plugin's files matching a pattern like agents/*.md.
+
+    Each * matches within one path component only.
+    """
+    snapshot = get_snapshot()
+    parts = pattern.split("/")
+    return [
+        {"path": path, "front_matter": snapshot.document(plugin_dir / path).front_matter}
+        for path in files
+        if len(path.split("/")) == len(parts)
+        and all(map(fnmatch.fnmatchcase, path.split("/"), parts))
+    ]
+
+
+def plugin_record(entry: dict, files: dict) -> dict:
+    """Parse a plugin's manifest and inventories into its catalog record."""
+    source = entry.get("source")
+    plugin_dir = PLUGINS_DIR / source
+    manifest = read_json(plugin_dir / ".claude-plugin" / "plugin.json")
+    manifest = manifest if isinstance(manifest, dict) else None
+
+    hooks = hook_inventory(read_json(plugin_dir / "hooks" / "hooks.json"))
+    mcp = mcp_inventory(read_json(plugin_dir / ".mcp.json"))
+    if manifest is not None:
+        hooks += hook_inventory(manifest.get("hooks"))
+        mcp += mcp_inventory(manifest.get("mcpServers"))
+
+    return {
+        "name": entry.get("name"),
+        "source": source,
+        "hash": content_hash(files),
+        "entry": entry,
+        "manifest": manifest,
+        "skills": documents(plugin_dir, files, "skills/*/SKILL.md"),
+        "agents": documents(plugin_dir, files, "agents/*.md"),
+        "hooks": hooks,
+        "mcp_servers": mcp,
+        "files": files,
+    }
+
+
+def load_catalog(path: Path = CATALOG_PATH) -> dict:
+    """The existing catalog, or an empty one if missing, unreadable or outdated."""
+    try:
+        with phase("read"):
+            catalog = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(catalog, dict) or catalog.get("version") != CATALOG_VERSION:
+        return {}
+    return catalog
+
+
+def build_catalog(
+    previous: dict | None = None,
+    cache: dict | None = None,
+    affected: Callable[[dict], bool] | None = None,
+) -> dict:
+    """The catalog for the current tree, reusing unchanged records from previous.
+
+    A record is only reused once the plugin's files have been walked and
+    match it. With a cache, cache["files"] and cache["records"] are replaced
+    by this run's file hashes and records. With affected (see
+    validate_manifests.plugin_filter), plugins it rejects keep their cached
+    record, if any, without their files being walked.
+    Raises ValueError if marketplace.json is missing or not valid JSON.
+    """
+    data = load_marketplace()
+    if not isinstance(data, dict):
+        raise ValueError(f"{MARKETPLACE_PATH} is not a JSON object")
+    reusable = {
+        json.dumps(record["entry"], sort_keys=True): record
+        for record in (previous or {}).get("plugins", [])
+    }
+    old = cache.get("files", {}) if cache is not None else None
+    new: dict[str, dict] | None = {} if cache is not None else None
+    cached = cache.get("records", {}) if cache is not None else {}
+    records: dict[str, dict] = {}
+
+    plugins = []
+    entries = data.get("plugins")
+    for entry in entries if isinstance(entries, list) else []:
+        source = entry.get("source") if isinstance(entry, dict) else None
+        # Invalid sources are reported by validate_manifests.py
+        if not isinstance(source, str) or not PLUGIN_NAME_RE.match(source):
+            continue
+        key = json.dumps(entry, sort_keys=True)
+        record = cached.get(key)
+        if record is not None and affected is not None and not affected(entry):
+            # Keep the unwalked plugin's file hashes for the next run
+            for path in record["files"]:
+                file_key = str(PLUGINS_DIR / source / path)
+                if file_key in old:
+                    new[file_key] = old[file_key]
+        else:
+            with phase("discovery"):
+                files = plugin_files(PLUGINS_DIR / source, old, new)
+            record = next(
+                (r for r in (record, reusable.get(key)) if r is not None and r["files"] == files),
+                None,
+            )
+            if record is None:
+                with phase("parse"):
+                    record = plugin_record(entry, files)
+        records[key] = record
+        plugins.append(record)
+
+    if cache is not None:
+        cache["files"] = new
+        cache["records"] = records
+    return {
+        "version": CATALOG_VERSION,
+        "marketplace": {k: v for k, v in data.items() if k != "plugins"},
+        "plugins": plugins,
+    }
+
+
+def render(catalog: dict) -> str:
+    """Serialize a catalog: compact, with sorted keys so rebuilds are byte-identical."""
+    return json.dumps(catalog, separators=(",", ":"), sort_keys=True, ensure_ascii=False) + "\n"
+
+
+def check_catalog(
+    path: Path = CATALOG_PATH,
+    cache: dict | None = None,
+    affected: Callable[[dict], bool] | None = None,
+) -> list[str]:
+    """Errors if the catalog at path doesn't match the tree (used by validate_manifests.py).
+
+    The catalog is rebuilt without reusing anything from the file under
+    check. cache and affected are passed to build_catalog(), so with a cache
+    only the plugins affected are walked, and only their files not in the
+    cache are read.
+    """
+    try:
+        content = render(build_catalog(None, cache, affected))
+    except ValueError:
+        # marketplace.json problems are reported by the validator itself
+        return []
+    if not path.is_file():
+        return [f"{path} is missing; run python scripts/plugin_catalog.py"]
+    if not file_is_current(path, content):
+        return [f"{path} is out of date; run python scripts/plugin_catalog.py"]
+    return []
+
+
+@profiling.profiled("plugin_catalog")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the precompiled marketplace catalog.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit 1 if the catalog is out of date instead of writing it",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE,
+        metavar="PATH",
+        help=f"Reuse and update a file hash cache (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=CATALOG_PATH,
+        help=f"Catalog to build (default: {CATALOG_PATH})",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    cache = load_json_cache(args.cache, CACHE_VERSION) if args.cache else None
+    try:
+        catalog = build_catalog(load_catalog(args.output), cache)
+    except ValueError as e:
+        print(f"error: {e}")
+        sys.exit(1)
+    if cache is not None:
+        cache["version"] = CACHE_VERSION
+        save_json_cache(args.cache, cache)
+    print(f"found {len(catalog['plugins'])} plugin(s) in {MARKETPLACE_PATH}")
+
+    with phase("render"):
+        content = render(catalog)
+    if file_is_current(args.output, content):
+        print(f"{args.output} is up to date")
+    elif args.check:
+        print(f"error: {args.output} is out of date; run python scripts/plugin_catalog.py")
+        sys.exit(1)
+    else:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(args.output, content)
+        get_snapshot().forget(args.output)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
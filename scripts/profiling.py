@@ -0,0 +1,243 @@
+"""Per-phase timing and counters behind every script's --profile and --timings-json.
+
+Code marks the work it does with phase() blocks and count() calls:
+    with phase("read"):
+        data = path.read_bytes()
+    count("bytes_read", len(data))
+
+Phase times are exclusive: time spent in a nested phase (e.g. "read" while
+resolving a link) is charged to that phase only, so the phases of a run add
+up to its wall time, with anything outside a phase reported as "other".
+For the same reason phases are only recorded on the main thread: code
+running on a thread pool updates counters only, and its time is charged to
+whichever phase the main thread is waiting in. Counters are thread-safe.
+Work done in worker processes (validate_frontmatter.py --jobs) is not seen.
+
+A thread inside a scope(name) block records its phases separately, under
+that name, with the scope's own wall time and "other". check.py runs each
+check in a scope, so concurrent checks are timed one by one; their scopes
+overlap, so together they can add up to more than the run's wall time.
+
+Phase names used across the scripts: discovery, read, parse, validate,
+resolve, render, write, plus fetch, index and search for the docs mirrors.
+Counters: files, bytes_read, links_checked, listdir, stat, http_requests,
+bytes_transferred, cache_hits.
+
+A script opts in with:
+    @profiling.profiled("validate_links")
+    def main(argv=None):
+        ...
+        profiling.add_arguments(parser)
+        args = parser.parse_args(argv)
+        profiling.configure(args)
+
+--profile prints a table to stderr when main returns or exits; --timings-json
+PATH writes the same numbers as JSON for CI to trend. A profiled main called
+from another one (check.py running several scripts) records into the outer
+run, and its own --profile / --timings-json are ignored.
+"""
+
+import functools
+import json
+import sys
+import threading
+from pathlib import Path
+from time import perf_counter
+
+TIMINGS_VERSION = 2
+
+_lock = threading.Lock()
+_main = threading.main_thread()
+_stack: list["phase"] = []
+_phases: dict[str, float] = {}
+_counters: dict[str, int] = {}
+_scopes: dict[str, dict[str, float]] = {}  # scope -> phases
+_scope_walls: dict[str, float] = {}
+_local = threading.local()  # scope and phase stack of a thread inside scope()
+_options: dict = {}
+_depth = 0  # profiled mains currently running
+
+
+class phase:
+    """Context manager charging its wall time (minus nested phases) to name."""
+
+    __slots__ = ("name", "start", "nested", "stack", "into")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "phase":
+        scoped = getattr(_local, "scope", None)
+        if scoped is not None:
+            self.stack, self.into = _local.stack, _scopes.setdefault(scoped, {})
+        elif threading.current_thread() is _main:
+            self.stack, self.into = _stack, _phases
+        else:
+            self.start = None
+            return self
+        self.stack.append(self)
+        self.nested = 0.0
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.start is None:
+            return
+        elapsed = perf_counter() - self.start
+        stack = self.stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+        with _lock:
+            self.into[self.name] = self.into.get(self.name, 0.0) + elapsed - self.nested
+
+
+class scope:
+    """Context manager recording the current thread's phases under name, on any thread."""
+
+    __slots__ = ("name", "start", "saved")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "scope":
+        self.saved = (getattr(_local, "scope", None), getattr(_local, "stack", None))
+        with _lock:
+            _scopes.setdefault(self.name, {})
+        _local.scope, _local.stack = self.name, []
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = perf_counter() - self.start
+        _local.scope, _local.stack = self.saved
+        with _lock:
+            _scope_walls[self.name] = _scope_walls.get(self.name, 0.0) + elapsed
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset() -> None:
+    """Clear all phases, counters and options."""
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+        _scopes.clear()
+        _scope_walls.clear()
+    _options.clear()
+
+
+def _with_other(phases: dict[str, float], wall: float) -> dict[str, float]:
+    """Phases by descending time, plus "other" for the rest of wall."""
+    ranked = dict(sorted(phases.items(), key=lambda item: -item[1]))
+    ranked["other"] = max(0.0, wall - sum(ranked.values()))
+    return ranked
+
+
+def results(script: str, wall: float) -> dict:
+    """The recorded phases, scopes and counters as a JSON-ready dict."""
+    with _lock:
+        phases = _with_other(_phases, wall)
+        scopes = {
+            name: {
+                "wall_seconds": _scope_walls.get(name, 0.0),
+                "phases": _with_other(_scopes[name], _scope_walls.get(name, 0.0)),
+            }
+            for name in sorted(_scopes)
+        }
+        counters = dict(sorted(_counters.items()))
+    return {
+        "version": TIMINGS_VERSION,
+        "script": script,
+        "wall_seconds": wall,
+        "phases": phases,
+        "scopes": scopes,
+        "counters": counters,
+    }
+
+
+def add_arguments(parser) -> None:
+    """Add --profile and --timings-json to an argparse parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time per phase and I/O counters to stderr at exit",
+    )
+    parser.add_argument(
+        "--timings-json",
+        type=Path,
+        metavar="PATH",
+        help="Write per-phase timings and counters to PATH as JSON",
+    )
+
+
+def configure(args) -> None:
+    """Enable reporting as requested by the parsed --profile / --timings-json.
+
+    Ignored inside a nested profiled main.
+    """
+    if _depth > 1:
+        return
+    _options["profile"] = args.profile
+    _options["json"] = args.timings_json
+
+
+def report(data: dict) -> None:
+    """Print timings to stderr."""
+    wall = data["wall_seconds"]
+    print(f"\n{data['script']}: {wall * 1000:.1f} ms", file=sys.stderr)
+    for name, seconds in data["phases"].items():
+        share = seconds / wall * 100 if wall else 0.0
+        print(f"  {name:<12} {seconds * 1000:>10.1f} ms {share:>5.1f}%", file=sys.stderr)
+    for scoped, timings in data["scopes"].items():
+        scope_wall = timings["wall_seconds"]
+        print(f"  {scoped}: {scope_wall * 1000:.1f} ms", file=sys.stderr)
+        for name, seconds in timings["phases"].items():
+            share = seconds / scope_wall * 100 if scope_wall else 0.0
+            print(f"    {name:<10} {seconds * 1000:>10.1f} ms {share:>5.1f}%", file=sys.stderr)
+    for name, value in data["counters"].items():
+        print(f"  {name:<18} {value:>12,}", file=sys.stderr)
+
+
+def profiled(script: str):
+    """Decorate a script's main() to record a fresh profile and report it on the way out.
+
+    Reports are written even when main() exits through sys.exit().
+    """
+
+    def decorate(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            global _depth
+            with _lock:
+                _depth += 1
+                outermost = _depth == 1
+            if not outermost:
+                try:
+                    return main(*args, **kwargs)
+                finally:
+                    with _lock:
+                        _depth -= 1
+            reset()
+            start = perf_counter()
+            try:
+                return main(*args, **kwargs)
+            finally:
+                with _lock:
+                    _depth -= 1
+                if _options.get("profile") or _options.get("json"):
+                    data = results(script, perf_counter() - start)
+                    if _options["profile"]:
+                        report(data)
+                    if _options["json"]:
+                        path = _options["json"]
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+        return wrapper
+
+    return decorate
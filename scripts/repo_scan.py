@@ -0,0 +1,432 @@
+"""Shared repository snapshot used by the validators and indexers.
+
+Every script used to walk docs/ and plugins/ and read the same markdown files
+on its own. A Snapshot lists each directory at most once and reads each file
+at most once, then hands out Document objects carrying the raw bytes, front
+matter, links, headings and anchors (heading slugs and explicit <a id>/<a name>
+anchors). Scripts running in the same process share one snapshot through
+get_snapshot().
+
+Usage from a script:
+    snapshot = get_snapshot()
+    for path in snapshot.glob(Path("docs/decisions"), "*.md"):
+        doc = snapshot.document(path)
+        doc.front_matter, doc.links, doc.headings, doc.anchors
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+from functools import cached_property
+from pathlib import Path
+from typing import NamedTuple
+
+import front_matter
+from front_matter import FRONT_MATTER_RE, parse_front_matter, read_front_matter
+from markdown_links import LIST_ITEM_RE, Link, extract_links, prose_lines
+from profiling import count, phase
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+# Setext underline: the paragraph above it is a level 1 (=) or 2 (-) heading
+SETEXT_RE = re.compile(r"^(=+|-+)\s*$")
+# Lines that can open code or be a heading: indented, fence-like, starting
+# with "#", or a setext underline
+HEADING_LINE_RE = re.compile(r"^(?:[ \t`~][^\n]*|#[^\n]*|=+[ \t]*$|-+[ \t]*$)", re.MULTILINE)
+# Lines that can open code or hold an explicit <a id="..."> or <a name="..."> anchor
+HTML_ANCHOR_LINE_RE = re.compile(r"^(?:[ \t`~][^\n]*|[^\n]*<[aA]\s[^\n]*)", re.MULTILINE)
+HTML_ANCHOR_RE = re.compile(r"<a\s[^>]*?\b(?:id|name)\s*=\s*[\"']([^\"']+)[\"']", re.IGNORECASE)
+# [text](url) in a heading renders as its text
+HEADING_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+# Characters GitHub drops when turning heading text into an anchor
+SLUG_STRIP_RE = re.compile(r"[^\w\- ]")
+
+
+class Heading(NamedTuple):
+    line: int
+    level: int
+    text: str
+
+
+def setext_paragraph(text: str, start: int, body: int) -> tuple[int, str] | None:
+    """(offset, text) of the paragraph a setext underline at start turns into a heading.
+
+    The paragraph runs back to a blank line, a code fence, an ATX heading,
+    another underline or body (where any front matter ends). None if it is empty or
+    opens a list item, block quote, table or HTML block.
+    """
+    lines: list[str] = []
+    pos = start
+    while pos > body:
+        line_start = max(text.rfind("\n", 0, pos - 1) + 1, body)
+        line = text[line_start : pos - 1]
+        stripped = line.strip()
+        if (
+            not stripped
+            or stripped.startswith(("```", "~~~"))
+            or HEADING_RE.match(stripped)
+            or SETEXT_RE.match(stripped)
+        ):
+            break
+        lines.append(line)
+        pos = line_start
+    if not lines:
+        return None
+    first = lines[-1].lstrip()
+    if len(lines[-1]) - len(first) >= 4 or LIST_ITEM_RE.match(first) or first[0] in ">|<":
+        return None
+    return pos, " ".join(line.strip() for line in reversed(lines))
+
+
+def extract_headings(text: str) -> list[Heading]:
+    """Extract ATX (# Title) and setext (Title / =====) headings.
+
+    Fenced and indented code blocks and front matter are skipped. A setext
+    heading spanning several lines is read as one line of text.
+    """
+    headings: list[Heading] = []
+    line_num = 1
+    counted = 0  # Newlines before this offset are counted in line_num
+    front = FRONT_MATTER_RE.match(text)
+    body = front.end() if front else 0
+
+    for start, indent, line in prose_lines(text, HEADING_LINE_RE):
+        if indent >= 4 or start < body:
+            continue
+        match = HEADING_RE.match(line) if not indent else None
+        if match:
+            level, title = len(match.group(1)), match.group(2)
+        else:
+            underline = SETEXT_RE.match(line)
+            paragraph = underline and setext_paragraph(text, start, body)
+            if not paragraph:
+                continue
+            start, title = paragraph
+            level = 1 if underline.group(1)[0] == "=" else 2
+        line_num += text.count("\n", counted, start)
+        counted = start
+        headings.append(Heading(line_num, level, title))
+
+    return headings
+
+
+def extract_html_anchors(text: str) -> list[str]:
+    """Ids and names of explicit <a id="..."> and <a name="..."> anchors outside code."""
+    found: list[str] = []
+    for _, indent, line in prose_lines(text, HTML_ANCHOR_LINE_RE):
+        if indent < 4:
+            found.extend(HTML_ANCHOR_RE.findall(line))
+    return found
+
+
+def slugify(text: str) -> str:
+    """GitHub-compatible anchor slug for a heading's text."""
+    text = HEADING_LINK_RE.sub(r"\1", text)
+    return SLUG_STRIP_RE.sub("", text.lower()).replace(" ", "-")
+
+
+def heading_anchors(headings: list[Heading]) -> frozenset[str]:
+    """Anchor slugs for headings in document order, duplicates suffixed -1, -2, ..."""
+    anchors: set[str] = set()
+    counts: dict[str, int] = {}
+    for heading in headings:
+        base = slug = slugify(heading.text)
+        count = counts.get(base, 0)
+        while slug in anchors:
+            count += 1
+            slug = f"{base}-{count}"
+        counts[base] = count
+        anchors.add(slug)
+    return frozenset(anchors)
+
+
+class Document:
+    """A markdown file in the snapshot. Contents are read and parsed on first use."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"Document({str(self.path)!r})"
+
+    @cached_property
+    def raw(self) -> bytes:
+        with phase("read"):
+            data = self.path.read_bytes()
+        count("files")
+        count("bytes_read", len(data))
+        return data
+
+    @cached_property
+    def digest(self) -> str:
+        """SHA-256 of the raw contents, hex encoded."""
+        return hashlib.sha256(self.raw).hexdigest()
+
+    @cached_property
+    def text(self) -> str:
+        text = self.raw.decode("utf-8")
+        # Match read_text() universal newline handling
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    @cached_property
+    def header(self) -> str:
+        """The front matter block, read on its own unless the whole file already was."""
+        if "text" in self.__dict__ or "raw" in self.__dict__:
+            match = FRONT_MATTER_RE.match(self.text)
+            return match.group(0) if match else ""
+        return read_front_matter(self.path)
+
+    @cached_property
+    def front_matter(self) -> dict | None:
+        if "raw" in self.__dict__ or "header" in self.__dict__:
+            header = self.header
+            with phase("parse"):
+                return parse_front_matter(header)
+        return front_matter.parse_file(self.path)
+
+    @cached_property
+    def links(self) -> list[Link]:
+        text = self.text
+        with phase("parse"):
+            return extract_links(text)
+
+    @cached_property
+    def headings(self) -> list[Heading]:
+        text = self.text
+        with phase("parse"):
+            return extract_headings(text)
+
+    @cached_property
+    def anchors(self) -> frozenset[str]:
+        """Heading anchors plus explicit HTML anchors, lowercased like link fragments."""
+        text = self.text
+        with phase("parse"):
+            explicit = {anchor.lower() for anchor in extract_html_anchors(text)}
+        return heading_anchors(self.headings) | explicit
+
+
+class Snapshot:
+    """Point-in-time view of the repository: cached directory listings and documents.
+
+    Each directory is listed at most once and each file is read at most once,
+    no matter how many checks ask for it. Paths are returned in the form the
+    caller passed in (relative paths stay relative), so messages are unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._listings: dict[str, dict[str, bool] | None] = {}
+        self._documents: dict[str, Document] = {}
+        self._exists: dict[tuple[str, str], bool] = {}
+
+    def listdir(self, directory: Path | str) -> dict[str, bool] | None:
+        """Return {name: is_dir} for a directory, or None if it is not one."""
+        key = os.path.abspath(directory)
+        try:
+            return self._listings[key]
+        except KeyError:
+            pass
+        count("listdir")
+        try:
+            with os.scandir(key) as it:
+                entries: dict[str, bool] | None = {e.name: e.is_dir() for e in it}
+        except OSError:
+            entries = None
+        self._listings[key] = entries
+        return entries
+
+    def exists_exact(self, directory: Path | str, relative: str) -> bool:
+        """Check that relative exists from directory with every component's case matching.
+
+        On case-insensitive systems (Windows, macOS) Path.exists() returns True
+        even when the case doesn't match. Walking the cached listings component
+        by component catches mismatches that would break on Linux CI, without
+        touching the filesystem for directories already listed.
+        """
+        base = os.path.abspath(directory)
+        key = (base, relative)
+        try:
+            return self._exists[key]
+        except KeyError:
+            pass
+
+        current = base
+        found = True
+        for part in Path(relative).parts:
+            if part == "..":
+                current = os.path.dirname(current)
+                continue
+            if part == ".":
+                continue
+            entries = self.listdir(current)
+            if entries is None or part not in entries:
+                found = False
+                break
+            current = os.path.join(current, part)
+
+        self._exists[key] = found
+        return found
+
+    def glob(self, directory: Path, pattern: str) -> list[Path]:
+        """Sorted files matching a non-recursive pattern such as */skills/*/SKILL.md."""
+        paths = [directory]
+        parts = pattern.split("/")
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            matched: list[Path] = []
+            for base in paths:
+                entries = self.listdir(base)
+                if not entries:
+                    continue
+                if any(c in part for c in "*?["):
+                    names = [n for n in entries if fnmatch.fnmatchcase(n, part)]
+                else:
+                    names = [part] if part in entries else []
+                for name in names:
+                    # Intermediate parts must be directories, the last must be a file
+                    if entries[name] != last:
+                        matched.append(base / name)
+            paths = matched
+        return sorted(paths)
+
+    def walk(self, directory: Path) -> list[tuple[Path, dict[str, bool]]]:
+        """Every directory under directory (inclusive) with its {name: is_dir} listing."""
+        found: list[tuple[Path, dict[str, bool]]] = []
+        pending = [directory]
+        while pending:
+            base = pending.pop()
+            entries = self.listdir(base)
+            if entries is None:
+                continue
+            found.append((base, entries))
+            pending.extend(base / name for name, is_dir in entries.items() if is_dir)
+        return found
+
+    def rglob(self, directory: Path, pattern: str) -> list[Path]:
+        """Sorted files under directory (recursively) whose name matches pattern."""
+        return sorted(
+            base / name
+            for base, entries in self.walk(directory)
+            for name, is_dir in entries.items()
+            if not is_dir and fnmatch.fnmatchcase(name, pattern)
+        )
+
+    def document(self, path: Path) -> Document:
+        """Return the cached Document for path, creating it on first request."""
+        key = os.path.abspath(path)
+        doc = self._documents.get(key)
+        if doc is None:
+            doc = self._documents[key] = Document(Path(path))
+        return doc
+
+    def forget(self, path: Path) -> None:
+        """Drop a file from the snapshot after it has been rewritten."""
+        key = os.path.abspath(path)
+        self._documents.pop(key, None)
+        front_matter.forget(key)
+        self._listings.pop(os.path.dirname(key), None)
+        self._exists.clear()
+
+
+def load_json_cache(path: Path, version: int) -> dict:
+    """Load a JSON cache, returning an empty one if missing, corrupt or outdated."""
+    try:
+        with phase("read"):
+            cache = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != version:
+        return {}
+    return cache
+
+
+def save_json_cache(path: Path, cache: dict) -> None:
+    """Write a cache atomically so an interrupted run never leaves it half-written."""
+    with phase("write"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(cache, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write text to a temporary file and rename it over path."""
+    with phase("write"):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(text.encode("utf-8"))
+        os.replace(tmp, path)
+
+
+def file_is_current(path: Path, content: str) -> bool:
+    """Whether path exists and holds exactly content."""
+    try:
+        with phase("read"):
+            return path.read_text(encoding="utf-8") == content
+    except OSError:
+        return False
+
+
+def cached_front_matter(path: Path, old: dict[str, dict], new: dict[str, dict]) -> dict | None:
+    """Front matter of path through a persisted metadata cache.
+
+    old and new map a path to {"mtime", "size", "hash", "fields"}. If the
+    mtime and size in old still match, the file isn't opened at all; if only
+    the content hash matches, it is read but not parsed. The entry used is
+    recorded in new, so a cache rebuilt from new drops deleted files.
+    """
+    key = str(path)
+    st = os.stat(path)
+    count("stat")
+    entry = old.get(key)
+    if entry is not None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+        count("cache_hits")
+        new[key] = entry
+        return front_matter.copy_fields(entry["fields"])
+
+    doc = get_snapshot().document(path)
+    digest = doc.digest
+    if entry is not None and entry["hash"] == digest:
+        count("cache_hits")
+        fields = entry["fields"]
+    else:
+        fields = doc.front_matter
+    new[key] = {"mtime": st.st_mtime_ns, "size": st.st_size, "hash": digest, "fields": fields}
+    return front_matter.copy_fields(fields)
+
+
+def cached_digest(path: Path, old: dict[str, dict], new: dict[str, dict]) -> str:
+    """SHA-256 of a file through a persisted {path: {"mtime", "size", "hash"}} cache.
+
+    The file is only read when its mtime or size changed since old was
+    recorded. The entry used is recorded in new, as in cached_front_matter().
+    """
+    key = str(path)
+    st = os.stat(path)
+    count("stat")
+    entry = old.get(key)
+    if entry is not None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+        count("cache_hits")
+        new[key] = entry
+        return entry["hash"]
+    digest = get_snapshot().document(path).digest
+    new[key] = {"mtime": st.st_mtime_ns, "size": st.st_size, "hash": digest}
+    return digest
+
+
+_snapshot: Snapshot | None = None
+
+
+def get_snapshot() -> Snapshot:
+    """Return the process-wide snapshot, creating it on first use."""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = Snapshot()
+    return _snapshot
+
+
+def reset_snapshot() -> None:
+    """Discard the process-wide snapshot so the next caller rescans."""
+    global _snapshot
+    _snapshot = None
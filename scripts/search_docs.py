@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Full-text search over the fetched documentation mirrors.
+
+The fetch scripts update an SQLite FTS5 index after each run. It covers page
+titles and descriptions (from llms.txt, kept in each mirror's manifest),
+headings and body text. Updates are incremental: a page is re-indexed only
+when its content, title or description changes, and pages deleted from a
+mirror are dropped. Bytes that aren't valid UTF-8 are indexed as U+FFFD.
+
+Usage:
+    python scripts/search_docs.py --update                 # index docs/api-docs, docs/claude-code-docs
+    python scripts/search_docs.py hook timeout             # ranked results with snippets
+    python scripts/search_docs.py "tool use" -n 5
+    python scripts/search_docs.py --raw 'title:hooks NOT agent'   # FTS5 query syntax
+    python scripts/search_docs.py --update --profile       # time per phase
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import profiling
+from fetch_engine import load_manifest
+from profiling import phase
+from repo_scan import Document, Snapshot, extract_headings
+
+MIRROR_DIRS = [Path("docs/api-docs"), Path("docs/claude-code-docs")]
+DEFAULT_DB = Path(".cache/docs_search.sqlite")
+DEFAULT_LIMIT = 10
+# bm25 column weights: path, title, description, headings, body
+WEIGHTS = (0.0, 10.0, 5.0, 3.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    path UNINDEXED, title, description, headings, body, tokenize = 'porter unicode61'
+);
+"""
+
+
+def connect(db: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the search database."""
+    db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def page_hash(doc: Document, record: dict) -> str:
+    """SHA-256 over a page's content and the manifest metadata indexed with it."""
+    key = [doc.digest, record.get("title"), record.get("description")]
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+
+def page_fields(doc: Document, record: dict) -> tuple[str, str, str, str]:
+    """(title, description, headings, body) to index for a mirrored page."""
+    text = doc.raw.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    headings = extract_headings(text)
+    title = record.get("title") or (headings[0].text if headings else doc.path.stem)
+    return title, record.get("description") or "", "\n".join(h.text for h in headings), text
+
+
+def update_index(conn: sqlite3.Connection, mirrors: list[Path]) -> tuple[int, int, int]:
+    """Bring the index in line with the mirrors. Returns (indexed, unchanged, removed).
+
+    Uses its own snapshot: the mirrors have usually just been rewritten.
+    """
+    snapshot = Snapshot()
+    rows = conn.execute("SELECT id, path, sha256 FROM files")
+    known = {path: (file_id, digest) for file_id, path, digest in rows}
+    seen: set[str] = set()
+    indexed = unchanged = 0
+
+    with conn:
+        for mirror in mirrors:
+            manifest = load_manifest(mirror)
+            for path in snapshot.rglob(mirror, "*.md"):
+                key = path.as_posix()
+                seen.add(key)
+                doc = snapshot.document(path)
+                page = path.relative_to(mirror).with_suffix("").as_posix()
+                record = manifest.get(page, {})
+                digest = page_hash(doc, record)
+                old = known.get(key)
+                if old is not None and old[1] == digest:
+                    unchanged += 1
+                    continue
+                if old is not None:
+                    conn.execute("DELETE FROM pages WHERE rowid = ?", (old[0],))
+                    conn.execute("UPDATE files SET sha256 = ? WHERE id = ?", (digest, old[0]))
+                    file_id = old[0]
+                else:
+                    cur = conn.execute(
+                        "INSERT INTO files (path, sha256) VALUES (?, ?)", (key, digest)
+                    )
+                    file_id = cur.lastrowid
+                conn.execute(
+                    "INSERT INTO pages (rowid, path, title, description, headings, body)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_id, key, *page_fields(doc, record)),
+                )
+                indexed += 1
+
+        # Drop pages that disappeared from the mirrors being updated
+        prefixes = tuple(mirror.as_posix() + "/" for mirror in mirrors)
+        removed = [
+            (file_id,)
+            for key, (file_id, _) in known.items()
+            if key.startswith(prefixes) and key not in seen
+        ]
+        conn.executemany("DELETE FROM pages WHERE rowid = ?", removed)
+        conn.executemany("DELETE FROM files WHERE id = ?", removed)
+
+    return indexed, unchanged, len(removed)
+
+
+def update_mirror(mirror: Path, db: Path | None = None) -> None:
+    """Indexing stage run by the fetch scripts after a mirror is updated.
+
+    A failure here (e.g. SQLite built without FTS5) is reported but doesn't
+    fail the fetch.
+    """
+    try:
+        conn = connect(db or DEFAULT_DB)
+        try:
+            with phase("index"):
+                indexed, unchanged, removed = update_index(conn, [mirror])
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Search index not updated ({e})")
+        return
+    print(f"Search index: {indexed} page(s) indexed, {unchanged} unchanged, {removed} removed.")
+
+
+def to_fts_query(terms: list[str]) -> str:
+    """Quote each term so punctuation like "pre-tool" is matched literally; all must match."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search(
+    conn: sqlite3.Connection, query: str, limit: int = DEFAULT_LIMIT
+) -> list[tuple[str, str, str]]:
+    """Best matches for an FTS5 query as (path, title, snippet), highest ranked first."""
+    return conn.execute(
+        f"SELECT path, title, snippet(pages, 4, '[', ']', '...', 12) FROM pages"
+        f" WHERE pages MATCH ? ORDER BY bm25(pages, {', '.join(map(str, WEIGHTS))}) LIMIT ?",
+        (query, limit),
+    ).fetchall()
+
+
+@profiling.profiled("search_docs")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Search the fetched documentation mirrors.")
+    parser.add_argument("terms", nargs="*", help="Words that must all appear")
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Re-index changed pages in the mirrors before searching",
+    )
+    parser.add_argument(
+        "--mirror",
+        action="append",
+        type=Path,
+        metavar="DIR",
+        help="Mirror directory to index; repeatable (default: docs/api-docs docs/claude-code-docs)",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB,
+        help=f"Search database (default: {DEFAULT_DB})",
+    )
+    parser.add_argument(
+        "-n",
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"Maximum results (default: {DEFAULT_LIMIT})",
+    )
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="Pass the terms through as an FTS5 query expression",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if not args.update and not args.terms:
+        parser.print_help()
+        return
+    if not args.update and not args.db.is_file():
+        print(f"error: {args.db} does not exist; run with --update first", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        conn = connect(args.db)
+    except sqlite3.OperationalError as e:
+        print(f"error: cannot open search index ({e})", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.update:
+            mirrors = [m for m in args.mirror or MIRROR_DIRS if m.is_dir()]
+            with phase("index"):
+                indexed, unchanged, removed = update_index(conn, mirrors)
+            print(f"Indexed {indexed} page(s), {unchanged} unchanged, {removed} removed.")
+        if not args.terms:
+            return
+
+        query = " ".join(args.terms) if args.raw else to_fts_query(args.terms)
+        start = time.perf_counter()
+        try:
+            with phase("search"):
+                results = search(conn, query, args.limit)
+        except sqlite3.OperationalError as e:
+            print(f"error: invalid query ({e})", file=sys.stderr)
+            sys.exit(1)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+
+    for path, title, snippet in results:
+        print(f"{path}  {title}")
+        print(f"    {' '.join(snippet.split())}")
+    print(f"\n{len(results)} result(s) in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
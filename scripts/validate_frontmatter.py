@@ -11,15 +11,37 @@ Document types and their rules:
 - Agents (plugins/*/agents/*.md): name, description, model, color, tools required;
   model in {sonnet, opus, haiku, inherit}
 
+With --jobs N, reading, parsing and validation are spread across N worker
+processes in chunked batches. Errors are reported in the same order as a
+serial run. With --changed-since REF, only documents changed since a git
+ref are validated (for pull requests), or all of them if scripts/ or the CI
+config changed (see git_diff.rules_changed). With --watch, keeps running and
+revalidates documents as they change. --profile and --timings-json PATH
+report time per phase and I/O counters (see profiling.py); with --jobs the
+work done in worker processes shows up as "validate". With --ndjson, each
+error is written to stdout as a JSON line as soon as it is found (see
+findings.py for the schema and codes); --max-findings N stops after N errors.
+
 Exit 0 if all checks pass, exit 1 if any fail.
 """
 
+import argparse
+import itertools
+import os
 import re
 import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date as date_type
 from pathlib import Path
 
-FRONT_MATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
+import findings
+import git_diff
+import profiling
+from front_matter import parse_file, parse_front_matter  # noqa: F401 (parse_front_matter re-exported)
+from profiling import phase
+from repo_scan import get_snapshot
+
 ADR_NUMBER_RE = re.compile(r"^\d{4}-")
 KEBAB_RE = re.compile(r"^[a-z][a-z0-9]*(-[a-z0-9]+)*$")
 
@@ -32,224 +54,295 @@ RESEARCH_DIR = Path("docs/research")
 PLUGINS_DIR = Path("plugins")
 
 
-def parse_front_matter(text: str) -> dict | None:
-    """Extract front matter fields without a YAML dependency.
-
-    Handles inline lists [a, b], block lists (- item), multiline values (|).
-    """
-    match = FRONT_MATTER_RE.match(text)
-    if not match:
-        return None
-
-    fields: dict = {}
-    current_key: str | None = None
-    current_list: list | None = None
-    multiline_value: list[str] | None = None
-
-    for line in match.group(1).splitlines():
-        stripped = line.strip()
-
-        # Accumulate multiline scalar (|)
-        if multiline_value is not None:
-            if line.startswith("  ") or line.startswith("\t"):
-                multiline_value.append(line.strip())
-                fields[current_key] = "\n".join(multiline_value)
-                continue
-            else:
-                multiline_value = None
-
-        if not stripped or stripped.startswith("#"):
-            continue
-
-        # Block list item: "  - value"
-        if line.startswith("  - ") and current_key is not None:
-            if current_list is None:
-                current_list = []
-            current_list.append(line.strip()[2:].strip())
-            fields[current_key] = current_list
-            continue
-
-        # Flush any pending list
-        current_list = None
-
-        key, _, value = stripped.partition(":")
-        key = key.strip()
-        value = value.strip()
-        current_key = key
-
-        # Multiline scalar indicator
-        if value == "|":
-            multiline_value = []
-            fields[key] = ""
-            continue
-
-        # Inline list: [a, b, c]
-        if value.startswith("[") and value.endswith("]"):
-            value = [v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()]
-        # Quoted string
-        elif value.startswith(("'", '"')) and value.endswith(("'", '"')):
-            value = value[1:-1]
-        # Null
-        elif value == "null":
-            value = None
-        # Empty value (block list follows)
-        elif value == "":
-            current_list = []
-            value = current_list
-
-        fields[key] = value
-
-    return fields
-
-
-def validate_adr(path: Path, fields: dict) -> list[str]:
+def validate_adr(path: Path, fields: dict) -> list[tuple[str, str]]:
     """Validate an ADR's front matter."""
     errors = []
     for req in ("title", "status", "date", "decision-makers"):
         if not fields.get(req):
-            errors.append(f"{path}: missing required field '{req}'")
+            errors.append(("missing-field", f"missing required field '{req}'"))
 
     status = fields.get("status")
     if status and status not in ADR_STATUSES:
-        errors.append(
-            f"{path}: invalid status '{status}' "
-            f"(expected one of: {', '.join(sorted(ADR_STATUSES))})"
-        )
+        errors.append((
+            "invalid-status",
+            f"invalid status '{status}' "
+            f"(expected one of: {', '.join(sorted(ADR_STATUSES))})",
+        ))
 
     date_val = fields.get("date")
     if date_val:
         try:
             date_type.fromisoformat(str(date_val))
         except ValueError:
-            errors.append(f"{path}: invalid date '{date_val}' (expected YYYY-MM-DD)")
+            errors.append(("invalid-date", f"invalid date '{date_val}' (expected YYYY-MM-DD)"))
 
     return errors
 
 
-def validate_research(path: Path, fields: dict) -> list[str]:
+def validate_research(path: Path, fields: dict) -> list[tuple[str, str]]:
     """Validate a research document's front matter."""
     errors = []
     for req in ("question", "status", "started"):
         if not fields.get(req):
-            errors.append(f"{path}: missing required field '{req}'")
+            errors.append(("missing-field", f"missing required field '{req}'"))
 
     status = fields.get("status")
     if status and status not in RESEARCH_STATUSES:
-        errors.append(
-            f"{path}: invalid status '{status}' "
-            f"(expected one of: {', '.join(sorted(RESEARCH_STATUSES))})"
-        )
+        errors.append((
+            "invalid-status",
+            f"invalid status '{status}' "
+            f"(expected one of: {', '.join(sorted(RESEARCH_STATUSES))})",
+        ))
 
     started = fields.get("started")
     if started:
         try:
             date_type.fromisoformat(str(started))
         except ValueError:
-            errors.append(f"{path}: invalid started date '{started}' (expected YYYY-MM-DD)")
+            errors.append(
+                ("invalid-date", f"invalid started date '{started}' (expected YYYY-MM-DD)")
+            )
 
     return errors
 
 
-def validate_skill(path: Path, fields: dict) -> list[str]:
+def validate_skill(path: Path, fields: dict) -> list[tuple[str, str]]:
     """Validate a skill's front matter."""
     errors = []
     for req in ("name", "description", "author", "license"):
         if not fields.get(req):
-            errors.append(f"{path}: missing required field '{req}'")
+            errors.append(("missing-field", f"missing required field '{req}'"))
 
     name = fields.get("name")
     if name and not KEBAB_RE.match(str(name)):
-        errors.append(f"{path}: name '{name}' is not kebab-case")
+        errors.append(("invalid-name", f"name '{name}' is not kebab-case"))
 
     return errors
 
 
-def validate_agent(path: Path, fields: dict) -> list[str]:
+def validate_agent(path: Path, fields: dict) -> list[tuple[str, str]]:
     """Validate an agent's front matter."""
     errors = []
     for req in ("name", "description", "model", "color", "tools"):
         if not fields.get(req):
-            errors.append(f"{path}: missing required field '{req}'")
+            errors.append(("missing-field", f"missing required field '{req}'"))
 
     model = fields.get("model")
     if model and model not in AGENT_MODELS:
-        errors.append(
-            f"{path}: invalid model '{model}' "
-            f"(expected one of: {', '.join(sorted(AGENT_MODELS))})"
-        )
+        errors.append((
+            "invalid-model",
+            f"invalid model '{model}' "
+            f"(expected one of: {', '.join(sorted(AGENT_MODELS))})",
+        ))
 
     return errors
 
 
-def collect_and_validate() -> list[str]:
-    """Find all documents and validate their front matter."""
-    all_errors: list[str] = []
-    counts = {"adrs": 0, "research": 0, "skills": 0, "agents": 0}
-
-    # ADRs
-    if DECISIONS_DIR.is_dir():
-        for path in sorted(DECISIONS_DIR.glob("*.md")):
-            if not ADR_NUMBER_RE.match(path.name):
-                continue
-            text = path.read_text(encoding="utf-8")
-            fields = parse_front_matter(text)
-            if fields is None:
-                all_errors.append(f"{path}: no front matter found")
-                continue
-            counts["adrs"] += 1
-            all_errors.extend(validate_adr(path, fields))
-
-    # Research
-    if RESEARCH_DIR.is_dir():
-        for path in sorted(RESEARCH_DIR.glob("*.md")):
-            if path.name.startswith("_"):
-                continue
-            text = path.read_text(encoding="utf-8")
-            fields = parse_front_matter(text)
-            if fields is None:
-                all_errors.append(f"{path}: no front matter found")
-                continue
-            counts["research"] += 1
-            all_errors.extend(validate_research(path, fields))
-
-    # Skills and Agents
-    if PLUGINS_DIR.is_dir():
-        for skill_path in sorted(PLUGINS_DIR.glob("*/skills/*/SKILL.md")):
-            text = skill_path.read_text(encoding="utf-8")
-            fields = parse_front_matter(text)
-            if fields is None:
-                all_errors.append(f"{skill_path}: no front matter found")
-                continue
-            counts["skills"] += 1
-            all_errors.extend(validate_skill(skill_path, fields))
-
-        for agent_path in sorted(PLUGINS_DIR.glob("*/agents/*.md")):
-            text = agent_path.read_text(encoding="utf-8")
-            fields = parse_front_matter(text)
-            if fields is None:
-                all_errors.append(f"{agent_path}: no front matter found")
-                continue
-            counts["agents"] += 1
-            all_errors.extend(validate_agent(agent_path, fields))
-
-    print(
-        f"Validated {counts['adrs']} ADR(s), {counts['research']} research doc(s), "
-        f"{counts['skills']} skill(s), {counts['agents']} agent(s)"
+def classify(path: Path) -> str | None:
+    """The kind of document at path, or None if it isn't validated.
+
+    Matches the same files discover() finds.
+    """
+    if path.suffix != ".md":
+        return None
+    if path.parent == DECISIONS_DIR:
+        return "adrs" if ADR_NUMBER_RE.match(path.name) else None
+    if path.parent == RESEARCH_DIR:
+        return None if path.name.startswith("_") else "research"
+    if not path.is_relative_to(PLUGINS_DIR):
+        return None
+    parts = path.relative_to(PLUGINS_DIR).parts
+    if len(parts) == 4 and parts[1] == "skills" and parts[3] == "SKILL.md":
+        return "skills"
+    if len(parts) == 3 and parts[1] == "agents":
+        return "agents"
+    return None
+
+
+def discover(only: set[str] | None = None) -> list[tuple[str, Path]]:
+    """List (kind, path) for every document to validate, in reporting order.
+
+    With only, a set of changed paths, just those documents are listed and
+    the directories aren't walked at all.
+    """
+    if only is not None:
+        found = []
+        for name in only:
+            path = Path(name)
+            kind = classify(path)
+            if kind is not None and path.is_file():
+                found.append((kind, path))
+        order = list(VALIDATORS)
+        return sorted(found, key=lambda item: (order.index(item[0]), item[1]))
+
+    snapshot = get_snapshot()
+    found: list[tuple[str, Path]] = []
+
+    for path in snapshot.glob(DECISIONS_DIR, "*.md"):
+        if ADR_NUMBER_RE.match(path.name):
+            found.append(("adrs", path))
+
+    for path in snapshot.glob(RESEARCH_DIR, "*.md"):
+        if not path.name.startswith("_"):
+            found.append(("research", path))
+
+    found.extend(("skills", p) for p in snapshot.glob(PLUGINS_DIR, "*/skills/*/SKILL.md"))
+    found.extend(("agents", p) for p in snapshot.glob(PLUGINS_DIR, "*/agents/*.md"))
+    return found
+
+
+VALIDATORS = {
+    "adrs": validate_adr,
+    "research": validate_research,
+    "skills": validate_skill,
+    "agents": validate_agent,
+}
+
+
+def check_document(kind: str, path: Path, fields: dict | None) -> list[tuple[str, str]]:
+    """Validate one document's parsed front matter, as (finding code, message) pairs."""
+    if fields is None:
+        return [("no-front-matter", "no front matter found")]
+    return VALIDATORS[kind](path, fields)
+
+
+def check_batch(
+    batch: list[tuple[str, Path]],
+) -> list[tuple[str, bool, list[tuple[str, str]]]]:
+    """Read, parse and validate a batch of documents in a worker process.
+
+    Returns (kind, has front matter, errors) per document, in batch order.
+    """
+    results = []
+    for kind, path in batch:
+        fields = parse_file(path)
+        results.append((kind, fields is not None, check_document(kind, path, fields)))
+    return results
+
+
+def iter_errors(
+    jobs: int = 1, only: set[str] | None = None, counts: dict[str, int] | None = None
+) -> Iterator[tuple[Path, str, str]]:
+    """Validate every document (or those among only), yielding (path, code, message) as found.
+
+    Documents with front matter are tallied by kind in counts as they are read.
+    Errors come in the same order whatever the number of jobs.
+    """
+    counts = {} if counts is None else counts
+    with phase("discovery"):
+        documents = discover(only)
+
+    if jobs > 1 and len(documents) > 1:
+        # Several chunks per worker keeps them busy when file sizes vary
+        size = max(1, len(documents) // (jobs * 4))
+        batches = [documents[i : i + size] for i in range(0, len(documents), size)]
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            # map() yields in submission order, so output matches a serial run
+            results = pool.map(check_batch, batches)
+            for batch in batches:
+                with phase("validate"):
+                    checked = next(results)
+                for (kind, path), (_, parsed, errors) in zip(batch, checked):
+                    counts[kind] = counts.get(kind, 0) + parsed
+                    for code, message in errors:
+                        yield path, code, message
+        finally:
+            # Stopping early (--max-findings) drops the batches not yet started
+            pool.shutdown(cancel_futures=True)
+    else:
+        snapshot = get_snapshot()
+        for kind, path in documents:
+            fields = snapshot.document(path).front_matter
+            with phase("validate"):
+                errors = check_document(kind, path, fields)
+            counts[kind] = counts.get(kind, 0) + (fields is not None)
+            for code, message in errors:
+                yield path, code, message
+
+
+def summary(counts: dict[str, int]) -> str:
+    """The "Validated ..." line for document counts by kind."""
+    return (
+        f"Validated {counts.get('adrs', 0)} ADR(s), {counts.get('research', 0)} research doc(s), "
+        f"{counts.get('skills', 0)} skill(s), {counts.get('agents', 0)} agent(s)"
     )
+
+
+def collect_and_validate(jobs: int = 1, only: set[str] | None = None) -> list[str]:
+    """Find all documents (or those among only) and validate their front matter."""
+    counts: dict[str, int] = {}
+    all_errors = [f"{path}: {message}" for path, _, message in iter_errors(jobs, only, counts)]
+    print(summary(counts))
     return all_errors
 
 
-def main() -> None:
-    errors = collect_and_validate()
+@profiling.profiled("validate_frontmatter")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Validate YAML front matter.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=findings.non_negative,
+        default=1,
+        metavar="N",
+        help="Worker processes to use; 0 means one per CPU (default: 1)",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only validate documents changed since a git ref (e.g. origin/main)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and revalidate documents as they change (see watch.py)",
+    )
+    findings.add_arguments(parser)
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if args.watch:
+        # Imported here: watch imports this module
+        import watch
+
+        watch.main(["--only", "frontmatter"])
+        return
+    jobs = args.jobs or os.cpu_count() or 1
 
-    if errors:
-        print(f"\n{len(errors)} error(s) found:")
+    only = None
+    if args.changed_since:
+        try:
+            with phase("discovery"):
+                only = git_diff.changed_paths(args.changed_since)
+            if git_diff.rules_changed(only):
+                only = None
+        except ValueError as e:
+            print(f"error: {e}", file=findings.log(args))
+            sys.exit(1)
+
+    out = findings.log(args)
+    counts: dict[str, int] = {}
+    errors = []
+    found = 0
+    scan = iter_errors(jobs, only, counts)
+    for path, code, message in itertools.islice(scan, args.max_findings):
+        found += 1
+        if args.ndjson:
+            findings.emit("frontmatter", path, None, code, message)
+        else:
+            errors.append(f"{path}: {message}")
+    print(summary(counts), file=out)
+
+    if found:
+        print(f"\n{found} error(s) found{findings.stopped(args, found)}:", file=out)
         for e in errors:
             print(f"  ERROR: {e}")
         sys.exit(1)
     else:
-        print("All frontmatter checks passed.")
+        print("All frontmatter checks passed.", file=out)
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
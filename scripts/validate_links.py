@@ -2,25 +2,54 @@
 """Validate internal markdown links across the repository.
 
 Scans all .md files in docs/, plugins/, and the repository root.
-Extracts [text](relative/path) links, ignoring external URLs (http/https)
-and anchor-only fragments (#section). Resolves paths relative to the
-source file's directory and reports broken links.
+Extracts [text](relative/path) links, ignoring external URLs (http/https).
+Resolves paths relative to the source file's directory and reports broken
+links. A #section fragment must match a heading in the target markdown file
+(or in the source itself for #section alone), slugged the way GitHub does,
+or an explicit <a id="..."> or <a name="..."> anchor. ATX (# Title) and
+setext (Title over ====) headings both count.
+
+With --cache, extracted links and their results are kept on disk keyed by
+each file's content hash with its heading anchors, together with a reverse
+index from target path to linking files. A rerun re-extracts only changed
+files and re-resolves only links whose targets were added, removed, renamed
+or had their headings changed since the last run.
+
+With --changed-since REF, only files changed since a git ref are checked,
+plus files that mention a deleted, renamed or changed path by name. If
+scripts/ or the CI config changed, every file is checked.
+
+--profile and --timings-json PATH report time per phase and I/O counters
+(see profiling.py). --watch keeps the same state in memory and rechecks as
+files change.
+
+With --ndjson, each broken link is written to stdout as a JSON line as soon
+as it is found (code missing-target or missing-anchor; see findings.py), and
+--max-findings N stops after N broken links.
 
 Exit 0 if all links resolve, exit 1 if any are broken.
 """
 
+import argparse
+import itertools
 import os
-import re
 import sys
+from collections.abc import Callable, Iterator
 from pathlib import Path
+from urllib.parse import unquote
 
-# Match markdown links: [text](target)
-# Excludes image links ![alt](src) by using negative lookbehind
-LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(([^)]+)\)")
+import findings
+import git_diff
+import profiling
+from markdown_links import LINK_RE  # noqa: F401 (re-exported)
+from profiling import count, phase
+from repo_scan import get_snapshot, load_json_cache, save_json_cache
 
 SCAN_DIRS = [Path("docs"), Path("plugins")]
 EXCLUDE_DIRS = {Path("docs/ignore")}
 SCAN_ROOT_GLOBS = ["*.md"]
+DEFAULT_CACHE = Path(".cache/validate_links.json")
+CACHE_VERSION = 4
 
 
 def is_external(target: str) -> bool:
@@ -35,107 +64,337 @@ def is_anchor_only(target: str) -> bool:
 
 def collect_markdown_files() -> list[Path]:
     """Find all markdown files to scan."""
+    snapshot = get_snapshot()
     files: list[Path] = []
 
     # Root-level markdown files
     for pattern in SCAN_ROOT_GLOBS:
-        files.extend(Path(".").glob(pattern))
+        files.extend(snapshot.glob(Path("."), pattern))
 
     # Recursive scan of docs/ and plugins/, skipping excluded directories
     for scan_dir in SCAN_DIRS:
-        if scan_dir.is_dir():
-            for f in scan_dir.rglob("*.md"):
-                if not any(f.is_relative_to(exc) for exc in EXCLUDE_DIRS):
-                    files.append(f)
+        for f in snapshot.rglob(scan_dir, "*.md"):
+            if not any(f.is_relative_to(exc) for exc in EXCLUDE_DIRS):
+                files.append(f)
 
     return sorted(set(files))
 
 
+def in_scope(path: str) -> bool:
+    """Whether collect_markdown_files() would pick up the markdown file at path."""
+    p = Path(path)
+    if p.suffix != ".md" or not p.is_file():
+        return False
+    if len(p.parts) == 1:
+        return any(p.match(pattern) for pattern in SCAN_ROOT_GLOBS)
+    return any(p.is_relative_to(d) for d in SCAN_DIRS) and not any(
+        p.is_relative_to(exc) for exc in EXCLUDE_DIRS
+    )
+
+
+def files_changed_since(ref: str) -> list[Path]:
+    """Markdown files whose links may have changed status since a git ref.
+
+    These are the files changed since ref, plus files that mention the name
+    of a path that was deleted or renamed away (or of a directory that went
+    with it), or of a changed markdown file whose headings may have moved.
+    Mentions are found with git grep, so unrelated files are never read.
+    If the validation code or CI config changed, every file is returned.
+    """
+    changed = git_diff.changed_paths(ref)
+    if git_diff.rules_changed(changed):
+        return collect_markdown_files()
+    names: set[str] = set()
+    for path in changed:
+        if path.endswith(".md") and os.path.isfile(path):
+            names.add(os.path.basename(path))
+            continue
+        # Deleted: its name, and those of any parent directories deleted with it
+        while path and not os.path.exists(path):
+            names.add(os.path.basename(path))
+            path = os.path.dirname(path)
+    candidates = changed | git_diff.files_mentioning(names)
+    return sorted(Path(path) for path in candidates if in_scope(path))
+
+
 def case_sensitive_exists(source_dir: Path, target_str: str) -> bool:
     """Verify each path component matches actual filesystem case.
 
     On case-insensitive systems (Windows, macOS) Path.exists() returns True
     even when the case doesn't match.  This walks the target path component
     by component and checks each name against the real directory listing,
-    catching mismatches that would break on Linux CI.
+    catching mismatches that would break on Linux CI.  Listings come from the
+    repository snapshot, so each directory is listed once per run.
     """
-    current = source_dir.resolve()
-    for part in Path(target_str).parts:
-        if part == "..":
-            current = current.parent
-            continue
-        if part == ".":
-            continue
-        try:
-            actual_entries = os.listdir(current)
-        except OSError:
-            return False
-        if part not in actual_entries:
-            return False
-        current = current / part
-    return True
+    return get_snapshot().exists_exact(source_dir, target_str)
 
 
-def resolve_link(source: Path, target: str) -> bool:
-    """Check if a relative link target resolves to an existing file or directory."""
-    # Strip anchor fragment
-    path_part = target.split("#")[0]
-    if not path_part:
-        return True  # Pure anchor link
+def anchors_of(path: Path) -> frozenset[str]:
+    """Heading anchors of a markdown file, from the repository snapshot."""
+    return get_snapshot().document(path).anchors
 
-    resolved = (source.parent / path_part).resolve()
-    if not resolved.exists():
-        return False
 
-    # Case-sensitive check — catches mismatches invisible on Windows/macOS
-    return case_sensitive_exists(source.parent, path_part)
+def resolve_link(
+    source: Path, target: str, anchors: Callable[[Path], frozenset[str]] = anchors_of
+) -> bool:
+    """Check if a relative link target resolves to an existing file or directory.
+
+    A #fragment must name a heading or an explicit <a id>/<a name> anchor
+    in the target markdown file, or in the source itself for a pure anchor
+    link. Fragments into files that aren't markdown are not checked.
+    """
+    path_part, _, fragment = target.partition("#")
+    if path_part:
+        # Case-sensitive check — catches mismatches invisible on Windows/macOS
+        if not case_sensitive_exists(source.parent, path_part):
+            return False
+        target_path = source.parent / path_part
+    else:
+        target_path = source
+
+    if not fragment or target_path.suffix != ".md" or target_path.is_dir():
+        return True
+    return unquote(fragment).lower() in anchors(target_path)
 
 
-def main() -> None:
-    files = collect_markdown_files()
-    print(f"Scanning {len(files)} markdown file(s) for broken links...")
+def link_key(source: Path, path_part: str) -> str:
+    """Normalized path of a link target, used as the reverse-index key."""
+    return os.path.normpath(os.path.join(source.parent, path_part))
 
-    broken: list[tuple[Path, int, str, str]] = []
-    total_links = 0
-    in_code_block: bool = False
 
-    for path in files:
-        text = path.read_text(encoding="utf-8")
-        in_code_block = False
+def scan_tree() -> tuple[set[str], set[str]]:
+    """Return (paths, directories) fully listed under the scanned roots.
+
+    Only paths inside these directories are tracked between runs; any link
+    whose target lies elsewhere is re-resolved on every run.
+    """
+    snapshot = get_snapshot()
+    paths = set(snapshot.listdir(".") or ())
+    dirs = {"."}
+    for scan_dir in SCAN_DIRS:
+        for directory, entries in snapshot.walk(scan_dir):
+            base = os.path.normpath(directory)
+            dirs.add(base)
+            paths.update(os.path.join(base, name) for name in entries)
+    return paths, dirs
 
-        for line_num, line in enumerate(text.splitlines(), 1):
-            # Track fenced code blocks
-            if line.strip().startswith("```"):
-                in_code_block = not in_code_block
-                continue
 
-            if in_code_block:
-                continue
+def load_cache(path: Path) -> dict:
+    """Load a link cache, returning an empty one if missing, corrupt or outdated."""
+    return load_json_cache(path, CACHE_VERSION)
 
-            # Strip inline code spans before matching links
-            stripped = re.sub(r"`[^`]+`", "", line)
 
-            for match in LINK_RE.finditer(stripped):
-                link_text, target = match.group(1), match.group(2)
+def save_cache(path: Path, cache: dict) -> None:
+    """Write the link cache atomically."""
+    save_json_cache(path, cache)
 
-                if is_external(target) or is_anchor_only(target):
-                    continue
 
-                total_links += 1
+class LinkScan:
+    """Broken links in files as (path, line, text, target), yielded as they are found.
 
-                if not resolve_link(path, target):
-                    broken.append((path, line_num, link_text, target))
+    Cached results in cache are reused where still valid. total counts the
+    links checked so far; once iteration has finished, complete is True and
+    (with record) cache holds the updated cache. Without record no cache is
+    built, so memory use doesn't grow with the number of links.
+    """
 
-    print(f"Checked {total_links} internal link(s)")
+    def __init__(self, files: list[Path], cache: dict | None = None, record: bool = True):
+        self.files = files
+        self.old_cache = cache
+        self.record = record
+        self.total = 0
+        self.cache: dict | None = None
+        self.complete = False
 
-    if broken:
-        print(f"\n{len(broken)} broken link(s) found:")
+    def __iter__(self) -> Iterator[tuple[Path, int, str, str]]:
+        try:
+            yield from self.scan()
+        finally:
+            count("links_checked", self.total)
+
+    def scan(self) -> Iterator[tuple[Path, int, str, str]]:
+        snapshot = get_snapshot()
+        cache = self.old_cache or {}
+        old_files: dict = cache.get("files", {})
+        old_reverse: dict = cache.get("reverse", {})
+        paths, dirs = scan_tree()
+
+        # Hash every file and take heading anchors from the cache where unchanged
+        digests: dict[str, str] = {}
+        anchors: dict[str, frozenset[str]] = {}
+        for path in self.files:
+            source = str(path)
+            digest = digests[source] = snapshot.document(path).digest
+            entry = old_files.get(source)
+            if entry is not None and entry["hash"] == digest:
+                anchors[os.path.normpath(source)] = frozenset(entry["anchors"])
+            else:
+                anchors[os.path.normpath(source)] = snapshot.document(path).anchors
+
+        # Sources whose links point at a path that appeared or disappeared,
+        # or at a file whose headings changed
+        affected: set[str] = set()
+        if cache:
+            for changed in paths.symmetric_difference(cache.get("tree", ())):
+                affected.update(old_reverse.get(changed, ()))
+            for source, entry in old_files.items():
+                key = os.path.normpath(source)
+                if key in anchors and anchors[key] != frozenset(entry["anchors"]):
+                    affected.update(old_reverse.get(key, ()))
+
+        def tracked(key: str) -> bool:
+            return (os.path.dirname(key) or ".") in dirs
+
+        def anchors_for(path: Path) -> frozenset[str]:
+            found = anchors.get(os.path.normpath(path))
+            return anchors_of(path) if found is None else found
+
+        new_files: dict[str, dict] = {}
+        reverse: dict[str, list[str]] = {}
+
+        for path in self.files:
+            source = str(path)
+            digest = digests[source]
+            entry = old_files.get(source)
+
+            if entry is not None and entry["hash"] == digest:
+                count("cache_hits")
+                links = entry["links"]
+                recheck = source in affected
+                with phase("resolve"):
+                    for link in links:
+                        if recheck or not tracked(link[3]):
+                            link[4] = resolve_link(path, link[2], anchors_for)
+            else:
+                links = []
+                extracted = snapshot.document(path).links
+                with phase("resolve"):
+                    for line_num, link_text, target in extracted:
+                        if is_external(target):
+                            continue
+                        path_part = target.split("#")[0]
+                        # A pure anchor link depends on the source's own headings
+                        if path_part:
+                            key = link_key(path, path_part)
+                        else:
+                            key = os.path.normpath(source)
+                        ok = resolve_link(path, target, anchors_for)
+                        links.append([line_num, link_text, target, key, ok])
+
+            if self.record:
+                new_files[source] = {
+                    "hash": digest,
+                    "anchors": sorted(anchors[os.path.normpath(source)]),
+                    "links": links,
+                }
+            self.total += len(links)
+            for line_num, link_text, target, key, ok in links:
+                if self.record:
+                    reverse.setdefault(key, []).append(source)
+                if not ok:
+                    yield path, line_num, link_text, target
+
+        if self.record:
+            self.cache = {
+                "version": CACHE_VERSION,
+                "tree": sorted(paths),
+                "files": new_files,
+                "reverse": {key: sorted(set(sources)) for key, sources in reverse.items()},
+            }
+        self.complete = True
+
+
+def check_links(
+    files: list[Path], cache: dict | None = None
+) -> tuple[int, list[tuple[Path, int, str, str]], dict]:
+    """Check internal links in files, reusing cached results where still valid.
+
+    Returns (total links, broken links, updated cache).
+    """
+    scan = LinkScan(files, cache)
+    broken = list(scan)
+    return scan.total, broken, scan.cache
+
+
+def broken_code(source: Path, target: str) -> str:
+    """Finding code for a broken link: missing-target, or missing-anchor if only the # fails."""
+    path_part = target.partition("#")[0]
+    if path_part and not case_sensitive_exists(source.parent, path_part):
+        return "missing-target"
+    return "missing-anchor"
+
+
+@profiling.profiled("validate_links")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Validate internal markdown links.")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only check files changed since a git ref and files linking to changed paths",
+    )
+    scope.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE,
+        metavar="PATH",
+        help=f"Reuse and update an incremental link cache (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and recheck links as files change (see watch.py)",
+    )
+    findings.add_arguments(parser)
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if args.watch:
+        # Imported here: watch imports this module
+        import watch
+
+        watch.main(["--only", "links"])
+        return
+
+    out = findings.log(args)
+    with phase("discovery"):
+        if args.changed_since:
+            try:
+                files = files_changed_since(args.changed_since)
+            except ValueError as e:
+                print(f"error: {e}", file=out)
+                sys.exit(1)
+        else:
+            files = collect_markdown_files()
+    print(f"Scanning {len(files)} markdown file(s) for broken links...", file=out)
+
+    cache = load_cache(args.cache) if args.cache else None
+    scan = LinkScan(files, cache, record=bool(args.cache))
+    broken = []
+    found = 0
+    for path, line_num, text, target in itertools.islice(scan, args.max_findings):
+        found += 1
+        if args.ndjson:
+            message = f"[{text}]({target})"
+            findings.emit("links", path, line_num, broken_code(path, target), message)
+        else:
+            broken.append((path, line_num, text, target))
+    # A scan cut short by --max-findings leaves the cache as it was
+    if args.cache and scan.complete:
+        save_cache(args.cache, scan.cache)
+
+    print(f"Checked {scan.total} internal link(s)", file=out)
+
+    if found:
+        print(f"\n{found} broken link(s) found{findings.stopped(args, found)}:", file=out)
         for path, line_num, text, target in broken:
             print(f"  {path}:{line_num}: [{text}]({target})")
         sys.exit(1)
     else:
-        print("All internal links are valid.")
+        print("All internal links are valid.", file=out)
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -7,21 +7,70 @@ Checks:
 - Each plugin has .claude-plugin/plugin.json with required fields
 - Plugin name in plugin.json matches directory name
 - Versions are valid semver (X.Y.Z)
+- No two plugins share a name or a source
+- The precompiled catalog (.claude-plugin/catalog.json) is up to date
+
+marketplace.json is read as a stream: plugin entries are validated as they
+are parsed, so memory stays bounded by the largest single entry. With
+--jobs N, entries are validated on N threads (results keep marketplace
+order). With --cache, each plugin's result is kept on disk keyed by its
+name, the content hash of its marketplace entry and plugin.json's mtime,
+size and content hash, so only plugins that changed are re-checked. The
+same cache holds the file hashes and records the catalog check needs, so
+unchanged plugin files are not read for it.
+
+With --changed-since REF, marketplace.json's top-level fields are still
+checked but only plugins changed since a git ref are validated: those with
+changes under their directory or a changed marketplace entry. The catalog
+is still rebuilt from every plugin, since a stale record can belong to an
+untouched plugin. If scripts/ or the CI config changed, every plugin is
+validated.
+
+With --watch, keeps running and revalidates manifests as they change.
+--profile and --timings-json PATH report time per phase and I/O counters
+(see profiling.py).
 
 Exit 0 if all checks pass, exit 1 if any fail.
 """
 
+import argparse
+import codecs
+import hashlib
 import json
+import os
 import re
+import stat
 import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO, TypeVar
+
+import git_diff
+import profiling
+from profiling import count, phase
+from repo_scan import load_json_cache, save_json_cache
 
 MARKETPLACE_PATH = Path(".claude-plugin/marketplace.json")
 PLUGINS_DIR = Path("plugins")
 SEMVER_RE = re.compile(r"^\d+\.\d+\.\d+$")
+# Plugin names as Claude Code accepts them: kebab-case
+PLUGIN_NAME_RE = re.compile(r"^[a-z0-9]+(-[a-z0-9]+)*$")
 
 MARKETPLACE_REQUIRED = {"name", "owner", "metadata", "plugins"}
 PLUGIN_REQUIRED = {"name", "version", "description", "author", "license"}
+DEFAULT_CACHE = Path(".cache/validate_manifests.json")
+CACHE_VERSION = 2
+CHUNK_SIZE = 64 * 1024
+# Key iter_marketplace() yields each element of the plugins array under
+PLUGIN_ENTRY = "plugins[]"
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+# Most characters a decode error can sit before the end of cut-off text: "\uXXXX" escape
+TOKEN_TAIL = 6
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def error(msg: str) -> None:
@@ -46,8 +95,11 @@ def validate_marketplace(data: dict) -> list[str]:
     return errors
 
 
-def validate_plugin_entry(entry: dict, index: int) -> list[str]:
-    """Validate a single plugin entry in marketplace.json."""
+def validate_plugin_entry(entry: dict, index: int, raw: bytes | None = None) -> list[str]:
+    """Validate a single plugin entry in marketplace.json.
+
+    raw is plugin.json's content if the caller has already read it.
+    """
     errors = []
     name = entry.get("name")
     source = entry.get("source")
@@ -57,6 +109,13 @@ def validate_plugin_entry(entry: dict, index: int) -> list[str]:
     if not source:
         errors.append(f"plugins[{index}]: missing 'source'")
         return errors
+    # Kebab-case also keeps the source a single directory inside plugins/
+    if not isinstance(source, str) or not PLUGIN_NAME_RE.match(source):
+        errors.append(
+            f"plugins[{index}] ({name}): source {source!r} must be a kebab-case "
+            f"directory name in {PLUGINS_DIR}/"
+        )
+        return errors
 
     plugin_dir = PLUGINS_DIR / source
     if not plugin_dir.is_dir():
@@ -69,7 +128,13 @@ def validate_plugin_entry(entry: dict, index: int) -> list[str]:
         return errors
 
     try:
-        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if raw is None:
+            with phase("read"):
+                raw = manifest_path.read_bytes()
+            count("files")
+            count("bytes_read", len(raw))
+        with phase("parse"):
+            manifest = json.loads(raw)
     except json.JSONDecodeError as e:
         errors.append(f"plugins[{index}] ({name}): invalid JSON in {manifest_path}: {e}")
         return errors
@@ -99,27 +164,431 @@ def validate_plugin_entry(entry: dict, index: int) -> list[str]:
     return errors
 
 
-def main() -> None:
-    all_errors: list[str] = []
+def load_marketplace() -> dict:
+    """Read marketplace.json. Raises ValueError if it is missing or not valid JSON."""
+    if not MARKETPLACE_PATH.is_file():
+        raise ValueError(f"{MARKETPLACE_PATH} not found")
+    with phase("read"):
+        raw = MARKETPLACE_PATH.read_bytes()
+    count("files")
+    count("bytes_read", len(raw))
+    try:
+        with phase("parse"):
+            return json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{MARKETPLACE_PATH} is not valid JSON: {e}") from None
+
+
+def truncated(e: json.JSONDecodeError, length: int) -> bool:
+    """Whether a decode error may only mean the text ends too early.
+
+    A string runs to the end of the text when unterminated; otherwise the
+    decoder stops within the last, cut-off token.
+    """
+    return e.msg.startswith("Unterminated string") or e.pos >= length - TOKEN_TAIL
+
+
+class JsonStream:
+    """Incremental reader for the values of a JSON document, one at a time.
+
+    Text is decoded from a binary file in chunks, and the consumed part of
+    the buffer is dropped as values are read, so only the value being
+    parsed (and at most a chunk around it) is held in memory.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f: BinaryIO, name: str, chunk_size: int = CHUNK_SIZE) -> None:
+        self.f = f
+        self.name = name
+        self.chunk_size = chunk_size
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0  # characters dropped from the front of buf
+        self.eof = False
+
+    def fill(self, size: int = 0) -> bool:
+        """Append at least size (default: one chunk) more bytes. False at end of file."""
+        if self.eof:
+            return False
+        with phase("read"):
+            data = self.f.read(max(size, self.chunk_size))
+        count("bytes_read", len(data))
+        if not data:
+            self.eof = True
+            self.buf += self.text.decode(b"", final=True)
+            return False
+        if self.pos >= self.chunk_size:
+            self.offset += self.pos
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+        self.buf += self.text.decode(data)
+        return True
+
+    def fail(self, message: str) -> None:
+        raise ValueError(
+            f"{self.name} is not valid JSON: {message} (char {self.offset + self.pos})"
+        )
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at end of file."""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        c = self.peek()
+        if not c or c not in chars:
+            self.fail(f"expected {' or '.join(repr(x) for x in chars)}")
+        self.pos += 1
+        return c
+
+    def value(self) -> object:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                with phase("parse"):
+                    value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Cut off at the end of the buffer: read more and retry, doubling
+                # the read so a long value isn't rescanned per chunk. An error
+                # anywhere else is in the document itself.
+                if truncated(e, len(self.buf)) and self.fill(len(self.buf) - self.pos):
+                    continue
+                self.pos = e.pos
+                self.fail(e.msg)
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_marketplace(
+    path: Path = MARKETPLACE_PATH, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, object]]:
+    """Stream marketplace.json as (key, value) pairs for its top-level fields.
+
+    A plugins array is yielded as ("plugins", []) followed by one
+    (PLUGIN_ENTRY, entry) per element, each parsed when it is reached.
+    Raises ValueError if the file is not a valid JSON object.
+    """
+    with open(path, "rb") as f:
+        count("files")
+        stream = JsonStream(f, str(path), chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            stream.pos += 1
+        else:
+            while True:
+                if stream.peek() != '"':
+                    stream.fail("expected a property name")
+                key = stream.value()
+                stream.expect(":")
+                if key == "plugins" and stream.peek() == "[":
+                    stream.pos += 1
+                    yield key, []
+                    if stream.peek() == "]":
+                        stream.pos += 1
+                    else:
+                        while True:
+                            yield PLUGIN_ENTRY, stream.value()
+                            if stream.expect(",]") == "]":
+                                break
+                else:
+                    yield key, stream.value()
+                if stream.expect(",}") == "}":
+                    break
+        if stream.peek():
+            stream.fail("extra data after the top-level object")
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], jobs: int = 1) -> Iterator[R]:
+    """fn(item) for each item in order, run on jobs threads.
+
+    At most a few results per thread are pending at any time, so items can
+    come from a stream without being read ahead all at once.
+    """
+    if jobs <= 1:
+        yield from map(fn, items)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def cached_plugin_entry(
+    entry: dict, index: int, old: dict[str, dict], new: dict[str, dict]
+) -> list[str]:
+    """validate_plugin_entry() through a persisted result cache.
+
+    old and new map a plugin name to {"entry", "mtime", "size", "hash",
+    "errors"}, where entry is the content hash of the marketplace entry. A
+    result is reused while the entry is unchanged and plugin.json has the
+    same mtime and size, without opening the file, or failing that the same
+    content hash. Errors are stored without their plugins[N] prefix, so an
+    entry that only moved in the list keeps its result. Plugins without a
+    name or whose plugin.json is missing are always re-checked.
+    """
+    name = entry.get("name")
+    source = entry.get("source")
+    if not isinstance(name, str) or not name or not isinstance(source, str) or not source:
+        return validate_plugin_entry(entry, index)
+    manifest_path = PLUGINS_DIR / source / ".claude-plugin" / "plugin.json"
+    try:
+        st = os.stat(manifest_path)
+    except OSError:
+        return validate_plugin_entry(entry, index)
+    count("stat")
+    if not stat.S_ISREG(st.st_mode):
+        return validate_plugin_entry(entry, index)
+
+    prefix = f"plugins[{index}]"
+    key = hashlib.sha256(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+    cached = old.get(name)
+    if cached is not None and cached["entry"] != key:
+        cached = None
+    if cached is not None and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+        count("cache_hits")
+        new[name] = cached
+        return [prefix + error for error in cached["errors"]]
+
+    with phase("read"):
+        raw = manifest_path.read_bytes()
+    count("files")
+    count("bytes_read", len(raw))
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached["hash"] == digest:
+        count("cache_hits")
+        errors = [prefix + error for error in cached["errors"]]
+    else:
+        errors = validate_plugin_entry(entry, index, raw)
+    new[name] = {
+        "entry": key,
+        "mtime": st.st_mtime_ns,
+        "size": st.st_size,
+        "hash": digest,
+        "errors": [error.removeprefix(prefix) for error in errors],
+    }
+    return errors
+
+
+def duplicate_errors(
+    entry: dict, index: int, names: dict[str, int], sources: dict[str, int]
+) -> list[str]:
+    """Errors for a name or source already used by an earlier entry.
+
+    names and sources map each value seen so far to its first index and are
+    updated with this entry's.
+    """
+    errors = []
+    name = entry.get("name")
+    if isinstance(name, str) and name:
+        first = names.setdefault(name, index)
+        if first != index:
+            errors.append(
+                f"plugins[{index}] ({name}): duplicate name, also used by plugins[{first}]"
+            )
+    source = entry.get("source")
+    if source:
+        key = source if isinstance(source, str) else json.dumps(source, sort_keys=True)
+        first = sources.setdefault(key, index)
+        if first != index:
+            errors.append(
+                f"plugins[{index}] ({name}): duplicate source {source!r}, "
+                f"also used by plugins[{first}]"
+            )
+    return errors
+
+
+def validate_streaming(
+    path: Path = MARKETPLACE_PATH,
+    jobs: int = 1,
+    cache: dict | None = None,
+    affected: Callable[[dict], bool] | None = None,
+) -> tuple[list[str], int, int]:
+    """Validate marketplace.json and its plugins while streaming through it.
+
+    Only entries for which affected(entry) is true are validated (all if
+    None); duplicate names and sources are checked across every entry. With
+    a result cache, cache["plugins"] is replaced by this run's results.
+    Returns (errors, plugins found, plugins validated). Raises ValueError if
+    marketplace.json is not valid JSON.
+    """
+    fields: dict = {}
+    names: dict[str, int] = {}
+    sources: dict[str, int] = {}
+    # Errors found while streaming, reported with the entry's own
+    extra: dict[int, list[str]] = {}
+    old = cache.get("plugins", {}) if cache is not None else {}
+    new: dict[str, dict] = {}
+    found = 0
+
+    def selected() -> Iterator[tuple[int, dict]]:
+        nonlocal found
+        for key, value in iter_marketplace(path):
+            if key != PLUGIN_ENTRY:
+                fields[key] = value
+                continue
+            index = found
+            found += 1
+            if not isinstance(value, dict):
+                extra[index] = [f"plugins[{index}]: entry must be an object"]
+                continue
+            errors = duplicate_errors(value, index, names, sources)
+            if errors:
+                extra[index] = errors
+            if affected is None or affected(value):
+                yield index, value
+
+    def check(item: tuple[int, dict]) -> tuple[int, list[str]]:
+        index, entry = item
+        with phase("validate"):
+            if cache is None:
+                return index, validate_plugin_entry(entry, index)
+            return index, cached_plugin_entry(entry, index, old, new)
+
+    entry_errors: list[str] = []
+    validated = 0
+    for index, errors in ordered_map(check, selected(), jobs):
+        validated += 1
+        entry_errors.extend(errors)
+        entry_errors.extend(extra.pop(index, ()))
+    # Entries that were not validated can still be extra
+    for index in sorted(extra):
+        entry_errors.extend(extra[index])
+
+    if cache is not None:
+        cache["plugins"] = new
+    with phase("validate"):
+        marketplace_errors = validate_marketplace(fields)
+    return marketplace_errors + entry_errors, found, validated
+
+
+def plugin_filter(ref: str, changed: set[str] | None = None) -> Callable[[dict], bool]:
+    """Predicate for the marketplace entries affected by changes since a git ref.
+
+    changed is git_diff.changed_paths(ref), if the caller already has it.
+    Every entry is affected if the validation code or CI config changed.
+    """
+    if changed is None:
+        changed = git_diff.changed_paths(ref)
+    if git_diff.rules_changed(changed):
+        return lambda entry: True
+    old_entries: set[str] | None = None
+    if os.path.normpath(MARKETPLACE_PATH) in changed:
+        old = git_diff.file_at(ref, MARKETPLACE_PATH.as_posix())
+        try:
+            old_plugins = json.loads(old).get("plugins", []) if old else []
+        except (ValueError, AttributeError):
+            old_plugins = []
+        old_entries = {json.dumps(e, sort_keys=True) for e in old_plugins}
+
+    # First path component under plugins/ of every changed file
+    touched = {
+        Path(path).relative_to(PLUGINS_DIR).parts[0]
+        for path in changed
+        if Path(path).is_relative_to(PLUGINS_DIR) and Path(path) != PLUGINS_DIR
+    }
+
+    def affected(entry: dict) -> bool:
+        source = entry.get("source")
+        return (isinstance(source, str) and source in touched) or (
+            old_entries is not None and json.dumps(entry, sort_keys=True) not in old_entries
+        )
+
+    return affected
+
+
+@profiling.profiled("validate_manifests")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Validate marketplace and plugin manifests.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Threads to validate plugins on; 0 means one per CPU (default: 1)",
+    )
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE,
+        metavar="PATH",
+        help=f"Reuse and update per-plugin results (default: {DEFAULT_CACHE})",
+    )
+    scope.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only validate plugins changed since a git ref (e.g. origin/main)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and revalidate the manifests that change (see watch.py)",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args([] if argv is None else argv)
+    profiling.configure(args)
+
+    if args.watch:
+        # Imported here: watch imports this module
+        import watch
+
+        watch.main(["--only", "manifests"])
+        return
+
+    jobs = args.jobs or os.cpu_count() or 1
 
     if not MARKETPLACE_PATH.is_file():
         print(f"error: {MARKETPLACE_PATH} not found")
         sys.exit(1)
 
-    try:
-        data = json.loads(MARKETPLACE_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as e:
-        print(f"error: {MARKETPLACE_PATH} is not valid JSON: {e}")
-        sys.exit(1)
+    # Imported here: plugin_catalog imports this module
+    import plugin_catalog
+
+    affected = None
+    if args.changed_since:
+        try:
+            with phase("discovery"):
+                affected = plugin_filter(args.changed_since)
+        except ValueError as e:
+            print(f"error: {e}")
+            sys.exit(1)
 
     print(f"Validating {MARKETPLACE_PATH}...")
-    all_errors.extend(validate_marketplace(data))
+    cache = load_json_cache(args.cache, CACHE_VERSION) if args.cache else None
+    try:
+        all_errors, found, validated = validate_streaming(MARKETPLACE_PATH, jobs, cache, affected)
+    except ValueError as e:
+        print(f"error: {e}")
+        sys.exit(1)
 
-    plugins = data.get("plugins", [])
-    print(f"Found {len(plugins)} plugin(s) in marketplace")
+    # The catalog's file hashes and records are kept in the same cache.
+    # Without one, every plugin is walked: records in the committed catalog
+    # are what is being checked, so they can't be reused.
+    all_errors.extend(plugin_catalog.check_catalog(cache=cache))
+    if cache is not None:
+        cache["version"] = CACHE_VERSION
+        save_json_cache(args.cache, cache)
 
-    for i, entry in enumerate(plugins):
-        all_errors.extend(validate_plugin_entry(entry, i))
+    print(f"Found {found} plugin(s) in marketplace")
+    if args.changed_since:
+        print(f"Validating {validated} plugin(s) changed since {args.changed_since}")
 
     if all_errors:
         print(f"\n{len(all_errors)} error(s) found:")
@@ -131,4 +600,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Watch the repository and revalidate only what changed.
+
+Runs the front matter, link and manifest validators and the two index
+scripts once, then polls docs/, plugins/, .claude-plugin/ and the root
+markdown files for changes. The repository snapshot and each check's
+results stay in memory between rounds, so a round only:
+- re-parses the front matter of documents that changed
+- re-extracts links from changed files and re-resolves links whose targets
+  were added, removed or had their headings changed (the same incremental
+  path as validate_links.py --cache, without the disk cache)
+- revalidates the plugin manifests that changed, through the same result
+  cache as validate_manifests.py --cache (held in memory), rechecks
+  duplicate names and sources across all of them, and checks the plugin
+  catalog is current
+- checks an _INDEX.md is current when a document in its directory changed
+
+Nothing is written: an out-of-date index or catalog is reported as a
+problem, as the index scripts and plugin_catalog.py do with --check.
+
+Polling uses the standard library only (one stat per file per interval).
+
+Usage:
+    python scripts/watch.py                        # all checks
+    python scripts/watch.py --only links --only frontmatter
+    python scripts/validate_links.py --watch       # same as --only links
+
+Stop with Ctrl-C.
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import index_decisions
+import index_research
+import plugin_catalog
+import validate_frontmatter
+import validate_links
+import validate_manifests
+from repo_scan import file_is_current, get_snapshot
+
+WATCH_DIRS = ["docs", "plugins", ".claude-plugin"]
+WATCH_ROOT_GLOBS = ["*.md"]
+DEFAULT_INTERVAL = 0.5
+
+
+class Watcher:
+    """Polls the watched trees and reports the paths changed since the last poll.
+
+    Files are compared by mtime and size; directories are reported when they
+    appear or disappear. Paths are normalized and relative to the project root.
+    """
+
+    def __init__(self, dirs: list[str] = WATCH_DIRS, root_globs: list[str] = WATCH_ROOT_GLOBS):
+        self.dirs = dirs
+        self.root_globs = root_globs
+        self.state = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int] | None]:
+        """{path: (mtime_ns, size)} for every watched file, {path: None} for directories."""
+        found: dict[str, tuple[int, int] | None] = {}
+        with os.scandir(".") as it:
+            for entry in it:
+                name = entry.name
+                if entry.is_file() and any(fnmatch.fnmatchcase(name, g) for g in self.root_globs):
+                    st = entry.stat()
+                    found[entry.name] = (st.st_mtime_ns, st.st_size)
+
+        pending = [os.path.normpath(d) for d in self.dirs]
+        while pending:
+            base = pending.pop()
+            try:
+                it = os.scandir(base)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    path = os.path.join(base, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        found[path] = None
+                        pending.append(path)
+                    else:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            # Removed between listing and stat
+                            continue
+                        found[path] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def poll(self) -> set[str]:
+        """Paths added, removed or modified since the previous poll."""
+        old, new = self.state, self.scan()
+        self.state = new
+        changed = old.keys() ^ new.keys()
+        changed.update(path for path in old.keys() & new.keys() if old[path] != new[path])
+        return changed
+
+
+def under(path: str, directory: Path) -> bool:
+    """Whether a normalized relative path lies inside directory."""
+    return path.startswith(os.path.normpath(directory) + os.sep)
+
+
+class FrontMatterCheck:
+    """validate_frontmatter.py, keeping each document's errors between rounds."""
+
+    name = "frontmatter"
+
+    def __init__(self) -> None:
+        # Normalized path -> ((kind rank, path), errors), kept in discover() order
+        self.results: dict[str, tuple[tuple[int, Path], list[str]]] = {}
+
+    def wants(self, path: str) -> bool:
+        return path.endswith(".md") and any(
+            under(path, d)
+            for d in (
+                validate_frontmatter.DECISIONS_DIR,
+                validate_frontmatter.RESEARCH_DIR,
+                validate_frontmatter.PLUGINS_DIR,
+            )
+        )
+
+    def run(self, changed: set[str] | None) -> list[str]:
+        if changed is None:
+            self.results = {}
+            documents = validate_frontmatter.discover()
+        else:
+            # Changed paths that are no longer documents drop out; the rest are rechecked
+            for path in changed:
+                self.results.pop(path, None)
+            documents = validate_frontmatter.discover(changed)
+        snapshot = get_snapshot()
+        order = list(validate_frontmatter.VALIDATORS)
+        for kind, path in documents:
+            fields = snapshot.document(path).front_matter
+            checked = validate_frontmatter.check_document(kind, path, fields)
+            errors = [f"{path}: {message}" for _, message in checked]
+            self.results[os.path.normpath(path)] = ((order.index(kind), path), errors)
+        ranked = sorted(self.results.values(), key=lambda result: result[0])
+        return [e for _, errors in ranked for e in errors]
+
+
+class LinkCheck:
+    """validate_links.py, with its incremental cache held in memory."""
+
+    name = "links"
+
+    def __init__(self) -> None:
+        self.cache: dict = {}
+
+    def wants(self, path: str) -> bool:
+        # Any file or directory can be a link target
+        return True
+
+    def run(self, changed: set[str] | None) -> list[str]:
+        files = validate_links.collect_markdown_files()
+        _, broken, self.cache = validate_links.check_links(files, self.cache)
+        return [f"{path}:{line}: [{text}]({target})" for path, line, text, target in broken]
+
+
+class ManifestCheck:
+    """validate_manifests.py, with its result cache held in memory."""
+
+    name = "manifests"
+
+    def __init__(self) -> None:
+        self.cache: dict = {}
+
+    def wants(self, path: str) -> bool:
+        return under(path, Path(".claude-plugin")) or under(path, validate_manifests.PLUGINS_DIR)
+
+    def run(self, changed: set[str] | None) -> list[str]:
+        # Plugins whose plugin.json is unchanged are cache hits: one stat each
+        try:
+            errors, _, _ = validate_manifests.validate_streaming(cache=self.cache)
+        except ValueError as e:
+            return [str(e)]
+        # Unchanged plugin files are cache hits too, and their records are reused
+        return errors + plugin_catalog.check_catalog(cache=self.cache)
+
+
+class IndexCheck:
+    """Check an index script's _INDEX.md when a document next to it changes, like --check."""
+
+    def __init__(self, name: str, module, collect) -> None:
+        self.name = name
+        self.module = module
+        self.collect = collect
+
+    def wants(self, path: str) -> bool:
+        index = os.path.normpath(self.module.INDEX_FILE)
+        return path.endswith(".md") and os.path.dirname(path) == os.path.dirname(index)
+
+    def run(self, changed: set[str] | None) -> list[str]:
+        index = self.module.INDEX_FILE
+        if file_is_current(index, self.module.build_index(self.collect())):
+            return []
+        return [f"{index} is out of date; run python scripts/{self.module.__name__}.py"]
+
+
+CHECKS = {
+    "frontmatter": FrontMatterCheck,
+    "links": LinkCheck,
+    "manifests": ManifestCheck,
+    "decisions": lambda: IndexCheck(
+        "decisions",
+        index_decisions,
+        lambda: index_decisions.collect_adrs(index_decisions.DECISIONS_DIR),
+    ),
+    "research": lambda: IndexCheck(
+        "research",
+        index_research,
+        lambda: index_research.collect_research(
+            index_research.RESEARCH_DIR, date.today(), write=False
+        ),
+    ),
+}
+
+
+class Session:
+    """The checks being watched and their latest problems."""
+
+    def __init__(self, names: list[str]) -> None:
+        self.checks = [CHECKS[name]() for name in names]
+        self.problems: dict[str, list[str]] = {}
+
+    def refresh(self, changed: set[str] | None = None) -> list[str]:
+        """Run the checks affected by changed paths (all checks if None).
+
+        Returns the names of the checks that ran.
+        """
+        snapshot = get_snapshot()
+        for path in changed or ():
+            snapshot.forget(Path(path))
+        ran = []
+        for check in self.checks:
+            if changed is None or any(check.wants(path) for path in changed):
+                self.problems[check.name] = check.run(changed)
+                ran.append(check.name)
+        return ran
+
+    def report(self, ran: list[str], elapsed: float) -> None:
+        for name in ran:
+            problems = self.problems[name]
+            print(f"  {name}: {len(problems)} problem(s)" if problems else f"  {name}: ok")
+            for problem in problems:
+                print(f"    {problem}")
+        total = sum(len(p) for p in self.problems.values())
+        status = f"{total} problem(s)" if total else "all checks pass"
+        print(f"  {status} ({elapsed * 1000:.0f} ms)")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Revalidate documents and manifests as they change."
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(CHECKS),
+        help="Check to run; repeatable (default: all)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        metavar="SECONDS",
+        help=f"Polling interval (default: {DEFAULT_INTERVAL})",
+    )
+    args = parser.parse_args([] if argv is None else argv)
+
+    session = Session(args.only or list(CHECKS))
+    watcher = Watcher()
+    start = time.perf_counter()
+    ran = session.refresh()
+    print(f"[{datetime.now():%H:%M:%S}] initial run")
+    session.report(ran, time.perf_counter() - start)
+    print(f"Watching {', '.join(WATCH_DIRS)} and root markdown files (Ctrl-C to stop)")
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            ran = session.refresh(changed)
+            if ran:
+                shown = ", ".join(sorted(changed)[:3]) + (" ..." if len(changed) > 3 else "")
+                print(f"[{datetime.now():%H:%M:%S}] {len(changed)} change(s): {shown}")
+                session.report(ran, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
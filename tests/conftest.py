@@ -1,9 +1,47 @@
 """Shared test fixtures and helpers."""
 
+import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
 SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
 
 # Add scripts/ to sys.path so tests can import script modules directly
 sys.path.insert(0, str(SCRIPTS_DIR))
+
+import front_matter  # noqa: E402
+import repo_scan  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    """Give every test its own repository snapshot and front matter cache."""
+    repo_scan.reset_snapshot()
+    front_matter.clear_cache()
+    yield
+    repo_scan.reset_snapshot()
+    front_matter.clear_cache()
+
+
+def git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repo(tmp_path: Path, monkeypatch):
+    """An empty git repository in tmp_path, made the working directory.
+
+    Returns a commit() helper that stages everything and commits it.
+    """
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "Test")
+    monkeypatch.chdir(tmp_path)
+
+    def commit(message: str = "commit") -> None:
+        git(tmp_path, "add", "-A")
+        git(tmp_path, "commit", "-q", "--allow-empty", "-m", message)
+
+    return commit
@@ -0,0 +1,126 @@
+"""Tests for scripts/benchmark.py."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import benchmark as mod
+import fetch_api_docs
+import fetch_claude_code_docs
+import fetch_engine
+import validate_frontmatter
+import validate_links
+import validate_manifests
+
+
+def contents(root: Path) -> dict[str, str]:
+    return {
+        p.relative_to(root).as_posix(): p.read_text(encoding="utf-8")
+        for p in root.rglob("*")
+        if p.is_file()
+    }
+
+
+class TestGenerate:
+    def test_deterministic(self, tmp_path: Path):
+        spec = mod.spec_for(50)
+        mod.generate(tmp_path / "a", spec)
+        mod.generate(tmp_path / "b", spec)
+        assert contents(tmp_path / "a") == contents(tmp_path / "b")
+        mod.generate(tmp_path / "c", spec._replace(seed=1))
+        assert contents(tmp_path / "a") != contents(tmp_path / "c")
+
+    def test_layout_matches_scripts(self, tmp_path: Path, monkeypatch):
+        spec = mod.spec_for(100, broken_link_ratio=0.2)
+        stats = mod.generate(tmp_path, spec)
+        monkeypatch.chdir(tmp_path)
+
+        assert stats["files"] == spec.files
+        kinds = [kind for kind, _ in validate_frontmatter.discover()]
+        assert kinds.count("skills") == spec.plugins * spec.skills_per_plugin
+        assert kinds.count("agents") == spec.plugins * spec.agents_per_plugin
+        assert kinds.count("adrs") == spec.adrs
+        assert kinds.count("research") == spec.research
+        assert validate_frontmatter.collect_and_validate() == []
+
+        files = validate_links.collect_markdown_files()
+        total, broken, _ = validate_links.check_links(files)
+        assert total == stats["links"]
+        assert len(broken) == stats["broken"] > 0
+
+        data = validate_manifests.load_marketplace()
+        assert len(data["plugins"]) == spec.plugins
+        assert all(
+            validate_manifests.validate_plugin_entry(e, i) == []
+            for i, e in enumerate(data["plugins"])
+        )
+
+    @pytest.mark.parametrize("files", [10, 100, 1000, 100_000])
+    def test_spec_for_scale(self, files: int):
+        assert 0.9 * files <= mod.spec_for(files).files <= files
+
+
+class TestRun:
+    def test_times_every_phase(self, tmp_path: Path):
+        mod.generate(tmp_path, mod.spec_for(10))
+        results = mod.run(tmp_path, rounds=1)
+        assert set(results) == set(mod.phases(tmp_path, "http://127.0.0.1:0"))
+        assert all(seconds > 0 for seconds in results.values())
+
+    def test_docs_site_mirror(self, tmp_path: Path):
+        stats = mod.generate(tmp_path / "corpus", mod.spec_for(10))
+        client = fetch_engine.HttpClient("test")
+        with mod.DocsSite(tmp_path / "corpus") as site:
+            entries = fetch_claude_code_docs.parse_llms_txt(
+                client.get_text(f"{site.url}/code/llms.txt")
+            )
+            api = fetch_api_docs.parse_llms_txt(client.get_text(f"{site.url}/api/llms.txt"))
+            assert [e["path"] for e in api] == [e["path"] for e in entries]
+            assert len(entries) == stats["files"]
+            pages = fetch_engine.mirror(entries, tmp_path / "pages", client, rate=0)
+            assert pages == (stats["files"], 0, 0)
+            full = fetch_engine.mirror_full_text(
+                entries, tmp_path / "full", client, f"{site.url}/code/llms-full.txt", rate=0
+            )
+            assert full == (stats["files"], 0, 0)
+            # The second run is all 304s
+            again = fetch_engine.mirror(entries, tmp_path / "pages", client, rate=0)
+            assert again == (0, stats["files"], 0)
+
+
+class TestCompare:
+    BASELINE = {"results": {"100": {"phases": {"links.check": 0.100, "tiny": 0.001}}}}
+
+    def test_regression_flagged(self):
+        results = {"100": {"phases": {"links.check": 0.150}}}
+        assert mod.compare(self.BASELINE, results, 0.25) == [
+            "100 files: links.check 100.0 ms -> 150.0 ms (+50%)"
+        ]
+
+    def test_within_threshold(self):
+        results = {"100": {"phases": {"links.check": 0.120}}}
+        assert mod.compare(self.BASELINE, results, 0.25) == []
+
+    def test_noise_and_new_phases_ignored(self):
+        results = {"100": {"phases": {"tiny": 0.004, "new": 1.0}}, "1000": {"phases": {"x": 1.0}}}
+        assert mod.compare(self.BASELINE, results, 0.25) == []
+
+
+class TestMain:
+    def test_save_then_compare(self, tmp_path: Path, capsys):
+        baseline = tmp_path / "baseline.json"
+        mod.main(["--scales", "10", "--rounds", "1", "--save", str(baseline)])
+        saved = json.loads(baseline.read_text(encoding="utf-8"))
+        assert saved["version"] == mod.BASELINE_VERSION
+        assert "links.check" in saved["results"]["10"]["phases"]
+
+        mod.main(
+            ["--scales", "10", "--rounds", "1", "--baseline", str(baseline), "--threshold", "100"]
+        )
+        assert "No regressions" in capsys.readouterr().out
+
+    def test_generate_only(self, tmp_path: Path, capsys):
+        mod.main(["--generate", str(tmp_path / "corpus"), "--scales", "20"])
+        assert (tmp_path / "corpus" / ".claude-plugin" / "marketplace.json").is_file()
+        assert "wrote" in capsys.readouterr().out
@@ -0,0 +1,98 @@
+"""Tests for scripts/catalog.py."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import catalog as mod
+
+ADRS = [
+    {
+        "number": "0001",
+        "filename": "0001-a.md",
+        "title": "ADR-0001: A",
+        "status": "superseded",
+        "date": "2026-02-13",
+        "decision-makers": ["alice", "bob"],
+    },
+    {
+        "number": "0002",
+        "filename": "0002-b.md",
+        "title": "ADR-0002: B",
+        "status": "accepted",
+        "date": "2026-03-01",
+        "decision-makers": "carol",
+    },
+]
+
+RESEARCH = [
+    {
+        "filename": "2026-01-01-hooks.md",
+        "question": "How do hooks work?",
+        "status": "stale",
+        "started": "2026-01-01",
+        "concluded": "2026-01-05",
+        "tags": ["hooks", "claude-code"],
+    },
+    {
+        "filename": "2026-02-01-skills.md",
+        "question": "How do skills load?",
+        "status": "active",
+        "started": "2026-02-01",
+        "concluded": None,
+        "tags": ["hooks"],
+    },
+]
+
+
+class TestCatalogRecord:
+    def test_adr_columns(self):
+        record = mod.catalog_record(ADRS[0])
+        assert record["title"] == "ADR-0001: A"
+        assert record["date"] == "2026-02-13"
+        assert record["decision_makers"] == ["alice", "bob"]
+        assert "filename" not in record["fields"]
+
+    def test_research_columns(self):
+        record = mod.catalog_record(RESEARCH[0])
+        assert record["title"] == "How do hooks work?"
+        assert record["date"] == "2026-01-01"
+        assert record["tags"] == ["hooks", "claude-code"]
+
+    def test_scalar_people(self):
+        assert mod.catalog_record(ADRS[1])["decision_makers"] == ["carol"]
+
+
+class TestWriters:
+    def test_json_round_trip(self, tmp_path: Path):
+        path = tmp_path / "out" / "decisions.json"
+        compiled = mod.build_catalog("decisions", ADRS)
+        mod.write_json(path, compiled)
+        assert json.loads(path.read_text(encoding="utf-8")) == compiled
+        assert not path.with_name(path.name + ".tmp").exists()
+
+    def test_sqlite_queries(self, tmp_path: Path):
+        path = tmp_path / "research.sqlite"
+        mod.write_sqlite(path, mod.build_catalog("research", RESEARCH))
+        conn = sqlite3.connect(path)
+        stale_hooks = conn.execute(
+            "SELECT d.filename FROM documents d JOIN tags t ON t.document_id = d.id"
+            " WHERE d.status = 'stale' AND t.tag = 'hooks'"
+        ).fetchall()
+        assert stale_hooks == [("2026-01-01-hooks.md",)]
+        fields = conn.execute("SELECT fields FROM documents WHERE status = 'active'").fetchone()
+        assert json.loads(fields[0])["question"] == "How do skills load?"
+        conn.close()
+
+    def test_sqlite_replaces_existing(self, tmp_path: Path):
+        path = tmp_path / "decisions.sqlite"
+        mod.write_sqlite(path, mod.build_catalog("decisions", ADRS))
+        mod.write_sqlite(path, mod.build_catalog("decisions", ADRS[1:]))
+        conn = sqlite3.connect(path)
+        superseded = conn.execute(
+            "SELECT filename FROM documents WHERE status = 'superseded' AND date >= '2026-01-01'"
+        ).fetchall()
+        people = conn.execute("SELECT name FROM people").fetchall()
+        conn.close()
+        assert superseded == []
+        assert people == [("carol",)]
@@ -0,0 +1,154 @@
+"""Tests for scripts/check.py."""
+
+import json
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+import check as mod
+import profiling
+import repo_scan
+
+
+def fake(monkeypatch, name: str, main) -> None:
+    module = types.ModuleType(name)
+    module.main = main
+    monkeypatch.setitem(sys.modules, name, module)
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    """Three fake checks: "slow" finishes last, "fail" exits 1 and writes to stderr."""
+    done = threading.Event()
+    calls = {}
+
+    def slow(argv):
+        calls["slow"] = argv
+        # Finish after "quick", so output order can't follow completion order
+        done.wait(5)
+        print("slow output")
+
+    def quick(argv):
+        calls["quick"] = argv
+        print("quick output")
+        done.set()
+
+    def fail(argv):
+        calls["fail"] = argv
+        print("fail output")
+        print("fail error", file=sys.stderr)
+        sys.exit(1)
+
+    fake(monkeypatch, "fake_slow", slow)
+    fake(monkeypatch, "fake_quick", quick)
+    fake(monkeypatch, "fake_fail", fail)
+    monkeypatch.setattr(
+        mod,
+        "CHECKS",
+        {
+            "slow": ("fake_slow", ["--check"], False),
+            "quick": ("fake_quick", [], True),
+            "fail": ("fake_fail", [], True),
+        },
+    )
+    return calls
+
+
+class TestSubcommand:
+    def test_passes_arguments(self, checks, capsys):
+        mod.main(["quick", "--changed-since", "HEAD"])
+        assert checks["quick"] == ["--changed-since", "HEAD"]
+        assert capsys.readouterr().out == "quick output\n"
+
+    def test_exit_code(self, checks, capsys):
+        with pytest.raises(SystemExit) as e:
+            mod.main(["fail"])
+        assert e.value.code == 1
+        assert capsys.readouterr().err == "fail error\n"
+
+    def test_unknown_command(self, checks, capsys):
+        with pytest.raises(SystemExit) as e:
+            mod.main(["nope"])
+        assert e.value.code == 2
+        assert "usage" in capsys.readouterr().out
+
+
+class TestAll:
+    def test_output_in_check_order(self, checks, capsys):
+        with pytest.raises(SystemExit) as e:
+            mod.main(["all", "--changed-since", "origin/main"])
+        assert e.value.code == 1
+        captured = capsys.readouterr()
+        assert captured.out.startswith(
+            "==> slow\nslow output\n==> quick\nquick output\n==> fail\nfail output\n"
+        )
+        assert "1 of 3 check(s) failed: fail" in captured.out
+        assert captured.err == "fail error\n"
+        assert checks == {
+            "slow": ["--check"],
+            "quick": ["--changed-since", "origin/main"],
+            "fail": ["--changed-since", "origin/main"],
+        }
+
+    def test_sequential(self, checks, capsys, monkeypatch):
+        monkeypatch.setitem(sys.modules["fake_slow"].__dict__, "main", lambda argv: print("s"))
+        mod.main(["all", "--jobs", "1", "--only", "slow", "--only", "quick"])
+        out = capsys.readouterr().out
+        assert out.startswith("==> slow\ns\n==> quick\nquick output\n")
+        assert "All 2 check(s) passed" in out
+
+    def test_concurrent_timings_per_check(self, checks, monkeypatch, tmp_path: Path):
+        threads = []
+
+        def record(argv):
+            threads.append(threading.current_thread())
+            with profiling.phase("read"):
+                pass
+
+        fake(monkeypatch, "fake_slow", record)
+        fake(monkeypatch, "fake_quick", record)
+        timings = tmp_path / "timings.json"
+        mod.main(["all", "--only", "slow", "--only", "quick", "--timings-json", str(timings)])
+        # Timings don't turn concurrency off, and each check's phases are kept
+        assert threading.main_thread() not in threads
+        data = json.loads(timings.read_text(encoding="utf-8"))
+        assert set(data["scopes"]) == {"slow", "quick"}
+        assert all("read" in scoped["phases"] for scoped in data["scopes"].values())
+
+    def test_crash_is_a_failure(self, checks, capsys, monkeypatch):
+        def crash(argv):
+            raise RuntimeError("boom")
+
+        fake(monkeypatch, "fake_quick", crash)
+        with pytest.raises(SystemExit):
+            mod.main(["all", "--only", "quick", "--only", "fail"])
+        captured = capsys.readouterr()
+        assert "RuntimeError: boom" in captured.err
+        assert "2 of 2 check(s) failed: quick, fail" in captured.out
+
+    def test_streams_restored(self, checks):
+        stdout, stderr = sys.stdout, sys.stderr
+        with pytest.raises(SystemExit):
+            mod.main(["all"])
+        assert (sys.stdout, sys.stderr) == (stdout, stderr)
+
+
+def test_real_checks(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "a.md").write_text("# A\n\n[b](b.md)\n", encoding="utf-8")
+    (tmp_path / "docs" / "b.md").write_text("# B\n", encoding="utf-8")
+    mod.main(["all", "--only", "links"])
+    out = capsys.readouterr().out
+    assert out.startswith("==> links\nScanning 2 markdown file(s)")
+    assert "All 1 check(s) passed" in out
+
+    (tmp_path / "docs" / "b.md").unlink()
+    repo_scan.reset_snapshot()
+    with pytest.raises(SystemExit) as e:
+        mod.main(["links"])
+    assert e.value.code == 1
+    assert "1 broken link(s) found" in capsys.readouterr().out
@@ -0,0 +1,518 @@
+"""Tests for scripts/fetch_engine.py against a local llms.txt stand-in."""
+
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import fetch_claude_code_docs
+import fetch_engine as mod
+import search_docs
+
+PAGES = {f"/docs/en/page-{i}.md": f"# Page {i}\n" for i in range(8)}
+PAGES["/docs/en/sdk/guide.md"] = "# Guide\n"
+PAGES["/docs/en/page-2.md"] = (
+    "# Page 2\n\n> Summary with ünïcödé\n\n```bash\n# not a page header\n```\n\n"
+    "# Second top-level heading\n\nBody.\n"
+)
+LATENCY = 0.2
+
+
+class DocsServer:
+    """Threaded HTTP stand-in serving llms.txt and pages with injected latency."""
+
+    def __init__(self) -> None:
+        self.requests: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latency = LATENCY
+        self.send_etags = True
+        self.gzip = False
+        self.truncated: set[str] = set()  # paths whose gzip body is cut short
+        self.drop_keepalive = False
+        self.statuses: list[int] = []
+        self.clients: list[tuple[str, int]] = []
+        self.encodings: list[str | None] = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append(self.path)
+                    server.clients.append(self.client_address)
+                    server.encodings.append(self.headers.get("Accept-Encoding"))
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if self.path == "/docs/llms.txt":
+                        body = server.llms_txt().encode("utf-8")
+                    elif self.path == "/docs/llms-full.txt":
+                        body = server.llms_full_txt().encode("utf-8")
+                    elif self.path in ("/old/guide.md", "/loop"):
+                        self.send_response(301)
+                        target = "/loop" if self.path == "/loop" else "/docs/en/sdk/guide.md"
+                        self.send_header("Location", target)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    elif self.path in PAGES:
+                        time.sleep(server.latency)
+                        body = PAGES[self.path].encode("utf-8")
+                    else:
+                        server.statuses.append(404)
+                        self.send_error(404)
+                        return
+                    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                    if server.send_etags and self.headers.get("If-None-Match") == etag:
+                        server.statuses.append(304)
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    server.statuses.append(200)
+                    self.send_response(200)
+                    if server.send_etags:
+                        self.send_header("ETag", etag)
+                    if server.gzip and "gzip" in self.headers.get("Accept-Encoding", ""):
+                        body = gzip.compress(body)
+                        if self.path in server.truncated:
+                            body = body[:-8]
+                        self.send_header("Content-Encoding", "gzip")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    if server.drop_keepalive:
+                        # Close without announcing it, like an idle-timeout on the server
+                        self.close_connection = True
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+
+    def llms_txt(self) -> str:
+        lines = ["# Docs", ""]
+        for path in sorted(PAGES):
+            lines.append(f"- [{path}]({self.url}{path}): Description of {path}")
+        return "\n".join(lines) + "\n"
+
+    def llms_full_txt(self) -> str:
+        """Every page, Mintlify-style: title, Source line, rest of the page."""
+        sections = []
+        for path in sorted(PAGES):
+            title, _, rest = PAGES[path].partition("\n")
+            sections.append(f"{title}\nSource: {self.url}{path.removesuffix('.md')}\n{rest}")
+        return "\n".join(sections)
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    s = DocsServer()
+    yield s
+    s.close()
+
+
+class TestTokenBucket:
+    def test_spaces_acquisitions(self):
+        bucket = mod.TokenBucket(rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        # First token is immediate, the remaining four wait 1/20s each
+        assert time.monotonic() - start >= 0.19
+
+    def test_shared_across_threads(self):
+        bucket = mod.TokenBucket(rate=20)
+        stamps: list[float] = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(3):
+                bucket.acquire()
+                with lock:
+                    stamps.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        start = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert max(stamps) - start >= 11 / 20 - 0.02
+
+    def test_zero_rate_unlimited(self):
+        bucket = mod.TokenBucket(rate=0)
+        start = time.monotonic()
+        for _ in range(100):
+            bucket.acquire()
+        assert time.monotonic() - start < 0.05
+
+
+CLIENT = fetch_claude_code_docs.CLIENT
+
+
+class TestHttpClient:
+    def test_reuses_connection(self, server):
+        server.latency = 0
+        client = mod.HttpClient("test/1.0")
+        for path in sorted(PAGES):
+            assert client.get_text(server.url + path) == PAGES[path]
+        assert len(set(server.clients)) == 1
+        client.close()
+
+    def test_gzip_negotiated_and_decoded(self, server):
+        server.latency = 0
+        server.gzip = True
+        client = mod.HttpClient("test/1.0")
+        response = client.get(server.url + "/docs/en/sdk/guide.md")
+        assert response.body == b"# Guide\n"
+        assert response.headers["content-encoding"] == "gzip"
+        assert "gzip" in server.encodings[0]
+
+    def test_stale_connection_retried(self, server):
+        server.latency = 0
+        server.drop_keepalive = True
+        client = mod.HttpClient("test/1.0", backoff=0)
+        for path in sorted(PAGES)[:3]:
+            assert client.get_text(server.url + path) == PAGES[path]
+        assert len(set(server.clients)) == 3
+
+    def test_follows_redirects(self, server):
+        server.latency = 0
+        client = mod.HttpClient("test/1.0")
+        assert client.get_text(server.url + "/old/guide.md") == "# Guide\n"
+
+    def test_redirect_loop_raises(self, server):
+        server.latency = 0
+        client = mod.HttpClient("test/1.0")
+        with pytest.raises(mod.urllib.error.HTTPError, match="too many redirects"):
+            client.get(server.url + "/loop")
+        assert server.requests.count("/loop") == mod.MAX_REDIRECTS + 1
+        # Every redirect's connection went back to the pool exactly once
+        idle = [conn for conns in client._idle.values() for conn in conns]
+        assert len({id(conn) for conn in idle}) == len(idle) == 1
+        client.close()
+
+    def test_http_error_raised(self, server):
+        client = mod.HttpClient("test/1.0")
+        with pytest.raises(mod.urllib.error.HTTPError, match="HTTP Error 404"):
+            client.get(server.url + "/docs/en/missing.md")
+
+    def test_connection_refused_not_retried_forever(self):
+        client = mod.HttpClient("test/1.0", retries=1, backoff=0)
+        with pytest.raises(OSError):
+            client.get("http://127.0.0.1:1/nothing")
+
+
+class TestMirror:
+    def _entries(self, server: DocsServer) -> list[dict]:
+        return fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+
+    def test_downloads_concurrently(self, server, tmp_path: Path, capsys):
+        entries = self._entries(server)
+        start = time.monotonic()
+        downloaded, unchanged, failed = mod.mirror(
+            entries, tmp_path, CLIENT, workers=len(entries), rate=0
+        )
+        elapsed = time.monotonic() - start
+        assert (downloaded, unchanged, failed) == (len(entries), 0, 0)
+        assert server.max_in_flight > 1
+        assert len(set(server.clients)) <= len(entries)
+        # Serial would take len(entries) * LATENCY
+        assert elapsed < len(entries) * LATENCY / 2
+        assert (tmp_path / "sdk" / "guide.md").read_text(encoding="utf-8") == "# Guide\n"
+        out = capsys.readouterr().out
+        assert out.count(" OK (") == len(entries)
+        assert f"[{len(entries)}/{len(entries)}]" in out
+
+    def test_rate_limit_applies_across_workers(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        entries = self._entries(server)[:5]
+        start = time.monotonic()
+        mod.mirror(entries, tmp_path, CLIENT, workers=5, rate=10)
+        assert time.monotonic() - start >= 4 / 10 - 0.02
+
+    def test_failed_page_reported(self, server, tmp_path: Path, capsys):
+        entries = self._entries(server)[:2]
+        entries[0] = dict(entries[0], url=f"{server.url}/docs/en/missing.md")
+        downloaded, unchanged, failed = mod.mirror(entries, tmp_path, CLIENT, workers=2, rate=0)
+        assert (downloaded, unchanged, failed) == (1, 0, 1)
+        assert "FAILED (HTTP Error 404" in capsys.readouterr().out
+
+    def test_truncated_gzip_fails_only_its_page(self, server, tmp_path: Path, capsys):
+        server.gzip = True
+        server.truncated.add("/docs/en/page-0.md")
+        entries = [e for e in self._entries(server) if e["path"] in ("page-0", "page-1")]
+        downloaded, unchanged, failed = mod.mirror(entries, tmp_path, CLIENT, workers=2, rate=0)
+        assert (downloaded, unchanged, failed) == (1, 0, 1)
+        assert "FAILED (Compressed file ended" in capsys.readouterr().out
+
+    def test_path_outside_output_skipped(self, server, tmp_path: Path, capsys):
+        entries = [
+            {"path": "../escape", "url": f"{server.url}/docs/en/page-0.md", "name": "escape"}
+        ]
+        downloaded, unchanged, failed = mod.mirror(entries, tmp_path / "out", CLIENT)
+        assert (downloaded, unchanged, failed) == (0, 0, 1)
+        assert "SKIPPED (path outside output directory" in capsys.readouterr().out
+        assert server.requests == []
+        assert not (tmp_path / "escape.md").exists()
+
+
+class TestManifest:
+    def _mirror(self, server: DocsServer, output: Path, **kwargs):
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        return mod.mirror(entries, output, CLIENT, workers=4, rate=0, **kwargs)
+
+    def test_records_validators(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        self._mirror(server, tmp_path)
+        pages = mod.load_manifest(tmp_path)
+        record = pages["sdk/guide"]
+        assert record["etag"].startswith('"')
+        assert record["sha256"] == hashlib.sha256(b"# Guide\n").hexdigest()
+        assert record["url"].endswith("/docs/en/sdk/guide.md")
+
+    def test_second_run_gets_304s(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        self._mirror(server, tmp_path)
+        guide = tmp_path / "sdk" / "guide.md"
+        os.utime(guide, (1_000_000, 1_000_000))
+        server.statuses.clear()
+        downloaded, unchanged, failed = self._mirror(server, tmp_path)
+        assert (downloaded, unchanged, failed) == (0, len(PAGES), 0)
+        assert server.statuses == [304] * len(PAGES)
+        assert guide.stat().st_mtime == 1_000_000
+        assert "UNCHANGED (304)" in capsys.readouterr().out
+
+    def test_same_hash_not_rewritten(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        server.send_etags = False
+        self._mirror(server, tmp_path)
+        guide = tmp_path / "sdk" / "guide.md"
+        os.utime(guide, (1_000_000, 1_000_000))
+        downloaded, unchanged, failed = self._mirror(server, tmp_path)
+        assert (downloaded, unchanged, failed) == (0, len(PAGES), 0)
+        assert guide.stat().st_mtime == 1_000_000
+        assert "UNCHANGED (same content)" in capsys.readouterr().out
+
+    def test_missing_file_refetched(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        self._mirror(server, tmp_path)
+        (tmp_path / "sdk" / "guide.md").unlink()
+        downloaded, unchanged, failed = self._mirror(server, tmp_path)
+        assert (downloaded, unchanged, failed) == (1, len(PAGES) - 1, 0)
+        assert (tmp_path / "sdk" / "guide.md").is_file()
+
+    def test_changed_page_rewritten(self, server, tmp_path: Path, monkeypatch, capsys):
+        server.latency = 0
+        self._mirror(server, tmp_path)
+        monkeypatch.setitem(PAGES, "/docs/en/sdk/guide.md", "# Guide v2\n")
+        downloaded, unchanged, failed = self._mirror(server, tmp_path)
+        assert (downloaded, unchanged, failed) == (1, len(PAGES) - 1, 0)
+        assert (tmp_path / "sdk" / "guide.md").read_text(encoding="utf-8") == "# Guide v2\n"
+
+    def test_force_ignores_manifest(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        self._mirror(server, tmp_path)
+        server.statuses.clear()
+        self._mirror(server, tmp_path, use_manifest=False)
+        assert server.statuses == [200] * len(PAGES)
+
+
+class TestSplitFullText:
+    def test_splits_on_title_and_source(self):
+        text = (
+            "# A\nSource: https://x/docs/en/a\n\nBody A\n# not-a-page\n\n"
+            "# B\nSource: https://x/docs/en/sub/b\nBody B\n\n\n"
+        )
+        pages = list(mod.split_full_text(mod.iter_lines([text.encode("utf-8")])))
+        # Only the separator before the next page is dropped; the last page is kept whole
+        assert pages == [
+            ("https://x/docs/en/a", "# A\n\nBody A\n# not-a-page\n"),
+            ("https://x/docs/en/sub/b", "# B\nBody B\n\n\n"),
+        ]
+        assert [mod.url_to_path(url) for url, _ in pages] == ["a", "sub/b"]
+
+    def test_preamble_ignored(self):
+        lines = ["# Site\n", "Intro\n", "# A\n", "Source: u/en/a\n", "A\n"]
+        assert list(mod.split_full_text(lines)) == [("u/en/a", "# A\nA\n")]
+
+    def test_streams_page_by_page(self):
+        def lines():
+            yield "# A\n"
+            yield "Source: u/en/a\n"
+            yield "A\n"
+            yield "# B\n"
+            yield "Source: u/en/b\n"
+            raise AssertionError("read past the second page header")
+
+        pages = mod.split_full_text(lines())
+        assert next(pages) == ("u/en/a", "# A\nA")
+
+    def test_iter_lines_across_chunk_boundaries(self):
+        data = "one\nzwei ü\ndrei".encode("utf-8")
+        chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+        assert list(mod.iter_lines(chunks)) == ["one\n", "zwei ü\n", "drei"]
+
+
+class TestMirrorFullText:
+    def test_matches_per_page_mode(self, server, tmp_path: Path, capsys, monkeypatch):
+        # Pages whose endings a separator could be confused with
+        monkeypatch.setitem(PAGES, "/docs/en/blank-lines.md", "# Blank lines\n\nBody\n\n\n")
+        monkeypatch.setitem(PAGES, "/docs/en/no-newline.md", "# No newline\nBody")
+        server.latency = 0
+        server.gzip = True
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        mod.mirror(entries, tmp_path / "pages", CLIENT, rate=0, use_manifest=False)
+        server.requests.clear()
+        downloaded, unchanged, failed = mod.mirror_full_text(
+            entries, tmp_path / "full", CLIENT, f"{server.url}/docs/llms-full.txt", rate=0
+        )
+        assert (downloaded, unchanged, failed) == (len(PAGES), 0, 0)
+        assert server.requests == ["/docs/llms-full.txt"]
+        pages = sorted((tmp_path / "pages").rglob("*.md"))
+        assert len(pages) == len(PAGES)
+        for page in pages:
+            twin = tmp_path / "full" / page.relative_to(tmp_path / "pages")
+            assert twin.read_bytes() == page.read_bytes()
+
+    def test_switching_modes_rewrites_nothing(self, server, tmp_path: Path, capsys, monkeypatch):
+        monkeypatch.setitem(PAGES, "/docs/en/blank-lines.md", "# Blank lines\n\nBody\n\n\n")
+        server.latency = 0
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        full_url = f"{server.url}/docs/llms-full.txt"
+        mod.mirror(entries, tmp_path, CLIENT, rate=0)
+        mtimes = {p: p.stat().st_mtime_ns for p in tmp_path.rglob("*.md")}
+        assert mod.mirror_full_text(entries, tmp_path, CLIENT, full_url, rate=0) == (
+            0, len(PAGES), 0
+        )
+        # The per-page run after it still has every page's validators: all 304s
+        server.statuses.clear()
+        assert mod.mirror(entries, tmp_path, CLIENT, rate=0) == (0, len(PAGES), 0)
+        assert server.statuses == [304] * len(PAGES)
+        assert {p: p.stat().st_mtime_ns for p in tmp_path.rglob("*.md")} == mtimes
+
+    def test_truncated_stream_falls_back_to_pages(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        server.gzip = True
+        server.truncated.add("/docs/llms-full.txt")
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        downloaded, unchanged, failed = mod.mirror_full_text(
+            entries, tmp_path, CLIENT, f"{server.url}/docs/llms-full.txt", rate=0
+        )
+        assert failed == 0
+        assert downloaded + unchanged == len(PAGES)
+        assert "FAILED streaming full text (Compressed file ended" in capsys.readouterr().out
+
+    def test_missing_pages_fetched_individually(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        entries.append(dict(entries[0], path="extra", url=f"{server.url}/docs/en/sdk/guide.md"))
+        downloaded, unchanged, failed = mod.mirror_full_text(
+            entries, tmp_path, CLIENT, f"{server.url}/docs/llms-full.txt", rate=0
+        )
+        assert (downloaded, unchanged, failed) == (len(PAGES) + 1, 0, 0)
+        assert server.requests == ["/docs/llms-full.txt", "/docs/en/sdk/guide.md"]
+        assert "1 page(s) not in full text" in capsys.readouterr().out
+
+    def test_rerun_leaves_files_untouched(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        full_url = f"{server.url}/docs/llms-full.txt"
+        mod.mirror_full_text(entries, tmp_path, CLIENT, full_url, rate=0)
+        downloaded, unchanged, failed = mod.mirror_full_text(
+            entries, tmp_path, CLIENT, full_url, rate=0
+        )
+        assert (downloaded, unchanged, failed) == (0, len(PAGES), 0)
+
+    def test_keeps_validators_of_unchanged_pages(self, server, tmp_path: Path, capsys):
+        server.latency = 0
+        entries = fetch_claude_code_docs.parse_llms_txt(server.llms_txt())
+        mod.mirror(entries, tmp_path, CLIENT, rate=0)
+        before = mod.load_manifest(tmp_path)
+        assert all(record["etag"] for record in before.values())
+
+        mod.mirror_full_text(entries, tmp_path, CLIENT, f"{server.url}/docs/llms-full.txt", rate=0)
+        after = mod.load_manifest(tmp_path)
+        assert {p: r["etag"] for p, r in after.items()} == {p: r["etag"] for p, r in before.items()}
+
+
+class TestFetchScriptMain:
+    def test_only_and_exclude(self, server, tmp_path: Path, monkeypatch, capsys):
+        monkeypatch.setattr(fetch_claude_code_docs, "LLMS_TXT_URL", f"{server.url}/docs/llms.txt")
+        monkeypatch.setattr(search_docs, "DEFAULT_DB", tmp_path / "search.sqlite")
+        fetch_claude_code_docs.main(
+            ["-o", str(tmp_path / "out"), "--only", "page", "--exclude", "page-7", "--rate", "0"]
+        )
+        written = sorted(p.name for p in (tmp_path / "out").rglob("*.md"))
+        assert written == [f"page-{i}.md" for i in range(7)]
+        out = capsys.readouterr().out
+        assert "Done: 7 downloaded, 0 unchanged, 0 failed." in out
+        assert "Search index: 7 page(s) indexed" in out
+
+    def test_no_search_index(self, server, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(fetch_claude_code_docs, "LLMS_TXT_URL", f"{server.url}/docs/llms.txt")
+        monkeypatch.setattr(search_docs, "DEFAULT_DB", tmp_path / "search.sqlite")
+        fetch_claude_code_docs.main(
+            ["-o", str(tmp_path / "out"), "--only", "page-1", "--rate", "0", "--no-search-index"]
+        )
+        assert not (tmp_path / "search.sqlite").exists()
+
+    def test_timings_json(self, server, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(fetch_claude_code_docs, "LLMS_TXT_URL", f"{server.url}/docs/llms.txt")
+        monkeypatch.setattr(search_docs, "DEFAULT_DB", tmp_path / "search.sqlite")
+        server.latency = 0
+        args = ["-o", str(tmp_path / "out"), "--only", "page", "--rate", "0"]
+        timings = tmp_path / "timings.json"
+        fetch_claude_code_docs.main(args)
+        fetch_claude_code_docs.main([*args, "--timings-json", str(timings)])
+        data = json.loads(timings.read_text(encoding="utf-8"))
+        assert {"discovery", "fetch", "index"} <= set(data["phases"])
+        counters = data["counters"]
+        # llms.txt plus one conditional request per page, all answered 304
+        assert counters["http_requests"] == 9
+        assert counters["cache_hits"] == 8
+        assert counters["bytes_transferred"] == len(server.llms_txt().encode("utf-8"))
+
+    def test_list_downloads_nothing(self, server, tmp_path: Path, monkeypatch, capsys):
+        monkeypatch.setattr(fetch_claude_code_docs, "LLMS_TXT_URL", f"{server.url}/docs/llms.txt")
+        fetch_claude_code_docs.main(["-o", str(tmp_path / "out"), "--list"])
+        assert f"{len(PAGES)} pages available." in capsys.readouterr().out
+        assert server.requests == ["/docs/llms.txt"]
+        assert not (tmp_path / "out").exists()
+
+    @pytest.mark.parametrize(
+        "error", [socket.gaierror(-2, "Name or service not known"), http.client.BadStatusLine("")]
+    )
+    def test_index_fetch_error(self, tmp_path: Path, monkeypatch, capsys, error):
+        def fail(url):
+            raise error
+
+        monkeypatch.setattr(fetch_claude_code_docs, "fetch", fail)
+        with pytest.raises(SystemExit) as e:
+            fetch_claude_code_docs.main(["-o", str(tmp_path / "out")])
+        assert e.value.code == 1
+        assert "Error fetching index" in capsys.readouterr().err
@@ -0,0 +1,100 @@
+"""Tests for scripts/front_matter.py."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+import front_matter as mod
+import index_decisions
+import index_research
+import repo_scan
+import validate_frontmatter
+
+# Conformance corpus: (front matter body, expected fields).
+# Every script must parse these the same way.
+CORPUS = [
+    ('title: "Quoted"\nstatus: accepted', {"title": "Quoted", "status": "accepted"}),
+    ("question: 'Single?'", {"question": "Single?"}),
+    ("date: 2026-02-10", {"date": "2026-02-10"}),
+    ("url: https://example.com/a:b", {"url": "https://example.com/a:b"}),
+    ("tags: [a, b, c]", {"tags": ["a", "b", "c"]}),
+    ('tags: ["a", \'b\']', {"tags": ["a", "b"]}),
+    ("tags: []", {"tags": []}),
+    ("makers:\n  - alice\n  - bob\nstatus: draft", {"makers": ["alice", "bob"], "status": "draft"}),
+    ("makers:\nstatus: draft", {"makers": [], "status": "draft"}),
+    ("concluded: null", {"concluded": None}),
+    ("description: |\n  one\n  two\nname: x", {"description": "one\ntwo", "name": "x"}),
+    ("description: |\nname: x", {"description": "", "name": "x"}),
+    ("# comment\n\nname: x", {"name": "x"}),
+    ("name: x\r\nstatus: y\r", {"name": "x", "status": "y"}),
+    ("bare", {"bare": []}),
+    ("quote: '", {"quote": ""}),
+]
+
+
+def _write(tmp_path: Path, body: str, name: str = "doc.md") -> Path:
+    p = tmp_path / name
+    p.write_text(f"---\n{body}\n---\n\n# Body\n", encoding="utf-8", newline="")
+    return p
+
+
+class TestConformance:
+    @pytest.mark.parametrize("body,expected", CORPUS)
+    def test_parse_text(self, body: str, expected: dict):
+        assert mod.parse_front_matter(f"---\n{body}\n---\n") == expected
+
+    @pytest.mark.parametrize("body,expected", CORPUS)
+    def test_all_scripts_agree(self, tmp_path: Path, body: str, expected: dict):
+        p = _write(tmp_path, body)
+        text = p.read_text(encoding="utf-8")
+        assert validate_frontmatter.parse_front_matter(text) == expected
+        assert mod.parse_file(p) == expected
+        assert repo_scan.Snapshot().document(p).front_matter == expected
+        assert index_decisions.parse_front_matter(p) == expected
+        repo_scan.reset_snapshot()
+        assert index_research.parse_front_matter(p) == expected
+
+    def test_no_front_matter(self):
+        assert mod.parse_front_matter("# Heading\n---\nname: x\n---\n") is None
+        assert mod.parse_front_matter("") is None
+
+
+class TestParseFile:
+    def test_memoized_until_changed(self, tmp_path: Path, monkeypatch):
+        p = _write(tmp_path, "name: a")
+        assert mod.parse_file(p) == {"name": "a"}
+
+        calls = []
+        monkeypatch.setattr(mod, "read_front_matter", lambda path: calls.append(path) or "")
+        assert mod.parse_file(p) == {"name": "a"}
+        assert calls == []
+
+        p.write_text("---\nname: bb\n---\n", encoding="utf-8")
+        assert mod.parse_file(p) is None
+        assert calls == [p]
+
+    def test_same_size_and_mtime_needs_forget(self, tmp_path: Path):
+        p = _write(tmp_path, "name: a")
+        st = p.stat()
+        assert mod.parse_file(p) == {"name": "a"}
+        _write(tmp_path, "name: b")
+        os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert mod.parse_file(p) == {"name": "a"}
+        mod.forget(p)
+        assert mod.parse_file(p) == {"name": "b"}
+
+    def test_returns_copies(self, tmp_path: Path):
+        p = _write(tmp_path, "tags: [a]")
+        first = mod.parse_file(p)
+        first["tags"].append("b")
+        first["extra"] = 1
+        assert mod.parse_file(p) == {"tags": ["a"]}
+
+
+class TestBenchmark:
+    def test_reports_throughput(self, tmp_path: Path):
+        paths = [_write(tmp_path, f"name: n{i}", f"{i}.md") for i in range(3)]
+        results = mod.benchmark(paths, rounds=2)
+        assert set(results) == {"parse", "read", "memoized"}
+        assert all(rate > 0 for rate in results.values())
@@ -0,0 +1,71 @@
+"""Tests for scripts/git_diff.py."""
+
+from pathlib import Path
+
+import pytest
+
+import git_diff as mod
+
+
+def write(path: Path, text: str = "x\n") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+class TestChangedPaths:
+    def test_modified_added_deleted_renamed(self, git_repo, tmp_path: Path):
+        write(tmp_path / "docs" / "a.md")
+        write(tmp_path / "docs" / "b.md")
+        write(tmp_path / "docs" / "old.md", "rename me\n")
+        git_repo()
+        write(tmp_path / "docs" / "a.md", "changed\n")
+        (tmp_path / "docs" / "b.md").unlink()
+        (tmp_path / "docs" / "old.md").rename(tmp_path / "docs" / "new.md")
+        write(tmp_path / "docs" / "untracked.md")
+        git_repo()
+        write(tmp_path / "docs" / "dirty.md")
+
+        assert mod.changed_paths("HEAD~1") == {
+            str(Path("docs/a.md")),
+            str(Path("docs/b.md")),
+            str(Path("docs/old.md")),
+            str(Path("docs/new.md")),
+            str(Path("docs/untracked.md")),
+            str(Path("docs/dirty.md")),
+        }
+
+    def test_unknown_ref(self, git_repo):
+        git_repo()
+        with pytest.raises(ValueError, match="git diff failed"):
+            mod.changed_paths("no-such-ref")
+
+
+class TestRulesChanged:
+    def test_rule_paths(self):
+        assert mod.rules_changed({str(Path("docs/a.md")), str(Path("scripts/front_matter.py"))})
+        assert mod.rules_changed({str(Path(".github/workflows/ci.yml"))})
+        assert mod.rules_changed({"requirements-ci.txt"})
+
+    def test_other_paths(self):
+        assert not mod.rules_changed({str(Path("docs/a.md")), "scripts.md", "README.md"})
+
+
+class TestFileAt:
+    def test_contents_at_ref(self, git_repo, tmp_path: Path):
+        write(tmp_path / "a.json", "{}\n")
+        git_repo()
+        write(tmp_path / "a.json", "[]\n")
+        assert mod.file_at("HEAD", "a.json") == "{}\n"
+        assert mod.file_at("HEAD", "missing.json") is None
+
+
+class TestFilesMentioning:
+    def test_literal_names(self, git_repo, tmp_path: Path):
+        write(tmp_path / "one.md", "see [a](a.md)\n")
+        write(tmp_path / "two.md", "see [b](b.md)\n")
+        write(tmp_path / "three.txt", "a.md\n")
+        git_repo()
+        write(tmp_path / "four.md", "untracked a.md\n")
+        assert mod.files_mentioning({"a.md"}) == {"one.md", "four.md"}
+        assert mod.files_mentioning({"c.md"}) == set()
+        assert mod.files_mentioning(set()) == set()
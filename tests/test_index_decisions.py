@@ -2,6 +2,8 @@
 
 from pathlib import Path
 
+import pytest
+
 import index_decisions as mod
 
 
@@ -91,6 +93,69 @@ class TestCollectAdrs:
         entries = mod.collect_adrs(tmp_path)
         assert entries == []
 
+    def test_cache_skips_unchanged_files(self, tmp_path: Path, monkeypatch):
+        _write_adr(tmp_path, "0001-a.md", 'title: "A"\nstatus: accepted')
+        _write_adr(tmp_path, "0002-b.md", 'title: "B"\nstatus: draft')
+        cache: dict = {}
+        first = mod.collect_adrs(tmp_path, cache)
+        assert set(cache["files"]) == {str(tmp_path / "0001-a.md"), str(tmp_path / "0002-b.md")}
+
+        import repo_scan
+
+        repo_scan.reset_snapshot()
+        (tmp_path / "0002-b.md").unlink()
+        read = []
+        monkeypatch.setattr(repo_scan.Document, "raw", property(lambda d: read.append(d) or b""))
+        entries = mod.collect_adrs(tmp_path, cache)
+        assert entries == first[:1]
+        assert read == []
+        assert set(cache["files"]) == {str(tmp_path / "0001-a.md")}
+
+
+class TestMain:
+    def _setup(self, tmp_path: Path, monkeypatch) -> Path:
+        monkeypatch.chdir(tmp_path)
+        decisions = tmp_path / "docs" / "decisions"
+        decisions.mkdir(parents=True)
+        _write_adr(decisions, "0001-a.md", 'title: "A"\nstatus: accepted')
+        return decisions / "_INDEX.md"
+
+    def test_check_does_not_write(self, tmp_path: Path, monkeypatch):
+        index = self._setup(tmp_path, monkeypatch)
+        with pytest.raises(SystemExit) as exc:
+            mod.main(["--check"])
+        assert exc.value.code == 1
+        assert not index.exists()
+
+        mod.main([])
+        mtime = index.stat().st_mtime_ns
+        mod.main(["--check"])
+        mod.main([])
+        assert index.stat().st_mtime_ns == mtime
+
+    def test_check_does_not_write_cache(self, tmp_path: Path, monkeypatch):
+        self._setup(tmp_path, monkeypatch)
+        with pytest.raises(SystemExit):
+            mod.main(["--check", "--cache", "cache.json"])
+        assert not (tmp_path / "cache.json").exists()
+
+    def test_cache_file_written(self, tmp_path: Path, monkeypatch):
+        self._setup(tmp_path, monkeypatch)
+        mod.main(["--cache", "cache.json"])
+        import repo_scan
+
+        cache = repo_scan.load_json_cache(tmp_path / "cache.json", mod.CACHE_VERSION)
+        assert cache["files"]["docs/decisions/0001-a.md"]["fields"]["title"] == "A"
+
+    def test_catalogs_written(self, tmp_path: Path, monkeypatch):
+        self._setup(tmp_path, monkeypatch)
+        mod.main(["--json", "out.json", "--sqlite", "out.sqlite"])
+        import json
+
+        documents = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))["documents"]
+        assert [d["number"] for d in documents] == ["0001"]
+        assert (tmp_path / "out.sqlite").exists()
+
 
 class TestBuildIndex:
     def test_empty_entries(self):
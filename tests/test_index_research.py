@@ -3,6 +3,8 @@
 from datetime import date, timedelta
 from pathlib import Path
 
+import pytest
+
 import index_research as mod
 
 
@@ -65,55 +67,85 @@ class TestParseFrontMatter:
 
 
 class TestCheckStaleness:
-    def test_concluded_becomes_stale(self, tmp_path: Path):
+    def test_concluded_becomes_stale(self):
         concluded_date = date.today() - timedelta(days=100)
-        p = _write_research(
-            tmp_path,
-            "test.md",
-            f"status: concluded\nconcluded: {concluded_date}\nstale_after: 90",
-        )
         entry = {"status": "concluded", "concluded": str(concluded_date), "stale_after": "90"}
-        changed = mod.check_staleness(entry, p, date.today())
+        changed = mod.check_staleness(entry, date.today())
         assert changed is True
         assert entry["status"] == "stale"
-        assert "status: stale" in p.read_text(encoding="utf-8")
 
-    def test_concluded_not_yet_stale(self, tmp_path: Path):
+    def test_concluded_not_yet_stale(self):
         concluded_date = date.today() - timedelta(days=30)
-        p = _write_research(
-            tmp_path,
-            "test.md",
-            f"status: concluded\nconcluded: {concluded_date}\nstale_after: 90",
-        )
         entry = {"status": "concluded", "concluded": str(concluded_date), "stale_after": "90"}
-        changed = mod.check_staleness(entry, p, date.today())
+        changed = mod.check_staleness(entry, date.today())
         assert changed is False
         assert entry["status"] == "concluded"
 
-    def test_non_concluded_skipped(self, tmp_path: Path):
-        p = _write_research(tmp_path, "test.md", "status: active")
+    def test_expiry_day_is_still_fresh(self):
+        entry = {"status": "concluded", "concluded": "2026-01-01", "stale_after": 10}
+        assert mod.expiry_date(entry) == date(2026, 1, 11)
+        assert mod.check_staleness(entry, date(2026, 1, 11)) is False
+        assert mod.check_staleness(entry, date(2026, 1, 12)) is True
+
+    def test_non_concluded_skipped(self):
         entry = {"status": "active"}
-        changed = mod.check_staleness(entry, p, date.today())
+        changed = mod.check_staleness(entry, date.today())
         assert changed is False
+        assert mod.expiry_date(entry) is None
 
-    def test_no_concluded_date_skipped(self, tmp_path: Path):
-        p = _write_research(tmp_path, "test.md", "status: concluded\nconcluded: null")
+    def test_no_concluded_date_skipped(self):
         entry = {"status": "concluded", "concluded": None}
-        changed = mod.check_staleness(entry, p, date.today())
+        changed = mod.check_staleness(entry, date.today())
         assert changed is False
 
-    def test_default_stale_after(self, tmp_path: Path):
+    def test_default_stale_after(self):
         concluded_date = date.today() - timedelta(days=91)
-        p = _write_research(
-            tmp_path,
-            "test.md",
-            f"status: concluded\nconcluded: {concluded_date}",
-        )
         entry = {"status": "concluded", "concluded": str(concluded_date)}
-        changed = mod.check_staleness(entry, p, date.today())
+        changed = mod.check_staleness(entry, date.today())
         assert changed is True
 
 
+class TestNextExpirations:
+    def test_sorted_and_limited(self):
+        entries = [
+            {"filename": "c.md", "status": "concluded", "concluded": "2026-03-01"},
+            {"filename": "a.md", "status": "concluded", "concluded": "2026-01-01"},
+            {"filename": "d.md", "status": "active"},
+            {"filename": "b.md", "status": "concluded", "concluded": "2026-01-01", "stale_after": 30},
+        ]
+        assert mod.next_expirations(entries, 2) == [
+            (date(2026, 1, 31), "b.md"),
+            (date(2026, 4, 1), "a.md"),
+        ]
+
+
+class TestMarkStale:
+    def test_only_front_matter_line_changes(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text(
+            "---\nstatus: concluded\nconcluded: 2026-01-01\n---\n\nstatus: concluded\n",
+            encoding="utf-8",
+        )
+        assert mod.mark_stale([p]) == [p]
+        assert p.read_text(encoding="utf-8") == (
+            "---\nstatus: stale\nconcluded: 2026-01-01\n---\n\nstatus: concluded\n"
+        )
+        assert not (tmp_path / "doc.md.tmp").exists()
+
+    def test_crlf(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_bytes(b"---\r\nstatus: concluded\r\n---\r\n")
+        mod.mark_stale([p])
+        assert p.read_bytes() == b"---\r\nstatus: stale\r\n---\r\n"
+
+    def test_body_only_status_untouched(self, tmp_path: Path):
+        p = _write_research(tmp_path, "doc.md", "status: active")
+        p.write_text(p.read_text(encoding="utf-8") + "status: concluded\n", encoding="utf-8")
+        before = p.read_text(encoding="utf-8")
+        assert mod.mark_stale([p]) == []
+        assert p.read_text(encoding="utf-8") == before
+
+
 class TestCollectResearch:
     def test_skips_index_and_templates(self, tmp_path: Path):
         _write_research(tmp_path, "_INDEX.md", "question: skip")
@@ -132,6 +164,61 @@ class TestCollectResearch:
         entries = mod.collect_research(tmp_path, date.today())
         assert entries == []
 
+    def test_stale_source_rewritten(self, tmp_path: Path, capsys):
+        concluded_date = date.today() - timedelta(days=100)
+        old = _write_research(
+            tmp_path, "old.md", f"status: concluded\nconcluded: {concluded_date}"
+        )
+        fresh = _write_research(
+            tmp_path, "new.md", f"status: concluded\nconcluded: {date.today()}"
+        )
+        entries = mod.collect_research(tmp_path, date.today())
+        assert sorted(e["status"] for e in entries) == ["concluded", "stale"]
+        assert "status: stale" in old.read_text(encoding="utf-8")
+        assert "status: concluded" in fresh.read_text(encoding="utf-8")
+        assert (
+            f"stale: old.md (concluded {concluded_date}, {mod.DEFAULT_STALE_AFTER}d threshold)"
+            in capsys.readouterr().out
+        )
+
+    def test_no_write_leaves_stale_source(self, tmp_path: Path):
+        concluded_date = date.today() - timedelta(days=100)
+        p = _write_research(
+            tmp_path, "old.md", f"status: concluded\nconcluded: {concluded_date}"
+        )
+        entries = mod.collect_research(tmp_path, date.today(), write=False)
+        assert entries[0]["status"] == "stale"
+        assert "status: concluded" in p.read_text(encoding="utf-8")
+
+    def test_cache_reparses_rewritten_file(self, tmp_path: Path):
+        concluded_date = date.today() - timedelta(days=100)
+        _write_research(tmp_path, "old.md", f"status: concluded\nconcluded: {concluded_date}")
+        cache: dict = {}
+        assert mod.collect_research(tmp_path, date.today(), cache)[0]["status"] == "stale"
+
+        import repo_scan
+
+        repo_scan.reset_snapshot()
+        entries = mod.collect_research(tmp_path, date.today(), cache)
+        assert entries[0]["status"] == "stale"
+        assert cache["files"][str(tmp_path / "old.md")]["fields"]["status"] == "stale"
+
+
+class TestMain:
+    def test_check_writes_nothing(self, tmp_path: Path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        research = tmp_path / "docs" / "research"
+        research.mkdir(parents=True)
+        concluded_date = date.today() - timedelta(days=100)
+        old = _write_research(
+            research, "old.md", f"status: concluded\nconcluded: {concluded_date}"
+        )
+        with pytest.raises(SystemExit):
+            mod.main(["--check", "--cache", "cache.json"])
+        assert not (tmp_path / "cache.json").exists()
+        assert not (research / "_INDEX.md").exists()
+        assert "status: concluded" in old.read_text(encoding="utf-8")
+
 
 class TestBuildIndex:
     def test_empty_entries(self):
@@ -0,0 +1,98 @@
+"""Tests for scripts/markdown_links.py."""
+
+import markdown_links as mod
+from markdown_links import Link
+
+
+def targets(text: str) -> list[str]:
+    return [link.target for link in mod.extract_links(text)]
+
+
+class TestInlineLinks:
+    def test_line_numbers(self):
+        links = mod.extract_links("# Doc\n\n[a](a.md) and [b](b.md)\n\nend [c](c.md)\n")
+        assert links == [Link(3, "a", "a.md"), Link(3, "b", "b.md"), Link(5, "c", "c.md")]
+
+    def test_images_skipped(self):
+        assert targets("![alt](img.png) [doc](doc.md)\n") == ["doc.md"]
+
+    def test_no_links(self):
+        assert mod.extract_links("plain text\n") == []
+
+
+class TestCode:
+    def test_backtick_fence(self):
+        assert targets("```\n[x](x.md)\n```\n[y](y.md)\n") == ["y.md"]
+
+    def test_tilde_fence(self):
+        assert targets("~~~\n[x](x.md)\n```\n[y](y.md)\n~~~\n[z](z.md)\n") == ["z.md"]
+
+    def test_closing_fence_must_be_as_long(self):
+        text = "````\n```\n[x](x.md)\n````\n[y](y.md)\n"
+        assert targets(text) == ["y.md"]
+
+    def test_unclosed_fence_runs_to_end(self):
+        assert targets("[a](a.md)\n```\n[x](x.md)\n") == ["a.md"]
+
+    def test_inline_triple_backticks_are_not_a_fence(self):
+        assert targets("```code``` [a](a.md)\n[b](b.md)\n") == ["a.md", "b.md"]
+
+    def test_indented_code(self):
+        text = "Para\n\n    [x](x.md)\n\n    [y](y.md)\nback [z](z.md)\n"
+        assert targets(text) == ["z.md"]
+
+    def test_indented_list_continuation_is_not_code(self):
+        text = "- item\n\n    [a](a.md)\n\n1. step\n   lazy\n\n    [b](b.md)\n"
+        assert targets(text) == ["a.md", "b.md"]
+
+    def test_indented_line_without_blank_is_not_code(self):
+        assert targets("Para\n    [a](a.md)\n") == ["a.md"]
+
+    def test_inline_code(self):
+        assert targets("`[x](x.md)` [a](a.md) ``[y](y.md) ` still code`` [b](b.md)\n") == [
+            "a.md",
+            "b.md",
+        ]
+
+    def test_unmatched_backtick_is_literal(self):
+        assert targets("a ` b [a](a.md)\n") == ["a.md"]
+
+
+class TestReferenceLinks:
+    def test_full_collapsed_and_shortcut(self):
+        text = "[one][A] [Two][] [three]\n\n[a]: a.md\n[two]: <two.md>\n[Three]: three.md \"T\"\n"
+        assert mod.extract_links(text) == [
+            Link(1, "one", "a.md"),
+            Link(1, "Two", "two.md"),
+            Link(1, "three", "three.md"),
+        ]
+
+    def test_labels_normalized(self):
+        assert targets("[x][Some   Label]\n\n[some label]: doc.md\n") == ["doc.md"]
+
+    def test_undefined_reference_is_text(self):
+        assert mod.extract_links("see [x] and arr[0][1]\n") == []
+
+    def test_unused_definition_reported_at_its_line(self):
+        text = "[a](a.md)\n\n[unused]: missing.md\n"
+        assert mod.extract_links(text) == [Link(1, "a", "a.md"), Link(3, "unused", "missing.md")]
+
+    def test_first_definition_wins(self):
+        assert targets("[x]\n\n[x]: first.md\n[x]: second.md\n") == ["first.md"]
+
+    def test_definition_in_code_ignored(self):
+        assert targets("[x]\n\n```\n[x]: code.md\n```\n") == []
+
+
+class TestBenchmark:
+    def test_matches_baseline_on_synthetic_document(self):
+        text = mod.synthetic_document(200)
+        # The baseline misses the reference link in every table row
+        links = mod.extract_links(text)
+        baseline = mod._per_line_regex_links(text)
+        assert set(baseline) < set(links)
+        assert {link.target for link in set(links) - set(baseline)} == {"./target.md"}
+
+    def test_reports_both(self):
+        results = mod.benchmark(mod.synthetic_document(100), rounds=1)
+        assert set(results) == {"tokenizer", "per-line"}
@@ -0,0 +1,194 @@
+"""Tests for scripts/plugin_bundle.py."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import plugin_bundle as mod
+import repo_scan
+
+MANIFEST = {"name": "foo", "version": "1.0.0", "description": "d"}
+
+
+def write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def set_version(repo: Path, version: str) -> None:
+    manifest = {**MANIFEST, "version": version}
+    write(repo / "plugins" / "foo" / ".claude-plugin" / "plugin.json", json.dumps(manifest))
+    repo_scan.reset_snapshot()
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    write(
+        tmp_path / ".claude-plugin" / "marketplace.json",
+        json.dumps({"name": "m", "plugins": [{"name": "foo", "source": "foo"}]}),
+    )
+    foo = tmp_path / "plugins" / "foo"
+    write(foo / ".claude-plugin" / "plugin.json", json.dumps(MANIFEST))
+    write(foo / "skills" / "a" / "SKILL.md", "# A\n")
+    write(foo / "skills" / "b" / "SKILL.md", "# A\n")  # same content as a
+    write(foo / "hooks" / "run.sh", "#!/bin/sh\n")
+    os.chmod(foo / "hooks" / "run.sh", 0o755)
+    write(foo / "__pycache__" / "x.pyc", "junk")
+    return tmp_path
+
+
+ENTRY = {"name": "foo", "source": "foo"}
+
+
+class TestBuild:
+    def test_file_table_and_blobs(self, repo: Path):
+        bundle = mod.build(ENTRY)
+        files = bundle.meta["files"]
+        assert list(files) == [
+            ".claude-plugin/plugin.json",
+            "hooks/run.sh",
+            "skills/a/SKILL.md",
+            "skills/b/SKILL.md",
+        ]
+        assert files["hooks/run.sh"]["mode"] == 0o755
+        assert files["skills/a/SKILL.md"]["mode"] == 0o644
+        assert files["skills/a/SKILL.md"]["sha256"] == files["skills/b/SKILL.md"]["sha256"]
+        assert len(bundle.blobs) == 3
+        assert bundle.meta["version"] == "1.0.0"
+        assert bundle.meta["base"] is None
+        assert mod.check_bundle(bundle) == []
+
+    def test_serialize_is_deterministic(self, repo: Path):
+        first = mod.serialize(mod.build(ENTRY))
+        os.utime(repo / "plugins" / "foo" / "skills" / "a" / "SKILL.md", (0, 0))
+        repo_scan.reset_snapshot()
+        assert mod.serialize(mod.build(ENTRY)) == first
+
+    def test_hash_covers_mode(self, repo: Path):
+        before = mod.build(ENTRY).meta["hash"]
+        os.chmod(repo / "plugins" / "foo" / "hooks" / "run.sh", 0o644)
+        repo_scan.reset_snapshot()
+        assert mod.build(ENTRY).meta["hash"] != before
+
+    def test_invalid_version(self, repo: Path):
+        set_version(repo, "1.0")
+        with pytest.raises(ValueError, match="not valid semver"):
+            mod.build(ENTRY)
+
+    @pytest.mark.parametrize("name", ["../escape", "a/b", "Foo"])
+    def test_unsafe_name(self, repo: Path, name: str):
+        manifest = {**MANIFEST, "name": name}
+        write(repo / "plugins" / "foo" / ".claude-plugin" / "plugin.json", json.dumps(manifest))
+        entry = {"name": name, "source": "foo"}
+        with pytest.raises(ValueError, match="is not kebab-case"):
+            mod.build(entry)
+
+    def test_round_trip(self, repo: Path, tmp_path: Path):
+        bundle = mod.build(ENTRY)
+        path = tmp_path / "b.tar.gz"
+        path.write_bytes(mod.serialize(bundle))
+        assert mod.read_bundle(path) == bundle
+
+        dest = tmp_path / "out"
+        mod.unpack(bundle, dest)
+        assert (dest / "skills" / "b" / "SKILL.md").read_text(encoding="utf-8") == "# A\n"
+        assert os.stat(dest / "hooks" / "run.sh").st_mode & 0o777 == 0o755
+
+
+class TestDelta:
+    def test_carries_only_new_blobs(self, repo: Path):
+        base = mod.build(ENTRY)
+        write(repo / "plugins" / "foo" / "skills" / "c" / "SKILL.md", "# C\n")
+        set_version(repo, "1.1.0")
+        target = mod.build(ENTRY)
+
+        delta = mod.make_delta(base, target)
+        assert delta.meta["base"] == {"version": "1.0.0", "hash": base.meta["hash"]}
+        # plugin.json and the new skill changed; everything else comes from the base
+        assert len(delta.blobs) == 2
+        assert mod.apply_delta(base, delta) == target
+
+    def test_wrong_base(self, repo: Path):
+        base = mod.build(ENTRY)
+        set_version(repo, "1.1.0")
+        other = mod.build(ENTRY)
+        delta = mod.make_delta(other, other)
+        with pytest.raises(ValueError, match="does not apply"):
+            mod.apply_delta(base, delta)
+
+
+class TestMain:
+    def test_pack_and_verify(self, repo: Path, capsys):
+        mod.main([])
+        output = repo / mod.DEFAULT_OUTPUT
+        assert (output / "foo" / "1.0.0.tar.gz").is_file()
+        index = json.loads((output / mod.INDEX_NAME).read_text(encoding="utf-8"))
+        assert list(index["plugins"]["foo"]["bundles"]) == ["1.0.0"]
+
+        mod.main([])
+        assert "foo: unchanged" in capsys.readouterr().out
+        mod.main(["--verify"])
+        assert "verified" in capsys.readouterr().out
+
+    def test_new_version_writes_delta(self, repo: Path, capsys):
+        mod.main([])
+        write(repo / "plugins" / "foo" / "skills" / "c" / "SKILL.md", "# C\n")
+        set_version(repo, "1.1.0")
+        mod.main([])
+        delta_path = repo / mod.DEFAULT_OUTPUT / "foo" / "1.0.0_1.1.0.delta.tar.gz"
+        assert delta_path.is_file()
+        assert "changed blob(s)" in capsys.readouterr().out
+        assert len(mod.read_bundle(delta_path).blobs) == 2
+        mod.main(["--verify"])
+
+    def test_unbumped_change_is_a_conflict(self, repo: Path, capsys):
+        mod.main([])
+        write(repo / "plugins" / "foo" / "skills" / "c" / "SKILL.md", "# C\n")
+        repo_scan.reset_snapshot()
+        with pytest.raises(SystemExit):
+            mod.main([])
+        assert "bump the version" in capsys.readouterr().out
+
+    def test_verify_detects_stale_bundle(self, repo: Path, capsys):
+        mod.main([])
+        write(repo / "plugins" / "foo" / "skills" / "a" / "SKILL.md", "# changed\n")
+        repo_scan.reset_snapshot()
+        with pytest.raises(SystemExit):
+            mod.main(["--verify"])
+        assert "does not match plugins/foo" in capsys.readouterr().out
+
+    def test_verify_detects_corrupt_delta(self, repo: Path, capsys):
+        mod.main([])
+        write(repo / "plugins" / "foo" / "skills" / "c" / "SKILL.md", "# C\n")
+        set_version(repo, "1.1.0")
+        mod.main([])
+        # Replace the delta with one built against a different base
+        output = repo / mod.DEFAULT_OUTPUT
+        bogus = mod.build(ENTRY)
+        delta = mod.make_delta(bogus, bogus)
+        (output / "foo" / "1.0.0_1.1.0.delta.tar.gz").write_bytes(mod.serialize(delta))
+        with pytest.raises(SystemExit):
+            mod.main(["--verify"])
+        out = capsys.readouterr().out
+        assert "does not apply to this base" in out
+        assert "index.json is out of date" in out
+
+    def test_verify_only(self, repo: Path, capsys):
+        mod.main([])
+        # A corrupt bundle of another plugin is not looked at with --only
+        other = repo / mod.DEFAULT_OUTPUT / "other" / "1.0.0.tar.gz"
+        other.parent.mkdir()
+        other.write_bytes(b"junk")
+        mod.main(["--verify", "--only", "foo"])
+        assert "verified" in capsys.readouterr().out
+        with pytest.raises(SystemExit):
+            mod.main(["--verify"])
+        assert "other/1.0.0.tar.gz: cannot read bundle" in capsys.readouterr().out
+
+    def test_missing_bundle(self, repo: Path, capsys):
+        with pytest.raises(SystemExit):
+            mod.main(["--verify"])
+        assert "is missing" in capsys.readouterr().out
@@ -0,0 +1,213 @@
+"""Tests for scripts/plugin_catalog.py."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import plugin_catalog as mod
+import repo_scan
+
+SKILL = "---\nname: {name}\ndescription: d\nauthor: a\nlicense: MIT\n---\n\n# Skill\n"
+AGENT = "---\nname: {name}\ndescription: d\nmodel: sonnet\ncolor: blue\ntools: Read\n---\n"
+MANIFEST = {
+    "name": "foo",
+    "version": "1.0.0",
+    "description": "d",
+    "author": {"name": "a"},
+    "license": "MIT",
+}
+
+
+def write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    write(
+        tmp_path / ".claude-plugin" / "marketplace.json",
+        json.dumps(
+            {
+                "name": "m",
+                "owner": {"name": "o"},
+                "metadata": {},
+                "plugins": [{"name": "foo", "source": "foo"}, {"name": "bar", "source": "bar"}],
+            }
+        ),
+    )
+    foo = tmp_path / "plugins" / "foo"
+    write(foo / ".claude-plugin" / "plugin.json", json.dumps(MANIFEST))
+    write(foo / "skills" / "review" / "SKILL.md", SKILL.format(name="review"))
+    write(foo / "skills" / "review" / "examples" / "SKILL.md", "not a skill")
+    write(foo / "agents" / "checker.md", AGENT.format(name="checker"))
+    write(
+        foo / "hooks" / "hooks.json",
+        json.dumps({"hooks": {"PreToolUse": [{"matcher": "Bash", "hooks": []}], "Stop": [{}]}}),
+    )
+    write(foo / ".mcp.json", json.dumps({"mcpServers": {"db": {"command": "db-mcp"}}}))
+    write(foo / "__pycache__" / "x.pyc", "junk")
+    bar = tmp_path / "plugins" / "bar"
+    write(bar / ".claude-plugin" / "plugin.json", json.dumps({**MANIFEST, "name": "bar"}))
+    return tmp_path
+
+
+class TestBuildCatalog:
+    def test_contents(self, repo: Path):
+        catalog = mod.build_catalog()
+        assert catalog["version"] == mod.CATALOG_VERSION
+        assert catalog["marketplace"] == {"name": "m", "owner": {"name": "o"}, "metadata": {}}
+        foo, bar = catalog["plugins"]
+        assert foo["name"] == "foo"
+        assert foo["manifest"] == MANIFEST
+        assert foo["skills"] == [
+            {
+                "path": "skills/review/SKILL.md",
+                "front_matter": {
+                    "name": "review",
+                    "description": "d",
+                    "author": "a",
+                    "license": "MIT",
+                },
+            }
+        ]
+        assert [a["path"] for a in foo["agents"]] == ["agents/checker.md"]
+        assert foo["agents"][0]["front_matter"]["model"] == "sonnet"
+        assert foo["hooks"] == [
+            {"event": "PreToolUse", "matcher": "Bash"},
+            {"event": "Stop", "matcher": None},
+        ]
+        assert foo["mcp_servers"] == [{"name": "db", "type": "stdio"}]
+        assert list(foo["files"]) == [
+            ".claude-plugin/plugin.json",
+            ".mcp.json",
+            "agents/checker.md",
+            "hooks/hooks.json",
+            "skills/review/SKILL.md",
+            "skills/review/examples/SKILL.md",
+        ]
+        assert foo["hash"] == mod.content_hash(foo["files"])
+        assert bar["skills"] == bar["agents"] == bar["hooks"] == bar["mcp_servers"] == []
+
+    def test_inline_manifest_inventories(self, repo: Path):
+        write(
+            repo / "plugins" / "bar" / ".claude-plugin" / "plugin.json",
+            json.dumps(
+                {
+                    **MANIFEST,
+                    "name": "bar",
+                    "hooks": {"hooks": {"SessionStart": [{"hooks": []}]}},
+                    "mcpServers": {"web": {"type": "http", "url": "https://example.com"}},
+                }
+            ),
+        )
+        bar = mod.build_catalog()["plugins"][1]
+        assert bar["hooks"] == [{"event": "SessionStart", "matcher": None}]
+        assert bar["mcp_servers"] == [{"name": "web", "type": "http"}]
+
+    def test_deterministic(self, repo: Path):
+        first = mod.render(mod.build_catalog())
+        repo_scan.reset_snapshot()
+        assert mod.render(mod.build_catalog()) == first
+
+    def test_unchanged_plugins_not_parsed(self, repo: Path, monkeypatch):
+        previous = mod.build_catalog()
+        write(repo / "plugins" / "bar" / "README.md", "new file")
+        repo_scan.reset_snapshot()
+        parsed = []
+        original = mod.plugin_record
+
+        def spy(entry, files):
+            parsed.append(entry["name"])
+            return original(entry, files)
+
+        monkeypatch.setattr(mod, "plugin_record", spy)
+        catalog = mod.build_catalog(previous)
+        assert parsed == ["bar"]
+        assert catalog["plugins"][0] is previous["plugins"][0]
+        assert "README.md" in catalog["plugins"][1]["files"]
+
+    def test_unaffected_plugins_not_walked(self, repo: Path, monkeypatch):
+        cache: dict = {}
+        previous = mod.build_catalog(cache=cache)
+        write(repo / "plugins" / "bar" / "README.md", "new file")
+        repo_scan.reset_snapshot()
+        walked = []
+        original = mod.plugin_files
+
+        def spy(plugin_dir, *args):
+            walked.append(plugin_dir.name)
+            return original(plugin_dir, *args)
+
+        monkeypatch.setattr(mod, "plugin_files", spy)
+        catalog = mod.build_catalog(cache=cache, affected=lambda entry: entry["name"] == "foo")
+        assert walked == ["foo"]
+        # bar keeps its cached record, new file or not
+        assert catalog["plugins"][1] == previous["plugins"][1]
+        assert str(Path("plugins/bar/.claude-plugin/plugin.json")) in cache["files"]
+
+    def test_affected_needs_cached_record(self, repo: Path):
+        previous = mod.build_catalog()
+        write(repo / "plugins" / "bar" / "README.md", "new file")
+        repo_scan.reset_snapshot()
+        catalog = mod.build_catalog(previous, affected=lambda entry: False)
+        assert "README.md" in catalog["plugins"][1]["files"]
+
+    def test_escaping_source_skipped(self, repo: Path):
+        write(
+            repo / ".claude-plugin" / "marketplace.json",
+            json.dumps({"name": "m", "plugins": [{"name": "up", "source": "../.."}]}),
+        )
+        assert mod.build_catalog()["plugins"] == []
+
+    def test_hash_cache(self, repo: Path):
+        cache: dict = {}
+        mod.build_catalog(cache=cache)
+        skill = str(Path("plugins/foo/skills/review/SKILL.md"))
+        assert skill in cache["files"]
+        # A cached hash is trusted while mtime and size match
+        cache["files"][skill]["hash"] = "cached"
+        repo_scan.reset_snapshot()
+        catalog = mod.build_catalog(cache=cache)
+        assert catalog["plugins"][0]["files"]["skills/review/SKILL.md"] == "cached"
+
+
+class TestMain:
+    def test_write_then_check(self, repo: Path, capsys):
+        mod.main([])
+        assert f"wrote {mod.CATALOG_PATH}" in capsys.readouterr().out
+        assert mod.check_catalog() == []
+        mod.main(["--check"])
+        assert "is up to date" in capsys.readouterr().out
+
+        agent = repo / "plugins" / "foo" / "agents" / "checker.md"
+        write(agent, AGENT.format(name="renamed"))
+        repo_scan.reset_snapshot()
+        assert mod.check_catalog() == [
+            f"{mod.CATALOG_PATH} is out of date; run python scripts/plugin_catalog.py"
+        ]
+        with pytest.raises(SystemExit):
+            mod.main(["--check"])
+
+        mod.main(["--cache"])
+        catalog = json.loads(mod.CATALOG_PATH.read_text(encoding="utf-8"))
+        assert catalog["plugins"][0]["agents"][0]["front_matter"]["name"] == "renamed"
+        assert os.path.exists(mod.DEFAULT_CACHE)
+
+    def test_check_ignores_records_in_catalog(self, repo: Path):
+        mod.main([])
+        catalog = json.loads(mod.CATALOG_PATH.read_text(encoding="utf-8"))
+        catalog["plugins"][0]["agents"] = []
+        mod.CATALOG_PATH.write_text(mod.render(catalog), encoding="utf-8")
+        repo_scan.reset_snapshot()
+        assert mod.check_catalog(affected=lambda entry: False) == [
+            f"{mod.CATALOG_PATH} is out of date; run python scripts/plugin_catalog.py"
+        ]
+
+    def test_missing(self, repo: Path):
+        assert mod.check_catalog() == [
+            f"{mod.CATALOG_PATH} is missing; run python scripts/plugin_catalog.py"
+        ]
@@ -0,0 +1,202 @@
+"""Tests for scripts/profiling.py."""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+import profiling as mod
+import validate_links
+from profiling import count, phase
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    mod.reset()
+    yield
+    mod.reset()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake perf_counter advanced by hand."""
+    now = [0.0]
+    monkeypatch.setattr(mod, "perf_counter", lambda: now[0])
+
+    def advance(seconds: float) -> None:
+        now[0] += seconds
+
+    return advance
+
+
+class TestPhase:
+    def test_nested_time_is_exclusive(self, clock):
+        with phase("resolve"):
+            clock(1.0)
+            with phase("read"):
+                clock(2.0)
+                with phase("parse"):
+                    clock(4.0)
+            clock(0.5)
+        data = mod.results("x", 10.0)
+        assert data["phases"] == {"parse": 4.0, "read": 2.0, "resolve": 1.5, "other": 2.5}
+
+    def test_repeated_phases_add_up(self, clock):
+        for _ in range(3):
+            with phase("read"):
+                clock(1.0)
+        assert mod.results("x", 3.0)["phases"] == {"read": 3.0, "other": 0.0}
+
+    def test_exception_still_recorded(self, clock):
+        with pytest.raises(ValueError):
+            with phase("parse"):
+                clock(1.0)
+                raise ValueError
+        with phase("read"):
+            clock(1.0)
+        assert mod.results("x", 2.0)["phases"] == {"parse": 1.0, "read": 1.0, "other": 0.0}
+
+    def test_worker_threads_not_recorded(self, clock):
+        def worker():
+            with phase("read"):
+                clock(1.0)
+
+        with phase("validate"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        # The worker's time stays with the phase the main thread waited in
+        assert mod.results("x", 1.0)["phases"] == {"validate": 1.0, "other": 0.0}
+
+
+class TestScope:
+    def test_thread_phases_recorded_under_scope(self, clock):
+        def worker():
+            with mod.scope("links"):
+                with phase("read"):
+                    clock(1.0)
+                clock(0.5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        data = mod.results("x", 2.0)
+        assert data["phases"] == {"other": 2.0}
+        assert data["scopes"] == {
+            "links": {"wall_seconds": 1.5, "phases": {"read": 1.0, "other": 0.5}}
+        }
+
+    def test_main_thread_scope_kept_apart(self, clock):
+        with phase("discovery"):
+            clock(1.0)
+        with mod.scope("links"):
+            with phase("read"):
+                clock(2.0)
+        with phase("discovery"):
+            clock(1.0)
+        data = mod.results("x", 4.0)
+        assert data["phases"] == {"discovery": 2.0, "other": 2.0}
+        assert data["scopes"]["links"]["phases"] == {"read": 2.0, "other": 0.0}
+
+
+class TestCount:
+    def test_counters(self):
+        count("files")
+        count("files")
+        count("bytes_read", 100)
+        assert mod.results("x", 0.0)["counters"] == {"bytes_read": 100, "files": 2}
+
+    def test_thread_safe(self):
+        def work():
+            for _ in range(1000):
+                count("stat")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert mod.results("x", 0.0)["counters"] == {"stat": 4000}
+
+
+class TestProfiled:
+    def main(self, argv, exit_code=None):
+        @mod.profiled("demo")
+        def main(argv):
+            import argparse
+
+            parser = argparse.ArgumentParser()
+            mod.add_arguments(parser)
+            mod.configure(parser.parse_args(argv))
+            with phase("read"):
+                count("files", 2)
+            if exit_code is not None:
+                raise SystemExit(exit_code)
+
+        return main(argv)
+
+    def test_silent_by_default(self, capsys):
+        self.main([])
+        assert capsys.readouterr().err == ""
+
+    def test_profile_prints_to_stderr(self, capsys):
+        self.main(["--profile"])
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "demo:" in captured.err
+        assert "read" in captured.err
+        assert "files" in captured.err
+
+    def test_json_written_on_exit(self, tmp_path: Path):
+        path = tmp_path / "out" / "timings.json"
+        with pytest.raises(SystemExit):
+            self.main(["--timings-json", str(path)], exit_code=1)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["version"] == mod.TIMINGS_VERSION
+        assert data["script"] == "demo"
+        assert data["counters"] == {"files": 2}
+        assert set(data["phases"]) == {"read", "other"}
+        assert sum(data["phases"].values()) == pytest.approx(data["wall_seconds"])
+
+    def test_each_run_starts_fresh(self, tmp_path: Path):
+        path = tmp_path / "timings.json"
+        self.main(["--timings-json", str(path)])
+        self.main(["--timings-json", str(path)])
+        assert json.loads(path.read_text(encoding="utf-8"))["counters"] == {"files": 2}
+
+    def test_nested_main_records_into_outer_run(self, tmp_path: Path, capsys):
+        path = tmp_path / "timings.json"
+
+        @mod.profiled("outer")
+        def outer(argv):
+            import argparse
+
+            parser = argparse.ArgumentParser()
+            mod.add_arguments(parser)
+            mod.configure(parser.parse_args(argv))
+            self.main(["--profile"])
+
+        outer(["--timings-json", str(path)])
+        # The inner --profile is ignored and its counters land in the outer run
+        assert capsys.readouterr().err == ""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["script"] == "outer"
+        assert data["counters"] == {"files": 2}
+
+
+class TestScript:
+    def test_validate_links_timings(self, tmp_path: Path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "a.md").write_text("# A\n\n[b](b.md) [self](#a)\n", encoding="utf-8")
+        (tmp_path / "docs" / "b.md").write_text("# B\n\n[a](a.md#a)\n", encoding="utf-8")
+        out = tmp_path / "timings.json"
+
+        validate_links.main(["--timings-json", str(out)])
+        data = json.loads(out.read_text(encoding="utf-8"))
+        assert data["script"] == "validate_links"
+        assert {"discovery", "read", "parse", "resolve"} <= set(data["phases"])
+        assert data["counters"]["files"] == 2
+        assert data["counters"]["links_checked"] == 3
+        assert data["counters"]["bytes_read"] > 0
@@ -0,0 +1,219 @@
+"""Tests for scripts/repo_scan.py."""
+
+from pathlib import Path
+
+import pytest
+
+import repo_scan as mod
+
+
+class TestParseFrontMatter:
+    def test_block_list(self):
+        fields = mod.parse_front_matter("---\nmakers:\n  - alice\n  - bob\n---\n")
+        assert fields["makers"] == ["alice", "bob"]
+
+    def test_no_frontmatter(self):
+        assert mod.parse_front_matter("# Heading\n") is None
+
+
+class TestReadFrontMatter:
+    SAMPLES = [
+        '---\ntitle: "T"\nstatus: accepted\n---\n# Body\n',
+        "---\ndescription: |\n  one\n  two\nname: x\n---\nbody\n",
+        "---\nmakers:\n  - a\n  - b\ntags: [x, y]\nnull_field: null\n---\n",
+        "---  \n\nname: spaced\n---\n",
+        "---\nname: x\n----\nrest\n",
+        "---\n---\nname: late\n---\n",
+        "# No front matter\n---\nname: x\n---\n",
+        "---\nname: unterminated\n",
+        "",
+    ]
+
+    def test_same_fields_as_full_read(self, tmp_path: Path):
+        for i, text in enumerate(self.SAMPLES):
+            p = tmp_path / f"{i}.md"
+            p.write_text(text, encoding="utf-8")
+            expected = mod.parse_front_matter(p.read_text(encoding="utf-8"))
+            assert mod.parse_front_matter(mod.read_front_matter(p)) == expected, text
+
+    def test_body_not_read(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        # Invalid UTF-8 in the body would fail a full read_text()
+        p.write_bytes(b"---\nname: x\n---\n" + b"\xff" * 1_000_000)
+        assert mod.read_front_matter(p) == "---\nname: x\n---\n"
+
+    def test_size_cap(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text("---\n" + "k: v\n" * 100 + "---\n", encoding="utf-8")
+        assert mod.read_front_matter(p, max_bytes=100) == ""
+        assert mod.read_front_matter(p).startswith("---\nk: v\n")
+
+    def test_document_front_matter_reads_header_only(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_bytes(b"---\nname: x\n---\n\xff")
+        doc = mod.Snapshot().document(p)
+        assert doc.front_matter == {"name": "x"}
+        assert "raw" not in doc.__dict__
+
+
+class TestExtractLinks:
+    def test_line_numbers(self):
+        links = mod.extract_links("# Doc\n\n[a](a.md) and [b](b.md)\n")
+        assert links == [mod.Link(3, "a", "a.md"), mod.Link(3, "b", "b.md")]
+
+    def test_skips_code(self):
+        text = "`[x](x.md)`\n```\n[y](y.md)\n```\n[z](z.md)\n"
+        assert [link.target for link in mod.extract_links(text)] == ["z.md"]
+
+
+class TestExtractHeadings:
+    def test_levels_and_closing_hashes(self):
+        headings = mod.extract_headings("# Title\n\n## Section ##\n")
+        assert headings == [mod.Heading(1, 1, "Title"), mod.Heading(3, 2, "Section")]
+
+    def test_skips_code_blocks(self):
+        assert mod.extract_headings("```\n# not a heading\n```\n") == []
+
+    def test_skips_tilde_fences_and_indented_code(self):
+        text = "~~~\n# shell comment\n```\n~~~\n\n    # indented\n\n## Real\n"
+        assert mod.extract_headings(text) == [mod.Heading(8, 2, "Real")]
+
+    def test_setext(self):
+        text = "Title\n=====\n\nTwo\nlines\n---\n\nText\n\n---\n"
+        assert mod.extract_headings(text) == [
+            mod.Heading(1, 1, "Title"),
+            mod.Heading(4, 2, "Two lines"),
+        ]
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "---\ntitle: x\n---\n",
+            "- item\n---\n",
+            "> quote\n---\n",
+            "```\ncode\n```\n---\n",
+            "    code\n---\n",
+        ],
+    )
+    def test_not_setext(self, text):
+        assert mod.extract_headings(text) == []
+
+
+class TestExtractHtmlAnchors:
+    def test_id_and_name(self):
+        text = '<a id="Setup"></a>\nSee <a name=\'old-name\'>here</a>.\n<b id="no">\n'
+        assert mod.extract_html_anchors(text) == ["Setup", "old-name"]
+
+    def test_skips_code(self):
+        assert mod.extract_html_anchors('```\n<a id="x"></a>\n```\n') == []
+
+
+class TestHeadingAnchors:
+    def test_github_slugs(self):
+        assert mod.slugify("Hello, World!") == "hello-world"
+        assert mod.slugify("Use `foo_bar` -- now") == "use-foo_bar----now"
+        assert mod.slugify("See [the guide](guide.md)") == "see-the-guide"
+        assert mod.slugify("Café Ümlaut") == "café-ümlaut"
+
+    def test_duplicates_suffixed(self):
+        headings = mod.extract_headings("# Notes\n## Notes\n## Notes-1\n### Notes\n")
+        assert mod.heading_anchors(headings) == {"notes", "notes-1", "notes-1-1", "notes-2"}
+
+    def test_document_anchors(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text("# Title\n```\n# not a heading\n```\n## Sub Section\n", encoding="utf-8")
+        assert mod.Snapshot().document(p).anchors == {"title", "sub-section"}
+
+    def test_document_explicit_anchors(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text('Title\n===\n\n<a id="Legacy-Name"></a>\n', encoding="utf-8")
+        assert mod.Snapshot().document(p).anchors == {"title", "legacy-name"}
+
+
+class TestSnapshot:
+    def _tree(self, tmp_path: Path) -> Path:
+        (tmp_path / "plugins" / "p1" / "skills" / "s1").mkdir(parents=True)
+        (tmp_path / "plugins" / "p1" / "skills" / "s1" / "SKILL.md").write_text("x")
+        (tmp_path / "plugins" / "p1" / "agents").mkdir()
+        (tmp_path / "plugins" / "p1" / "agents" / "a.md").write_text("x")
+        (tmp_path / "plugins" / "p1" / "agents" / "notes.txt").write_text("x")
+        return tmp_path
+
+    def test_glob_matches_pathlib(self, tmp_path: Path):
+        root = self._tree(tmp_path)
+        snapshot = mod.Snapshot()
+        for pattern in ("*/skills/*/SKILL.md", "*/agents/*.md", "*/agents/*"):
+            expected = sorted((root / "plugins").glob(pattern))
+            assert snapshot.glob(root / "plugins", pattern) == expected
+
+    def test_glob_missing_directory(self, tmp_path: Path):
+        assert mod.Snapshot().glob(tmp_path / "missing", "*.md") == []
+
+    def test_rglob(self, tmp_path: Path):
+        root = self._tree(tmp_path)
+        found = mod.Snapshot().rglob(root / "plugins", "*.md")
+        assert found == sorted((root / "plugins").rglob("*.md"))
+
+    def test_lists_each_directory_once(self, tmp_path: Path, monkeypatch):
+        root = self._tree(tmp_path)
+        calls = []
+        real_scandir = mod.os.scandir
+        monkeypatch.setattr(mod.os, "scandir", lambda p: calls.append(p) or real_scandir(p))
+        snapshot = mod.Snapshot()
+        snapshot.glob(root / "plugins", "*/agents/*.md")
+        snapshot.glob(root / "plugins", "*/agents/*.md")
+        assert len(calls) == len(set(calls))
+
+    def test_document_is_shared_and_read_once(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text("---\nname: one\n---\n[a](b.md)\n", encoding="utf-8")
+        snapshot = mod.Snapshot()
+        doc = snapshot.document(p)
+        assert doc.links == [mod.Link(4, "a", "b.md")]
+        p.write_text("changed", encoding="utf-8")
+        assert snapshot.document(p) is doc
+        # Served from the text already read, not a second read
+        assert doc.front_matter == {"name": "one"}
+
+    def test_forget_rereads(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_text("old", encoding="utf-8")
+        snapshot = mod.Snapshot()
+        assert snapshot.document(p).text == "old"
+        p.write_text("new", encoding="utf-8")
+        snapshot.forget(p)
+        assert snapshot.document(p).text == "new"
+
+    def test_crlf_normalized(self, tmp_path: Path):
+        p = tmp_path / "doc.md"
+        p.write_bytes(b"---\r\nname: x\r\n---\r\n")
+        doc = mod.Snapshot().document(p)
+        assert doc.raw == b"---\r\nname: x\r\n---\r\n"
+        assert doc.front_matter == {"name": "x"}
+
+
+class TestExistsExact:
+    def test_exact_case_only(self, tmp_path: Path):
+        (tmp_path / "Dir").mkdir()
+        (tmp_path / "Dir" / "File.md").write_text("x")
+        snapshot = mod.Snapshot()
+        assert snapshot.exists_exact(tmp_path, "Dir/File.md")
+        assert snapshot.exists_exact(tmp_path / "Dir", "../Dir/./File.md")
+        assert not snapshot.exists_exact(tmp_path, "dir/File.md")
+        assert not snapshot.exists_exact(tmp_path, "Dir/file.md")
+
+    def test_result_cached_until_forget(self, tmp_path: Path):
+        snapshot = mod.Snapshot()
+        assert not snapshot.exists_exact(tmp_path, "new.md")
+        (tmp_path / "new.md").write_text("x")
+        assert not snapshot.exists_exact(tmp_path, "new.md")
+        snapshot.forget(tmp_path / "new.md")
+        assert snapshot.exists_exact(tmp_path, "new.md")
+
+
+class TestGetSnapshot:
+    def test_shared_until_reset(self):
+        first = mod.get_snapshot()
+        assert mod.get_snapshot() is first
+        mod.reset_snapshot()
+        assert mod.get_snapshot() is not first
@@ -0,0 +1,147 @@
+"""Tests for scripts/search_docs.py."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import search_docs as mod
+from fetch_engine import save_manifest
+
+
+@pytest.fixture
+def mirror(tmp_path: Path) -> Path:
+    mirror = tmp_path / "mirror"
+    (mirror / "en").mkdir(parents=True)
+    (mirror / "en" / "hooks.md").write_text(
+        "# Hooks reference\n\n## Timeout\n\nA hook is killed after its timeout expires.\n",
+        encoding="utf-8",
+    )
+    (mirror / "en" / "skills.md").write_text(
+        "# Agent Skills\n\nSkills load instructions on demand.\n", encoding="utf-8"
+    )
+    save_manifest(
+        mirror,
+        {
+            "en/hooks": {"sha256": "x", "title": "Hooks", "description": "Run shell commands"},
+            "en/skills": {"sha256": "y"},
+        },
+    )
+    return mirror
+
+
+@pytest.fixture
+def conn(tmp_path: Path):
+    conn = mod.connect(tmp_path / "search.sqlite")
+    yield conn
+    conn.close()
+
+
+class TestUpdateIndex:
+    def test_titles_from_manifest_then_heading(self, conn, mirror: Path):
+        assert mod.update_index(conn, [mirror]) == (2, 0, 0)
+        titles = dict(conn.execute("SELECT path, title FROM pages"))
+        assert titles == {
+            (mirror / "en" / "hooks.md").as_posix(): "Hooks",
+            (mirror / "en" / "skills.md").as_posix(): "Agent Skills",
+        }
+
+    def test_incremental(self, conn, mirror: Path):
+        mod.update_index(conn, [mirror])
+        assert mod.update_index(conn, [mirror]) == (0, 2, 0)
+
+        (mirror / "en" / "skills.md").write_text("# Agent Skills\n\nNow with plugins.\n")
+        (mirror / "en" / "hooks.md").unlink()
+        assert mod.update_index(conn, [mirror]) == (1, 0, 1)
+        assert [r[0] for r in mod.search(conn, "plugins")] == [
+            (mirror / "en" / "skills.md").as_posix()
+        ]
+        assert mod.search(conn, "timeout") == []
+        assert conn.execute("SELECT COUNT(*) FROM files").fetchone() == (1,)
+
+    def test_metadata_change_reindexes(self, conn, mirror: Path):
+        mod.update_index(conn, [mirror])
+        save_manifest(
+            mirror,
+            {
+                "en/hooks": {"sha256": "x", "title": "Hooks", "description": "Intercept tools"},
+                "en/skills": {"sha256": "y"},
+            },
+        )
+        assert mod.update_index(conn, [mirror]) == (1, 1, 0)
+        assert [r[1] for r in mod.search(conn, "intercept")] == ["Hooks"]
+        assert mod.search(conn, "shell") == []
+
+    def test_invalid_utf8_replaced(self, conn, mirror: Path):
+        (mirror / "en" / "legacy.md").write_bytes(b"# Legacy\n\nCaf\xe9 timeout\n")
+        assert mod.update_index(conn, [mirror]) == (3, 0, 0)
+        [(path, title, _)] = mod.search(conn, "legacy")
+        assert title == "Legacy"
+        body = conn.execute("SELECT body FROM pages WHERE path = ?", (path,)).fetchone()[0]
+        assert "Caf\ufffd timeout" in body
+
+    def test_other_mirrors_kept(self, conn, mirror: Path, tmp_path: Path):
+        other = tmp_path / "other"
+        other.mkdir()
+        (other / "page.md").write_text("# Other\n\ntimeout\n")
+        mod.update_index(conn, [mirror, other])
+        assert mod.update_index(conn, [other]) == (0, 1, 0)
+        assert len(mod.search(conn, "timeout")) == 2
+
+
+class TestSearch:
+    def test_ranked_with_snippet(self, conn, mirror: Path):
+        mod.update_index(conn, [mirror])
+        results = mod.search(conn, mod.to_fts_query(["timeout"]))
+        assert len(results) == 1
+        path, title, snippet = results[0]
+        assert title == "Hooks"
+        assert "[timeout]" in snippet
+
+    def test_title_outranks_body(self, conn, mirror: Path):
+        (mirror / "en" / "skills.md").write_text("# Agent Skills\n\nHooks hooks hooks.\n")
+        mod.update_index(conn, [mirror])
+        assert [r[1] for r in mod.search(conn, "hooks")] == ["Hooks", "Agent Skills"]
+
+    def test_description_searched(self, conn, mirror: Path):
+        mod.update_index(conn, [mirror])
+        assert [r[1] for r in mod.search(conn, mod.to_fts_query(["shell"]))] == ["Hooks"]
+
+    def test_invalid_raw_query(self, conn, mirror: Path):
+        mod.update_index(conn, [mirror])
+        with pytest.raises(sqlite3.OperationalError):
+            mod.search(conn, "AND (")
+
+
+class TestToFtsQuery:
+    def test_quotes_terms(self):
+        assert mod.to_fts_query(["pre-tool", "use"]) == '"pre-tool" "use"'
+
+    def test_escapes_quotes(self):
+        assert mod.to_fts_query(['say "hi"']) == '"say ""hi"""'
+
+
+class TestMain:
+    def test_update_and_search(self, mirror: Path, tmp_path: Path, capsys):
+        db = tmp_path / "search.sqlite"
+        mod.main(["--update", "--mirror", str(mirror), "--db", str(db), "killed"])
+        out = capsys.readouterr().out
+        assert "Indexed 2 page(s), 0 unchanged, 0 removed." in out
+        assert "hooks.md  Hooks" in out
+        assert "1 result(s) in" in out
+
+    def test_missing_db(self, tmp_path: Path, capsys):
+        with pytest.raises(SystemExit):
+            mod.main(["--db", str(tmp_path / "none.sqlite"), "hooks"])
+        assert "run with --update first" in capsys.readouterr().err
+
+    def test_update_mirror_reports(self, mirror: Path, tmp_path: Path, capsys):
+        mod.update_mirror(mirror, tmp_path / "search.sqlite")
+        assert "Search index: 2 page(s) indexed, 0 unchanged, 0 removed." in (
+            capsys.readouterr().out
+        )
+
+    def test_update_mirror_invalid_utf8(self, mirror: Path, tmp_path: Path, capsys):
+        (mirror / "en" / "legacy.md").write_bytes(b"# Legacy\n\xff\n")
+        mod.update_mirror(mirror, tmp_path / "search.sqlite")
+        assert "Search index: 3 page(s) indexed" in capsys.readouterr().out
@@ -1,7 +1,11 @@
 """Tests for scripts/validate_frontmatter.py."""
 
+import json
 from pathlib import Path
 
+import pytest
+
+import findings
 import validate_frontmatter as mod
 
 
@@ -67,7 +71,7 @@ class TestValidateAdr:
             "decision-makers": ["alice"],
         }
         errors = mod.validate_adr(self._path(), fields)
-        assert any("invalid status" in e for e in errors)
+        assert "invalid-status" in {code for code, _ in errors}
 
     def test_invalid_date(self):
         fields = {
@@ -77,7 +81,7 @@ class TestValidateAdr:
             "decision-makers": ["alice"],
         }
         errors = mod.validate_adr(self._path(), fields)
-        assert any("invalid date" in e for e in errors)
+        assert "invalid-date" in {code for code, _ in errors}
 
     def test_all_valid_statuses(self):
         for status in mod.ADR_STATUSES:
@@ -88,7 +92,7 @@ class TestValidateAdr:
                 "decision-makers": ["alice"],
             }
             errors = mod.validate_adr(self._path(), fields)
-            assert not any("invalid status" in e for e in errors)
+            assert "invalid-status" not in {code for code, _ in errors}
 
     def test_impossible_date(self):
         fields = {
@@ -98,7 +102,7 @@ class TestValidateAdr:
             "decision-makers": ["alice"],
         }
         errors = mod.validate_adr(self._path(), fields)
-        assert any("invalid date" in e for e in errors)
+        assert "invalid-date" in {code for code, _ in errors}
 
 
 class TestValidateResearch:
@@ -125,7 +129,7 @@ class TestValidateResearch:
             "started": "2026-02-10",
         }
         errors = mod.validate_research(self._path(), fields)
-        assert any("invalid status" in e for e in errors)
+        assert "invalid-status" in {code for code, _ in errors}
 
     def test_all_valid_statuses(self):
         for status in mod.RESEARCH_STATUSES:
@@ -135,7 +139,7 @@ class TestValidateResearch:
                 "started": "2026-02-10",
             }
             errors = mod.validate_research(self._path(), fields)
-            assert not any("invalid status" in e for e in errors)
+            assert "invalid-status" not in {code for code, _ in errors}
 
     def test_invalid_started_date(self):
         fields = {
@@ -144,7 +148,7 @@ class TestValidateResearch:
             "started": "February",
         }
         errors = mod.validate_research(self._path(), fields)
-        assert any("invalid started date" in e for e in errors)
+        assert "invalid-date" in {code for code, _ in errors}
 
 
 class TestValidateSkill:
@@ -166,17 +170,17 @@ class TestValidateSkill:
 
     def test_non_kebab_name(self):
         errors = mod.validate_skill(self._path(), self._valid_fields(name="MySkill"))
-        assert any("not kebab-case" in e for e in errors)
+        assert "invalid-name" in {code for code, _ in errors}
 
     def test_kebab_case_variants(self):
         valid = ["my-skill", "a", "skill-v2", "a-b-c"]
         invalid = ["MySkill", "my_skill", "MY-SKILL", "-leading", "trailing-", "1-starts-with-digit"]
         for name in valid:
             errors = mod.validate_skill(self._path(), self._valid_fields(name=name))
-            assert not any("kebab" in e for e in errors), f"{name} should be valid"
+            assert "invalid-name" not in {code for code, _ in errors}, f"{name} should be valid"
         for name in invalid:
             errors = mod.validate_skill(self._path(), self._valid_fields(name=name))
-            assert any("kebab" in e for e in errors), f"{name} should be invalid"
+            assert "invalid-name" in {code for code, _ in errors}, f"{name} should be invalid"
 
 
 class TestValidateAgent:
@@ -199,7 +203,7 @@ class TestValidateAgent:
 
     def test_invalid_model(self):
         errors = mod.validate_agent(self._path(), self._valid_fields(model="gpt-4"))
-        assert any("invalid model" in e for e in errors)
+        assert "invalid-model" in {code for code, _ in errors}
 
     def test_missing_required_fields(self):
         errors = mod.validate_agent(self._path(), {})
@@ -209,4 +213,130 @@ class TestValidateAgent:
         fields = self._valid_fields()
         del fields["model"]
         errors = mod.validate_agent(self._path(), fields)
-        assert any("'model'" in e for e in errors)
+        assert ("missing-field", "missing required field 'model'") in errors
+
+
+class TestCollectAndValidate:
+    def _tree(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch") -> None:
+        monkeypatch.setattr(mod, "DECISIONS_DIR", tmp_path / "decisions")
+        monkeypatch.setattr(mod, "RESEARCH_DIR", tmp_path / "research")
+        monkeypatch.setattr(mod, "PLUGINS_DIR", tmp_path / "plugins")
+        (tmp_path / "decisions").mkdir()
+        (tmp_path / "research").mkdir()
+        for i in range(1, 8):
+            status = "accepted" if i % 2 else "bogus"
+            (tmp_path / "decisions" / f"{i:04d}-adr.md").write_text(
+                f'---\ntitle: "ADR {i}"\nstatus: {status}\ndate: 2026-02-13\n'
+                "decision-makers: [alice]\n---\n",
+                encoding="utf-8",
+            )
+        (tmp_path / "decisions" / "_TEMPLATE.md").write_text("no front matter")
+        (tmp_path / "research" / "2026-01-01-x.md").write_text("no front matter")
+        for i in range(5):
+            skill = tmp_path / "plugins" / f"p{i}" / "skills" / f"s{i}"
+            skill.mkdir(parents=True)
+            name = f"skill-{i}" if i % 2 else f"Skill{i}"
+            (skill / "SKILL.md").write_text(
+                f"---\nname: {name}\ndescription: d\nauthor: a\nlicense: MIT\n---\n",
+                encoding="utf-8",
+            )
+            agents = tmp_path / "plugins" / f"p{i}" / "agents"
+            agents.mkdir()
+            (agents / "agent.md").write_text(f"---\nname: a{i}\n---\n", encoding="utf-8")
+
+    def test_reports_each_document_type(self, tmp_path: Path, monkeypatch, capsys):
+        self._tree(tmp_path, monkeypatch)
+        errors = mod.collect_and_validate()
+        out = capsys.readouterr().out
+        assert "Validated 7 ADR(s), 0 research doc(s), 5 skill(s), 5 agent(s)" in out
+        assert sum("invalid status" in e for e in errors) == 3
+        assert sum("no front matter" in e for e in errors) == 1
+        assert sum("not kebab-case" in e for e in errors) == 3
+
+    def test_parallel_matches_serial(self, tmp_path: Path, monkeypatch, capsys):
+        self._tree(tmp_path, monkeypatch)
+        serial = mod.collect_and_validate()
+        serial_out = capsys.readouterr().out
+        parallel = mod.collect_and_validate(jobs=3)
+        assert parallel == serial
+        assert capsys.readouterr().out == serial_out
+
+
+class TestChangedSince:
+    def test_classify_matches_discover(self, tmp_path: Path, monkeypatch):
+        TestCollectAndValidate()._tree(tmp_path, monkeypatch)
+        found = mod.discover()
+        everything = {str(p) for p in tmp_path.rglob("*.md")}
+        assert mod.discover(everything) == found
+
+    def test_only_changed_documents(self, git_repo, tmp_path: Path, capsys):
+        adr = Path("docs/decisions/0001-a.md")
+        adr.parent.mkdir(parents=True)
+        adr.write_text("---\ntitle: A\nstatus: bogus\n---\n", encoding="utf-8")
+        git_repo()
+        skill = Path("plugins/p/skills/s/SKILL.md")
+        skill.parent.mkdir(parents=True)
+        skill.write_text("---\nname: Bad Name\n---\n", encoding="utf-8")
+        Path("docs/decisions/_INDEX.md").write_text("# Index\n", encoding="utf-8")
+
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD"])
+        out = capsys.readouterr().out
+        assert "Validated 0 ADR(s), 0 research doc(s), 1 skill(s), 0 agent(s)" in out
+        assert "not kebab-case" in out
+        assert "bogus" not in out
+
+    def test_rule_change_validates_everything(self, git_repo, tmp_path: Path, capsys):
+        adr = Path("docs/decisions/0001-a.md")
+        adr.parent.mkdir(parents=True)
+        adr.write_text("---\ntitle: A\nstatus: bogus\n---\n", encoding="utf-8")
+        git_repo()
+        Path("scripts").mkdir()
+        Path("scripts/front_matter.py").write_text("# stricter parsing\n", encoding="utf-8")
+
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD"])
+        out = capsys.readouterr().out
+        assert "Validated 1 ADR(s)" in out
+        assert "invalid status 'bogus'" in out
+
+    def test_bad_ref(self, git_repo, capsys):
+        git_repo()
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "nope"])
+        assert "error: git diff failed" in capsys.readouterr().out
+
+
+class TestNdjson:
+    def test_stream(self, tmp_path: Path, monkeypatch, capsys):
+        TestCollectAndValidate()._tree(tmp_path, monkeypatch)
+        expected = mod.collect_and_validate()
+        capsys.readouterr()
+
+        with pytest.raises(SystemExit):
+            mod.main(["--ndjson"])
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert len(records) == len(expected)
+        assert all(list(r) == list(findings.FIELDS) for r in records)
+        assert {r["check"] for r in records} == {"frontmatter"}
+        assert {r["line"] for r in records} == {None}
+        assert [f"{r['path']}: {r['message']}" for r in records] == expected
+        codes = {r["code"] for r in records}
+        assert {"invalid-status", "no-front-matter", "invalid-name", "missing-field"} <= codes
+        assert "Validated 7 ADR(s)" in captured.err
+
+    @pytest.mark.parametrize("jobs", ["1", "3"])
+    def test_max_findings(self, tmp_path: Path, monkeypatch, capsys, jobs):
+        TestCollectAndValidate()._tree(tmp_path, monkeypatch)
+        with pytest.raises(SystemExit):
+            mod.main(["--max-findings", "2", "--jobs", jobs])
+        out = capsys.readouterr().out
+        assert "2 error(s) found (stopped after --max-findings 2):" in out
+        assert out.count("  ERROR: ") == 2
+
+    def test_negative_jobs_rejected(self, capsys):
+        with pytest.raises(SystemExit) as exc:
+            mod.main(["--jobs", "-1"])
+        assert exc.value.code == 2
+        assert "must be at least 0, not -1" in capsys.readouterr().err
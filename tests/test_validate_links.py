@@ -1,8 +1,12 @@
 """Tests for scripts/validate_links.py."""
 
+import json
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
 import validate_links as mod
 
 
@@ -49,16 +53,35 @@ class TestResolveLink:
 
     def test_link_with_anchor(self, tmp_path: Path):
         target = tmp_path / "target.md"
-        target.write_text("# Target", encoding="utf-8")
+        target.write_text("# Target\n\n## The Section\n", encoding="utf-8")
         source = tmp_path / "source.md"
         source.write_text("", encoding="utf-8")
-        assert mod.resolve_link(source, "target.md#section") is True
+        assert mod.resolve_link(source, "target.md#the-section") is True
+        assert mod.resolve_link(source, "target.md#The%20Section") is False
+        assert mod.resolve_link(source, "target.md#missing") is False
 
     def test_pure_anchor(self, tmp_path: Path):
         source = tmp_path / "source.md"
-        source.write_text("", encoding="utf-8")
-        # Pure anchor after stripping is empty, should return True
+        source.write_text("# Source\n\n## Section\n", encoding="utf-8")
         assert mod.resolve_link(source, "#section") is True
+        assert mod.resolve_link(source, "#Section") is True
+        assert mod.resolve_link(source, "#other") is False
+
+    def test_setext_and_explicit_anchors(self, tmp_path: Path):
+        target = tmp_path / "target.md"
+        target.write_text('Target\n======\n\n<a name="old"></a>\n', encoding="utf-8")
+        source = tmp_path / "source.md"
+        source.write_text("", encoding="utf-8")
+        assert mod.resolve_link(source, "target.md#target") is True
+        assert mod.resolve_link(source, "target.md#old") is True
+
+    def test_anchor_into_non_markdown_not_checked(self, tmp_path: Path):
+        (tmp_path / "script.py").write_text("", encoding="utf-8")
+        (tmp_path / "subdir").mkdir()
+        source = tmp_path / "source.md"
+        source.write_text("", encoding="utf-8")
+        assert mod.resolve_link(source, "script.py#L10") is True
+        assert mod.resolve_link(source, "subdir#x") is True
 
     def test_directory_link(self, tmp_path: Path):
         subdir = tmp_path / "subdir"
@@ -86,6 +109,32 @@ class TestResolveLink:
         assert mod.resolve_link(source, "../target.md") is True
 
 
+class TestCaseSensitiveExists:
+    def test_case_mismatch_detected(self, tmp_path: Path):
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "Skills.md").write_text("", encoding="utf-8")
+        assert mod.case_sensitive_exists(tmp_path, "docs/Skills.md") is True
+        assert mod.case_sensitive_exists(tmp_path, "docs/skills.md") is False
+        assert mod.case_sensitive_exists(tmp_path, "Docs/Skills.md") is False
+
+    def test_file_used_as_directory(self, tmp_path: Path):
+        (tmp_path / "file.md").write_text("", encoding="utf-8")
+        assert mod.case_sensitive_exists(tmp_path, "file.md/other.md") is False
+
+    def test_directories_listed_once(self, tmp_path: Path, monkeypatch):
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "a.md").write_text("", encoding="utf-8")
+        source = tmp_path / "sub" / "source.md"
+        calls = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(
+            "repo_scan.os.scandir", lambda p: calls.append(p) or real_scandir(p)
+        )
+        for target in ("a.md", "../sub/a.md", "missing.md", "../sub/missing.md"):
+            mod.resolve_link(source, target)
+        assert len(calls) == len(set(calls)) == 2
+
+
 class TestLinkExtraction:
     """Test that the LINK_RE regex works correctly."""
 
@@ -183,3 +232,218 @@ class TestCodeBlockSkipping:
 
         output = captured.getvalue()
         assert "Checked 2 internal link(s)" in output
+
+
+class TestReferenceLinks:
+    """Test that reference-style links are resolved and checked."""
+
+    def test_broken_reference_reported_at_use(self, tmp_path: Path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text(
+            "# A\n\nSee [the guide][guide] and [b].\n\n[guide]: missing.md\n[b]: b.md\n",
+            encoding="utf-8",
+        )
+        (docs / "b.md").write_text("", encoding="utf-8")
+
+        total, broken, _ = mod.check_links(mod.collect_markdown_files())
+        assert total == 2
+        assert broken == [(Path("docs/a.md"), 3, "the guide", "missing.md")]
+
+
+class TestIncrementalCache:
+    """Test that --cache reuses unchanged files and notices target changes."""
+
+    def _setup(self, tmp_path: Path, monkeypatch) -> Path:
+        monkeypatch.chdir(tmp_path)
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text("[b](b.md) [c](sub/c.md)\n", encoding="utf-8")
+        (docs / "b.md").write_text("[a](a.md)\n", encoding="utf-8")
+        (docs / "sub").mkdir()
+        (docs / "sub" / "c.md").write_text("", encoding="utf-8")
+        return docs
+
+    def _run(self, cache: dict | None = None):
+        import repo_scan
+
+        repo_scan.reset_snapshot()
+        return mod.check_links(mod.collect_markdown_files(), cache)
+
+    def test_unchanged_files_not_reextracted(self, tmp_path: Path, monkeypatch):
+        self._setup(tmp_path, monkeypatch)
+        total, broken, cache = self._run()
+        assert (total, broken) == (3, [])
+
+        import repo_scan
+
+        extracted = []
+        real_extract = repo_scan.extract_links
+        monkeypatch.setattr(
+            repo_scan, "extract_links", lambda text: extracted.append(text) or real_extract(text)
+        )
+        total, broken, _ = self._run(cache)
+        assert (total, broken) == (3, [])
+        assert extracted == []
+
+    def test_changed_file_reextracted(self, tmp_path: Path, monkeypatch):
+        docs = self._setup(tmp_path, monkeypatch)
+        _, _, cache = self._run()
+        (docs / "b.md").write_text("[a](a.md)\n[gone](gone.md)\n", encoding="utf-8")
+        total, broken, _ = self._run(cache)
+        assert total == 4
+        assert broken == [(Path("docs/b.md"), 2, "gone", "gone.md")]
+
+    def test_deleted_target_detected(self, tmp_path: Path, monkeypatch):
+        docs = self._setup(tmp_path, monkeypatch)
+        _, _, cache = self._run()
+        (docs / "sub" / "c.md").unlink()
+        _, broken, cache = self._run(cache)
+        assert broken == [(Path("docs/a.md"), 1, "c", "sub/c.md")]
+        assert cache["reverse"]["docs/sub/c.md"] == ["docs/a.md"]
+
+    def test_renamed_target_detected(self, tmp_path: Path, monkeypatch):
+        docs = self._setup(tmp_path, monkeypatch)
+        (docs / "a.md").write_text("[b](b.md) [c](sub/C.md)\n", encoding="utf-8")
+        _, broken, cache = self._run()
+        assert len(broken) == 1
+        (docs / "sub" / "c.md").rename(docs / "sub" / "C.md")
+        _, broken, _ = self._run(cache)
+        assert broken == []
+
+    def test_removed_heading_detected(self, tmp_path: Path, monkeypatch):
+        docs = self._setup(tmp_path, monkeypatch)
+        (docs / "a.md").write_text("# A\n\n[b](b.md#usage) [top](#a)\n", encoding="utf-8")
+        (docs / "b.md").write_text("## Usage\n", encoding="utf-8")
+        total, broken, cache = self._run()
+        assert (total, broken) == (2, [])
+        assert cache["files"]["docs/b.md"]["anchors"] == ["usage"]
+
+        (docs / "b.md").write_text("## Setup\n", encoding="utf-8")
+        _, broken, _ = self._run(cache)
+        assert broken == [(Path("docs/a.md"), 3, "b", "b.md#usage")]
+
+    def test_cache_round_trip(self, tmp_path: Path, monkeypatch):
+        self._setup(tmp_path, monkeypatch)
+        cache_path = tmp_path / ".cache" / "links.json"
+        import io
+
+        monkeypatch.setattr(sys, "stdout", io.StringIO())
+        mod.main(["--cache", str(cache_path)])
+        cache = mod.load_cache(cache_path)
+        assert set(cache["files"]) == {"docs/a.md", "docs/b.md", "docs/sub/c.md"}
+
+    def test_corrupt_cache_ignored(self, tmp_path: Path):
+        cache_path = tmp_path / "links.json"
+        cache_path.write_text("{not json", encoding="utf-8")
+        assert mod.load_cache(cache_path) == {}
+
+
+class TestChangedSince:
+    def _setup(self, tmp_path: Path, commit) -> Path:
+        docs = tmp_path / "docs"
+        (docs / "sub").mkdir(parents=True)
+        (docs / "a.md").write_text("[c](sub/c.md)\n", encoding="utf-8")
+        (docs / "b.md").write_text("[d](d.md) [dir](sub/)\n", encoding="utf-8")
+        (docs / "d.md").write_text("# D\n", encoding="utf-8")
+        (docs / "sub" / "c.md").write_text("# C\n", encoding="utf-8")
+        (docs / "unrelated.md").write_text("[d](d.md#d)\n", encoding="utf-8")
+        (tmp_path / "README.md").write_text("[docs](docs/)\n", encoding="utf-8")
+        commit()
+        return docs
+
+    def test_nothing_changed(self, git_repo, tmp_path: Path):
+        self._setup(tmp_path, git_repo)
+        assert mod.files_changed_since("HEAD") == []
+
+    def test_renamed_target_pulls_in_linker(self, git_repo, tmp_path: Path):
+        docs = self._setup(tmp_path, git_repo)
+        (docs / "sub" / "c.md").rename(docs / "sub" / "e.md")
+        files = mod.files_changed_since("HEAD")
+        assert files == [Path("docs/a.md"), Path("docs/sub/e.md")]
+        _, broken, _ = mod.check_links(files)
+        assert broken == [(Path("docs/a.md"), 1, "c", "sub/c.md")]
+
+    def test_deleted_directory_pulls_in_linker(self, git_repo, tmp_path: Path):
+        docs = self._setup(tmp_path, git_repo)
+        (docs / "sub" / "c.md").unlink()
+        (docs / "sub").rmdir()
+        files = mod.files_changed_since("HEAD")
+        assert files == [Path("docs/a.md"), Path("docs/b.md")]
+
+    def test_changed_headings_pull_in_linkers(self, git_repo, tmp_path: Path, capsys):
+        docs = self._setup(tmp_path, git_repo)
+        (docs / "d.md").write_text("# Renamed\n", encoding="utf-8")
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD"])
+        out = capsys.readouterr().out
+        assert "Scanning 3 markdown file(s)" in out
+        assert "docs/unrelated.md:1: [d](d.md#d)" in out
+
+    def test_rule_change_checks_everything(self, git_repo, tmp_path: Path):
+        self._setup(tmp_path, git_repo)
+        (tmp_path / "scripts").mkdir()
+        (tmp_path / "scripts" / "validate_links.py").write_text("# new rules\n", encoding="utf-8")
+        assert mod.files_changed_since("HEAD") == mod.collect_markdown_files()
+
+    def test_cache_not_combined(self, git_repo):
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD", "--cache"])
+
+
+class TestNdjson:
+    def _setup(self, tmp_path: Path, monkeypatch) -> None:
+        monkeypatch.chdir(tmp_path)
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text(
+            "# A\n\n[gone](gone.md)\n[b](b.md#nope)\n[ok](b.md#b)\n", encoding="utf-8"
+        )
+        (docs / "b.md").write_text("# B\n\n[self](#missing)\n", encoding="utf-8")
+
+    def test_stream(self, tmp_path: Path, monkeypatch, capsys):
+        self._setup(tmp_path, monkeypatch)
+        with pytest.raises(SystemExit):
+            mod.main(["--ndjson"])
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert records == [
+            {
+                "check": "links",
+                "path": os.path.join("docs", "a.md"),
+                "line": 3,
+                "code": "missing-target",
+                "message": "[gone](gone.md)",
+            },
+            {
+                "check": "links",
+                "path": os.path.join("docs", "a.md"),
+                "line": 4,
+                "code": "missing-anchor",
+                "message": "[b](b.md#nope)",
+            },
+            {
+                "check": "links",
+                "path": os.path.join("docs", "b.md"),
+                "line": 3,
+                "code": "missing-anchor",
+                "message": "[self](#missing)",
+            },
+        ]
+        assert "3 broken link(s) found:" in captured.err
+
+    def test_max_findings_leaves_cache(self, tmp_path: Path, monkeypatch, capsys):
+        self._setup(tmp_path, monkeypatch)
+        cache = tmp_path / "cache.json"
+        with pytest.raises(SystemExit):
+            mod.main(["--max-findings", "1", "--cache", str(cache)])
+        out = capsys.readouterr().out
+        assert "1 broken link(s) found (stopped after --max-findings 1):" in out
+        assert "gone.md" in out and "nope" not in out
+        assert not cache.exists()
+
+        with pytest.raises(SystemExit):
+            mod.main(["--cache", str(cache)])
+        assert "3 broken link(s) found:" in capsys.readouterr().out
+        assert cache.exists()
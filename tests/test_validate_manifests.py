@@ -3,6 +3,10 @@
 import json
 from pathlib import Path
 
+import pytest
+
+import plugin_catalog
+import repo_scan
 import validate_manifests as mod
 
 
@@ -133,3 +137,282 @@ class TestValidatePluginEntry:
         entry = {"name": "my-plugin"}
         errors = mod.validate_plugin_entry(entry, 0)
         assert any("missing 'source'" in e for e in errors)
+
+    @pytest.mark.parametrize("source", ["../..", "a/b", "My_Plugin", 3])
+    def test_invalid_source(self, source):
+        errors = mod.validate_plugin_entry({"name": "my-plugin", "source": source}, 0)
+        assert errors == [
+            f"plugins[0] (my-plugin): source {source!r} must be a kebab-case directory name "
+            f"in {mod.PLUGINS_DIR}/"
+        ]
+
+
+class TestChangedSince:
+    PLUGIN = {
+        "version": "1.0.0",
+        "description": "A plugin",
+        "author": {"name": "user"},
+        "license": "MIT",
+    }
+
+    def _setup(self, tmp_path: Path, commit) -> list[dict]:
+        plugins = [{"name": n, "source": n} for n in ("one", "two", "three")]
+        _make_marketplace(
+            tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins}
+        )
+        for entry in plugins:
+            _make_plugin(tmp_path, entry["name"], {"name": entry["name"], **self.PLUGIN})
+        commit()
+        return plugins
+
+    def test_changed_plugin_directory(self, git_repo, tmp_path: Path):
+        plugins = self._setup(tmp_path, git_repo)
+        (tmp_path / "plugins" / "two" / "README.md").write_text("x", encoding="utf-8")
+        affected = mod.plugin_filter("HEAD")
+        assert [entry["name"] for entry in plugins if affected(entry)] == ["two"]
+
+    def test_changed_marketplace_entry(self, git_repo, tmp_path: Path):
+        plugins = self._setup(tmp_path, git_repo)
+        plugins[2]["description"] = "new"
+        plugins.append({"name": "four", "source": "four"})
+        _make_marketplace(
+            tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins}
+        )
+        affected = mod.plugin_filter("HEAD")
+        assert [entry["name"] for entry in plugins if affected(entry)] == ["three", "four"]
+
+    def test_main_validates_only_changed(self, git_repo, tmp_path: Path, capsys):
+        self._setup(tmp_path, git_repo)
+        _make_plugin(tmp_path, "one", {"name": "one", **self.PLUGIN, "version": "1"})
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD"])
+        out = capsys.readouterr().out
+        assert "Validating 1 plugin(s) changed since HEAD" in out
+        assert "plugins[0] (one): version '1' is not valid semver" in out
+
+    def test_catalog_check_covers_untouched_plugins(self, git_repo, tmp_path: Path, capsys):
+        self._setup(tmp_path, git_repo)
+        plugin_catalog.main([])
+        # A hand-edited record for a plugin with no changes
+        catalog = json.loads(plugin_catalog.CATALOG_PATH.read_text(encoding="utf-8"))
+        catalog["plugins"][0]["hooks"] = [{"event": "SessionStart", "matcher": None}]
+        plugin_catalog.CATALOG_PATH.write_text(plugin_catalog.render(catalog), encoding="utf-8")
+        git_repo()
+        repo_scan.reset_snapshot()
+        with pytest.raises(SystemExit):
+            mod.main(["--changed-since", "HEAD"])
+        assert f"{plugin_catalog.CATALOG_PATH} is out of date" in capsys.readouterr().out
+
+    def test_rule_change_validates_everything(self, git_repo, tmp_path: Path):
+        plugins = self._setup(tmp_path, git_repo)
+        (tmp_path / "scripts").mkdir()
+        (tmp_path / "scripts" / "validate_manifests.py").write_text("# new\n", encoding="utf-8")
+        affected = mod.plugin_filter("HEAD")
+        assert all(affected(entry) for entry in plugins)
+
+
+PLUGIN = {
+    "version": "1.0.0",
+    "description": "A plugin",
+    "author": {"name": "user"},
+    "license": "MIT",
+}
+
+
+def _setup_plugins(tmp_path: Path, names: list[str], **extra) -> list[dict]:
+    plugins = [{"name": n, "source": n} for n in names]
+    _make_marketplace(
+        tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins, **extra}
+    )
+    for name in names:
+        _make_plugin(tmp_path, name, {"name": name, **PLUGIN})
+    return plugins
+
+
+class TestIterMarketplace:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    def test_matches_json_loads(self, tmp_path: Path, chunk_size: int):
+        data = {
+            "name": "mé",
+            "count": 12345,
+            "plugins": [{"name": "a", "n": 1.5e3}, {"name": "b ☃", "tags": []}, 7],
+            "metadata": {"nested": {"plugins": [1]}},
+            "owner": None,
+        }
+        path = tmp_path / "marketplace.json"
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        items = list(mod.iter_marketplace(path, chunk_size))
+        entries = [value for key, value in items if key == mod.PLUGIN_ENTRY]
+        fields = dict(item for item in items if item[0] != mod.PLUGIN_ENTRY)
+        assert entries == data["plugins"]
+        assert fields == {**data, "plugins": []}
+
+    def test_plugins_not_array(self, tmp_path: Path):
+        path = tmp_path / "marketplace.json"
+        path.write_text('{"plugins": {"a": 1}}', encoding="utf-8")
+        assert list(mod.iter_marketplace(path)) == [("plugins", {"a": 1})]
+
+    def test_empty(self, tmp_path: Path):
+        path = tmp_path / "marketplace.json"
+        path.write_text(' { "plugins" : [ ] } \n', encoding="utf-8")
+        assert list(mod.iter_marketplace(path, 2)) == [("plugins", [])]
+
+    @pytest.mark.parametrize(
+        "text",
+        ['{"plugins": [{"name": "a"}, ]}', '{"plugins": [1 2]}', "[]", '{"a": 1} x', '{"a": 1'],
+    )
+    def test_invalid(self, tmp_path: Path, text: str):
+        path = tmp_path / "marketplace.json"
+        path.write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError, match="is not valid JSON"):
+            list(mod.iter_marketplace(path, 4))
+
+    def test_syntax_error_fails_without_reading_on(self, tmp_path: Path):
+        path = tmp_path / "marketplace.json"
+        path.write_text('{"plugins": [{"a": 1,, "b": 2}' + ", 1" * 10000 + "]}", encoding="utf-8")
+        with open(path, "rb") as f:
+            stream = mod.JsonStream(f, str(path), 64)
+            stream.expect("{")
+            stream.value()
+            stream.expect(":")
+            stream.expect("[")
+            with pytest.raises(ValueError, match="Expecting property name"):
+                stream.value()
+            assert f.tell() == 64
+
+    def test_entries_parsed_lazily(self, tmp_path: Path):
+        path = tmp_path / "marketplace.json"
+        path.write_text('{"plugins": [1, 2, oops]}', encoding="utf-8")
+        items = mod.iter_marketplace(path, 4)
+        assert [next(items), next(items), next(items)] == [
+            ("plugins", []),
+            (mod.PLUGIN_ENTRY, 1),
+            (mod.PLUGIN_ENTRY, 2),
+        ]
+        with pytest.raises(ValueError):
+            next(items)
+
+
+class TestValidateStreaming:
+    def test_duplicates(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"):
+        monkeypatch.chdir(tmp_path)
+        plugins = _setup_plugins(tmp_path, ["one", "two"])
+        plugins += [{"name": "one", "source": "two"}, {"name": "three", "source": "two"}]
+        _make_marketplace(tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins})
+        errors, found, validated = mod.validate_streaming()
+        assert (found, validated) == (4, 4)
+        assert errors == [
+            "plugins[2] (one): duplicate name, also used by plugins[0]",
+            "plugins[2] (one): duplicate source 'two', also used by plugins[1]",
+            "plugins[3] (three): duplicate source 'two', also used by plugins[1]",
+        ]
+
+    def test_parallel_matches_serial(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"):
+        monkeypatch.chdir(tmp_path)
+        names = [f"p{i}" for i in range(40)]
+        _setup_plugins(tmp_path, names, metadata=[])
+        for name in names[::3]:
+            _make_plugin(tmp_path, name, {"name": name, **PLUGIN, "version": "1"})
+        serial = mod.validate_streaming(jobs=1)
+        assert len(serial[0]) == 15
+        assert mod.validate_streaming(jobs=4) == serial
+
+    def test_only_affected_validated(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"):
+        monkeypatch.chdir(tmp_path)
+        _setup_plugins(tmp_path, ["one", "two", "three"])
+        _make_plugin(tmp_path, "one", {"name": "one", **PLUGIN, "version": "1"})
+        errors, found, validated = mod.validate_streaming(
+            affected=lambda entry: entry["name"] != "one"
+        )
+        assert (errors, found, validated) == ([], 3, 2)
+
+    def test_cache_skips_unchanged(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"):
+        monkeypatch.chdir(tmp_path)
+        plugins = _setup_plugins(tmp_path, ["one", "two", "three"])
+        cache: dict = {}
+        assert mod.validate_streaming(cache=cache)[0] == []
+        assert set(cache["plugins"]) == {"one", "two", "three"}
+
+        checked = []
+        original = mod.validate_plugin_entry
+
+        def spy(entry, index, raw=None):
+            checked.append(entry["name"])
+            return original(entry, index, raw)
+
+        monkeypatch.setattr(mod, "validate_plugin_entry", spy)
+        assert mod.validate_streaming(cache=cache)[0] == []
+        assert checked == []
+
+        _make_plugin(tmp_path, "two", {"name": "two", **PLUGIN, "version": "2"})
+        plugins[2]["description"] = "changed entry"
+        _make_marketplace(tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins})
+        errors = mod.validate_streaming(cache=cache)[0]
+        assert checked == ["two", "three"]
+        assert errors == ["plugins[1] (two): version '2' is not valid semver (expected X.Y.Z)"]
+
+        # Errors are cached too
+        checked.clear()
+        assert mod.validate_streaming(cache=cache)[0] == errors
+        assert checked == []
+
+    def test_cache_follows_moved_entry(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"):
+        monkeypatch.chdir(tmp_path)
+        plugins = _setup_plugins(tmp_path, ["one", "two"])
+        _make_plugin(tmp_path, "two", {"name": "two", **PLUGIN, "version": "2"})
+        cache: dict = {}
+        assert mod.validate_streaming(cache=cache)[0] == [
+            "plugins[1] (two): version '2' is not valid semver (expected X.Y.Z)"
+        ]
+
+        monkeypatch.setattr(mod, "validate_plugin_entry", None)
+        _make_marketplace(
+            tmp_path, {"name": "m", "owner": {}, "metadata": {}, "plugins": plugins[::-1]}
+        )
+        assert mod.validate_streaming(cache=cache)[0] == [
+            "plugins[0] (two): version '2' is not valid semver (expected X.Y.Z)"
+        ]
+
+    def test_cache_same_content_not_reparsed(
+        self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch"
+    ):
+        monkeypatch.chdir(tmp_path)
+        _setup_plugins(tmp_path, ["one"])
+        cache: dict = {}
+        mod.validate_streaming(cache=cache)
+        manifest = tmp_path / "plugins" / "one" / ".claude-plugin" / "plugin.json"
+        manifest.write_text(manifest.read_text(encoding="utf-8"), encoding="utf-8")
+        cache["plugins"]["one"]["mtime"] = 0
+        monkeypatch.setattr(mod, "validate_plugin_entry", None)
+        assert mod.validate_streaming(cache=cache)[0] == []
+        assert cache["plugins"]["one"]["mtime"] == manifest.stat().st_mtime_ns
+
+    def test_main_cache(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch", capsys):
+        monkeypatch.chdir(tmp_path)
+        _setup_plugins(tmp_path, ["one", "two"])
+        plugin_catalog.main([])
+        mod.main(["--cache", "--jobs", "2"])
+        assert "Found 2 plugin(s) in marketplace" in capsys.readouterr().out
+        cache = json.loads(mod.DEFAULT_CACHE.read_text(encoding="utf-8"))
+        assert cache["version"] == mod.CACHE_VERSION
+        assert set(cache["plugins"]) == {"one", "two"}
+        # The catalog check's file hashes share the cache
+        assert str(Path("plugins/one/.claude-plugin/plugin.json")) in cache["files"]
+
+    def test_main_invalid_json(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch", capsys):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / ".claude-plugin").mkdir()
+        (tmp_path / ".claude-plugin" / "marketplace.json").write_text("{", encoding="utf-8")
+        with pytest.raises(SystemExit):
+            mod.main([])
+        assert "is not valid JSON" in capsys.readouterr().out
+
+    def test_main_stale_catalog(self, tmp_path: Path, monkeypatch: "pytest.MonkeyPatch", capsys):
+        monkeypatch.chdir(tmp_path)
+        _setup_plugins(tmp_path, ["one"])
+        plugin_catalog.main([])
+        _make_plugin(tmp_path, "one", {"name": "one", **PLUGIN, "description": "changed"})
+        repo_scan.reset_snapshot()
+        with pytest.raises(SystemExit):
+            mod.main([])
+        assert f"{plugin_catalog.CATALOG_PATH} is out of date" in capsys.readouterr().out
@@ -0,0 +1,231 @@
+"""Tests for scripts/watch.py."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import index_decisions
+import index_research
+import plugin_catalog
+import repo_scan
+import validate_frontmatter
+import validate_manifests
+import watch as mod
+
+ADR = "---\ntitle: {title}\nstatus: accepted\ndate: 2026-02-13\ndecision-makers: [alice]\n---\n"
+PLUGIN = {
+    "name": "foo",
+    "version": "1.0.0",
+    "description": "d",
+    "author": {"name": "a"},
+    "license": "MIT",
+}
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    decisions = tmp_path / "docs" / "decisions"
+    decisions.mkdir(parents=True)
+    (decisions / "0001-first.md").write_text(
+        ADR.format(title="ADR-0001: First") + "\n# First\n\n## Context\n", encoding="utf-8"
+    )
+    (decisions / "0002-second.md").write_text(
+        ADR.format(title="ADR-0002: Second") + "\nSee [context](0001-first.md#context).\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "docs" / "research").mkdir()
+    (tmp_path / "README.md").write_text("[decisions](docs/decisions/)\n", encoding="utf-8")
+    (tmp_path / ".claude-plugin").mkdir()
+    (tmp_path / ".claude-plugin" / "marketplace.json").write_text(
+        json.dumps(
+            {
+                "name": "m",
+                "owner": {},
+                "metadata": {},
+                "plugins": [{"name": "foo", "source": "foo"}, {"name": "bar", "source": "bar"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    for name in ("foo", "bar"):
+        manifest = tmp_path / "plugins" / name / ".claude-plugin" / "plugin.json"
+        manifest.parent.mkdir(parents=True)
+        manifest.write_text(json.dumps({**PLUGIN, "name": name}), encoding="utf-8")
+    index_decisions.main([])
+    index_research.main([])
+    plugin_catalog.main([])
+    repo_scan.reset_snapshot()
+    return tmp_path
+
+
+STALE_CATALOG = (
+    f"{plugin_catalog.CATALOG_PATH} is out of date; run python scripts/plugin_catalog.py"
+)
+
+
+class TestWatcher:
+    def test_reports_changes(self, repo: Path):
+        watcher = mod.Watcher()
+        assert watcher.poll() == set()
+
+        (repo / "docs" / "decisions" / "0001-first.md").write_text("changed", encoding="utf-8")
+        (repo / "docs" / "decisions" / "0002-second.md").unlink()
+        (repo / "docs" / "new").mkdir()
+        (repo / "docs" / "new" / "page.md").write_text("x", encoding="utf-8")
+        (repo / "CHANGELOG.md").write_text("x", encoding="utf-8")
+        (repo / "notes.txt").write_text("not watched", encoding="utf-8")
+
+        assert watcher.poll() == {
+            os.path.join("docs", "decisions", "0001-first.md"),
+            os.path.join("docs", "decisions", "0002-second.md"),
+            os.path.join("docs", "new"),
+            os.path.join("docs", "new", "page.md"),
+            "CHANGELOG.md",
+        }
+        assert watcher.poll() == set()
+
+
+class TestSession:
+    def test_initial_run_passes(self, repo: Path):
+        session = mod.Session(list(mod.CHECKS))
+        assert session.refresh() == list(mod.CHECKS)
+        assert session.problems == {name: [] for name in mod.CHECKS}
+
+    def test_only_changed_documents_revalidated(self, repo: Path, monkeypatch):
+        session = mod.Session(["frontmatter", "manifests", "decisions"])
+        session.refresh()
+        checked = []
+        original = validate_frontmatter.check_document
+
+        def spy(kind, path, fields):
+            checked.append(path.name)
+            return original(kind, path, fields)
+
+        monkeypatch.setattr(validate_frontmatter, "check_document", spy)
+        path = repo / "docs" / "decisions" / "0002-second.md"
+        path.write_text(ADR.format(title="ADR-0002: Renamed").replace("accepted", "bogus"))
+
+        ran = session.refresh({os.path.join("docs", "decisions", "0002-second.md")})
+        assert ran == ["frontmatter", "decisions"]
+        assert checked == ["0002-second.md"]
+        assert len(session.problems["frontmatter"]) == 1
+        assert "invalid status 'bogus'" in session.problems["frontmatter"][0]
+        # Nothing is written, the stale index is reported
+        index = repo / "docs" / "decisions" / "_INDEX.md"
+        assert "ADR-0002: Second" in index.read_text()
+        assert session.problems["decisions"] == [
+            f"{index_decisions.INDEX_FILE} is out of date; run python scripts/index_decisions.py"
+        ]
+
+    def test_frontmatter_follows_changed_paths(self, repo: Path, monkeypatch):
+        session = mod.Session(["frontmatter"])
+        session.refresh()
+        discovered = []
+        original = validate_frontmatter.discover
+
+        def spy(only=None):
+            discovered.append(only)
+            return original(only)
+
+        monkeypatch.setattr(validate_frontmatter, "discover", spy)
+        adr = repo / "docs" / "decisions" / "0002-second.md"
+        adr.write_text("no front matter")
+        changed = {os.path.join("docs", "decisions", "0002-second.md")}
+        session.refresh(changed)
+        assert len(session.problems["frontmatter"]) == 1
+        adr.unlink()
+        session.refresh(changed)
+        assert session.problems["frontmatter"] == []
+        # The directories are never walked again
+        assert discovered == [changed, changed]
+
+    def test_heading_change_breaks_dependent_link(self, repo: Path):
+        session = mod.Session(["links"])
+        session.refresh()
+        (repo / "docs" / "decisions" / "0001-first.md").write_text(
+            ADR.format(title="ADR-0001: First") + "\n# First\n\n## Background\n"
+        )
+        session.refresh({os.path.join("docs", "decisions", "0001-first.md")})
+        assert session.problems["links"] == [
+            f"{Path('docs/decisions/0002-second.md')}:8: [context](0001-first.md#context)"
+        ]
+
+    def test_new_file_fixes_link(self, repo: Path):
+        (repo / "README.md").write_text("[guide](docs/guide.md)\n")
+        session = mod.Session(["links"])
+        session.refresh()
+        assert len(session.problems["links"]) == 1
+        (repo / "docs" / "guide.md").write_text("# Guide\n")
+        session.refresh({os.path.join("docs", "guide.md")})
+        assert session.problems["links"] == []
+
+    def test_only_changed_plugin_revalidated(self, repo: Path, monkeypatch):
+        session = mod.Session(["manifests"])
+        session.refresh()
+        checked = []
+        original = validate_manifests.validate_plugin_entry
+
+        def spy(entry, index, raw=None):
+            checked.append(entry["name"])
+            return original(entry, index, raw)
+
+        monkeypatch.setattr(validate_manifests, "validate_plugin_entry", spy)
+        manifest = repo / "plugins" / "bar" / ".claude-plugin" / "plugin.json"
+        manifest.write_text(json.dumps({**PLUGIN, "name": "bar", "version": "1.0"}))
+        session.refresh({os.path.join("plugins", "bar", ".claude-plugin", "plugin.json")})
+        assert checked == ["bar"]
+        assert session.problems["manifests"] == [
+            "plugins[1] (bar): version '1.0' is not valid semver (expected X.Y.Z)",
+            STALE_CATALOG,
+        ]
+
+        # Entries and manifests that didn't change keep their results
+        session.refresh({os.path.join(".claude-plugin", "marketplace.json")})
+        assert checked == ["bar"]
+
+    def test_duplicate_plugins_reported(self, repo: Path):
+        session = mod.Session(["manifests"])
+        session.refresh()
+        marketplace = repo / ".claude-plugin" / "marketplace.json"
+        data = json.loads(marketplace.read_text())
+        data["plugins"].append({"name": "foo", "source": "bar"})
+        marketplace.write_text(json.dumps(data))
+        session.refresh({os.path.join(".claude-plugin", "marketplace.json")})
+        assert session.problems["manifests"] == [
+            "plugins[2] (foo): duplicate name, also used by plugins[0]",
+            "plugins[2] (foo): duplicate source 'bar', also used by plugins[1]",
+            STALE_CATALOG,
+        ]
+
+    def test_stale_catalog_reported(self, repo: Path):
+        session = mod.Session(["manifests"])
+        session.refresh()
+        assert session.problems["manifests"] == []
+        readme = repo / "plugins" / "foo" / "README.md"
+        readme.write_text("new file", encoding="utf-8")
+        session.refresh({os.path.join("plugins", "foo", "README.md")})
+        assert session.problems["manifests"] == [STALE_CATALOG]
+        readme.unlink()
+        session.refresh({os.path.join("plugins", "foo", "README.md")})
+        assert session.problems["manifests"] == []
+
+    def test_unrelated_change_runs_nothing(self, repo: Path):
+        session = mod.Session(["frontmatter", "manifests", "decisions", "research"])
+        session.refresh()
+        assert session.refresh({"README.md"}) == []
+
+
+class TestMain:
+    def test_initial_run_then_stop(self, repo: Path, monkeypatch, capsys):
+        def interrupt(seconds):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(mod.time, "sleep", interrupt)
+        mod.main(["--only", "frontmatter", "--only", "links"])
+        out = capsys.readouterr().out
+        assert "frontmatter: ok" in out
+        assert "links: ok" in out
+        assert "all checks pass" in out